@@ -10,6 +10,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.views.generic.list import ListView
 
+from decouple import config
 from rest_framework.viewsets import ModelViewSet
 from guardian.shortcuts import get_objects_for_user
 
@@ -18,7 +19,7 @@ from .forms import SignUpForm, LoginForm
 
 from condo.models import Condo
 from rcdemo.forms import RFSDemoForm
-from rcdemo.tasks import rcdemo_task
+from rcdemo.tasks import rcdemo_task, rcdemo_preview
 from investmentplan.converter import Converter
 
 def login_view(request):
@@ -39,6 +40,13 @@ def login_view(request):
         elif demo_form is not None and demo_form.is_valid():
             conv_kwargs = demo_form.save()
 
+            # demo plans come from the ladder heuristic in this request, so anonymous users
+            # do not queue behind the LP workers; RCDEMO_EXACT also queues the exact plan
+            if config("RCDEMO_PREVIEW", default=True, cast=bool):
+                task_id = rcdemo_preview(exact=config("RCDEMO_EXACT", default=False, cast=bool), **conv_kwargs, naive_rates=True)
+                if task_id is not None:
+                    return redirect(reverse("rcdemo:plan", args=(task_id, )))
+
             result = rcdemo_task.delay(**conv_kwargs, naive_rates=True)
             return redirect(reverse("rcdemo:progress", args=(result.task_id, )))
         else:
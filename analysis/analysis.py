@@ -1,6 +1,6 @@
 from django.core.exceptions import ObjectDoesNotExist
 
-from .tasks import analysis_forecast_task
+from .tasks import analysis_study_task
 from .models import Analysis, Forecast
 from condo.models import Condo
 from reservefundstudy.models import Study
@@ -11,6 +11,7 @@ def analysis():
     """
     Uses preselected forecasted yield curves from PYYC and studies
     Generates forecast for each pair of curves and studies
+    One task per study solves all curves; see analysis_study_task
     """
     curve_ids = [3250, 3262, 3259, 3261, 3289, 3287, 3299]
     study_ids = [55, 35, 57, 59]
@@ -20,10 +21,9 @@ def analysis():
     except ObjectDoesNotExist:
         group = 0
     for i, id in enumerate(study_ids):
-        for j, curve_id in enumerate(curve_ids):
-            group += 1
-            study = Study.objects.get(id=id)
-            result = analysis_forecast_task.delay(study.condo.id, study.id, group, curve_id)
+        study = Study.objects.get(id=id)
+        result = analysis_study_task.delay(study.condo.id, study.id, group + 1, curve_ids)
+        group += len(curve_ids)
 
 class Converter(IPConverter):
 
@@ -32,7 +32,14 @@ class Converter(IPConverter):
         self.current = YCForecast.objects.get(id=curve_id)
 
     def _set_rates(self):
-        bank_rates, rates = self.current.bocgicforecast.split_rates(length=len(self.dates))
+        return self.curve_rates(self.current)
+
+    def curve_rates(self, curve):
+        """
+        Projected bank account rates and rates for each investment type of a PYYC
+        Forecast, over this study's dates; the converter's own curve is unchanged
+        """
+        bank_rates, rates = curve.bocgicforecast.split_rates(length=len(self.dates))
         bank_rates = [rate - self.spread for rate in bank_rates]
         bank_rates = self._make_zero(bank_rates)
         rates = [self._make_zero(period) for period in rates]
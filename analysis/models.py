@@ -36,6 +36,25 @@ class ForecastManager(Manager):
                     """
             )
 
+    def bulk_create_array(self, array, group, dates, batch_size=None):
+        """
+        bulk_create from a Pyondo.values_array(): each record becomes a Forecast with
+        group set and month taken from dates, skipping the values() list of dicts
+        """
+        if len(array) != len(dates):
+            raise ValueError(
+                    """
+                    The length of the dates array does not match the number of periods
+                    in Pyondo model output
+                    """
+            )
+        names = array.dtype.names
+        objs = (
+            self.model(group=group, month=month, **dict(zip(names, row)))
+            for row, month in zip(array.tolist(), dates)
+        )
+        return super().bulk_create(objs, batch_size=batch_size)
+
 class Forecast(Model):
     objects = ForecastManager()
 
@@ -2,6 +2,7 @@ import time
 from decimal import Decimal
 
 from celery import shared_task
+from decouple import config
 
 from django.db import transaction
 
@@ -13,23 +14,107 @@ def analysis_forecast_task(condo_id, study_id, group, curve_id):
     from .models import Forecast
     from .analysis import Converter
     from pyondo.pyondo import Pyondo
+    from pyondo.cache import SolutionCache
     from reservefundstudy.models import Study
     from pyyc.models import BOCGICForecast, Forecast as YCForecast
 
     converter = Converter(condo_id=condo_id, study_id=study_id, curve_id=curve_id)
     kwargs = converter.make_kwargs()
     invmt_plan = Pyondo(**kwargs)
-    model = invmt_plan.pyondo()
-    values = invmt_plan.values()
+    solved = SolutionCache().solve(invmt_plan)
+    values = solved["values"]
 
     study = Study.objects.get(pk=study_id)
 
     with transaction.atomic():
-        forecast = Forecast.objects.bulk_create(
-            objs=(Forecast(**vals) for vals in values),
+        forecast = Forecast.objects.bulk_create_array(
+            solved["array"],
             group=group,
             dates=converter.dates
         )
 
     print ("success!")
     return values
+
+@shared_task
+def analysis_study_task(condo_id, study_id, group, curve_ids):
+    """
+    Generates a forecast for one study against each curve in curve_ids.
+    The study is converted once and only the rates differ between curves; curves not
+    already in the SolutionCache are solved together with ParametricPyondo.solve_many
+    across PYONDO_WORKERS processes (default 1, i.e. in this process), each worker
+    re-solving its curves from the previous basis.
+    Forecast groups are numbered group, group + 1, ... in curve_ids order
+    """
+
+    from .models import Forecast
+    from .analysis import Converter
+    from pyondo.pyondo import Pyondo
+    from pyondo.parametric import ParametricPyondo
+    from pyondo.cache import SolutionCache
+    from pyyc.models import Forecast as YCForecast
+
+    converter = Converter(condo_id=condo_id, study_id=study_id, curve_id=curve_ids[0])
+    kwargs = converter.make_kwargs()
+
+    scenarios = [{}]
+    for curve_id in curve_ids[1:]:
+        bank_rates, rates = converter.curve_rates(YCForecast.objects.get(id=curve_id))
+        scenarios.append({"bank_rates": bank_rates, "rates": rates})
+
+    solved = SolutionCache().solve_many(
+        ParametricPyondo,
+        scenarios,
+        workers=config("PYONDO_WORKERS", default=1, cast=int),
+        base=kwargs
+    )
+
+    results = []
+    for i, result in enumerate(solved):
+        if result["status"] != "ok":
+            raise TypeError(Pyondo.UNSOLVED)
+        with transaction.atomic():
+            forecast = Forecast.objects.bulk_create_array(
+                result["array"],
+                group=group + i,
+                dates=converter.dates
+            )
+        results.append(result["values"])
+
+    print ("success!")
+    return results
+
+@shared_task
+def analysis_robust_task(condo_id, study_id, curve_ids, objective="expected"):
+    """
+    One plan for one study that hedges across every curve in curve_ids: the first
+    month's investments are shared by all curves and later months adapt to each, solved
+    as a single pyondo.scenario.ScenarioPyondo program with equally weighted curves.
+    Returns the first month's investments (as select_and_save expects) and the plan's
+    interest and bank balances under each curve, in curve_ids order
+    """
+
+    from .analysis import Converter
+    from pyondo.pyondo import Pyondo
+    from pyondo.scenario import ScenarioPyondo
+    from pyyc.models import Forecast as YCForecast
+
+    converter = Converter(condo_id=condo_id, study_id=study_id, curve_id=curve_ids[0])
+    kwargs = converter.make_kwargs()
+
+    paths = []
+    for curve_id in curve_ids:
+        bank_rates, rates = converter.curve_rates(YCForecast.objects.get(id=curve_id))
+        paths.append({"bank_rates": bank_rates, "rates": rates})
+
+    robust = ScenarioPyondo(kwargs, paths, objective=objective)
+    robust.pyondo()
+    statistics = robust.statistics()
+
+    return {
+        "first_month": robust.first_month(),
+        "paths": [
+            dict(record, curve_id=curve_id)
+            for record, curve_id in zip(Pyondo.records(statistics), curve_ids)
+        ],
+    }
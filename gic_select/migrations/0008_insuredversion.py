@@ -0,0 +1,22 @@
+# Generated by Django 2.1.3 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gic_select', '0007_auto_20190203_2143'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsuredVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=4, unique=True, verbose_name='Insured List')),
+                ('version', models.CharField(max_length=32, verbose_name='Version')),
+                ('date_modified', models.DateTimeField(auto_now=True, verbose_name='Date and Time Modified')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def mark_latest_current(apps, schema_editor):
+    """
+    GICPlan.save used to archive every other plan's GICPlans; mark the latest GICPlan of
+    each plan Current and archive the rest, as GICPlan.save now does per plan
+    """
+    GICPlan = apps.get_model("gic_select", "GICPlan")
+    latest = {}
+    for gic_plan in GICPlan.objects.order_by("plan_id", "date_added").only("id", "plan_id"):
+        latest[gic_plan.plan_id] = gic_plan.id
+    GICPlan.objects.exclude(id__in=latest.values()).update(status_bool=False, status="Archived")
+    GICPlan.objects.filter(id__in=latest.values()).update(status_bool=True, status="Current")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gic_select', '0008_insuredversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_latest_current, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import transaction
 from django.db.models import Manager, Model, BooleanField, CharField, DateField, DateTimeField, FileField, DecimalField, \
                             FloatField, IntegerField, PositiveSmallIntegerField, ForeignKey, \
@@ -34,8 +36,8 @@ class GICPlan(Model):
     """
     GICPlan model logs details of the particular GIC Forecast including which Investment Plan it is related to,
     when it was added, and whether it is the Current or Archived Plan.
-    There is only ONE record designated Current and all other records are designated ARCHIVED
-    by modifying the .save() method
+    There is only ONE record designated Current PER PLAN and all other records of the plan are
+    designated ARCHIVED by modifying the .save() method
     The actual GICs outlined in the plan are detailed in GICSelect
     """
 
@@ -63,9 +65,9 @@ class GICPlan(Model):
 
         self.date_modified = timezone.now()
 
-        if GICPlan.objects.all():
-            print (self.date_added, GICPlan.objects.latest("date_added").date_added)
-            self.status_bool = self.date_added > GICPlan.objects.latest("date_added").date_added
+        if GICPlan.objects.filter(plan=self.plan):
+            print (self.date_added, GICPlan.objects.filter(plan=self.plan).latest("date_added").date_added)
+            self.status_bool = self.date_added > GICPlan.objects.filter(plan=self.plan).latest("date_added").date_added
         else:
             self.status_bool = True
 
@@ -74,8 +76,10 @@ class GICPlan(Model):
         if self.status_bool:
             try:
                 GICPlan.objects.filter(
+                    plan=self.plan,
                     date_added__lt=self.date_added).update(status_bool=False)
                 GICPlan.objects.filter(
+                    plan=self.plan,
                     date_added__lt=self.date_added).update(status=self.Status.ARCHIVED.value)
             except GICPlan.DoesNotExist:
                 pass
@@ -100,8 +104,46 @@ class GICSelect(Model):
                 self.gic_plan, self.gic, self.amount
         )
 
-class CDIC(Model):
+class InsuredList(Model):
+    """
+    Insured institutions list (CDIC, DICO); saving or deleting a record gives the list a
+    new InsuredVersion. Bulk writes (bulk_create, update, QuerySet.delete) do not go through
+    save / delete and must call bump_version(), as gic_select.select.sync_insureds does
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def bump_version(cls):
+        InsuredVersion.objects.update_or_create(name=cls.__name__, defaults={"version": uuid.uuid4().hex})
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.bump_version()
+
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        deleted = super().delete(*args, **kwargs)
+        self.bump_version()
+        return deleted
+
+class CDIC(InsuredList):
     name = CharField("Name of Insured Instituion", max_length=100)
 
-class DICO(Model):
+class DICO(InsuredList):
     name = CharField("Name of Insured Instituion", max_length=400)
+
+class InsuredVersion(Model):
+    """
+    Version stamp of an insured list, one record per list ("CDIC", "DICO")
+    version is replaced every time the list is written (see InsuredList), so caches built
+    from the list (gic_select.select.insured_index) know when to rebuild
+    """
+    name = CharField("Insured List", max_length=4, unique=True)
+    version = CharField("Version", max_length=32)
+    date_modified = DateTimeField("Date and Time Modified", auto_now=True)
+
+    def __str__(self):
+        return "{} insured list version {}".format(self.name, self.version)
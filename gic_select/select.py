@@ -2,34 +2,101 @@ import socket, os
 from datetime import datetime as dt, date
 from urllib.request import urlopen, Request, urlretrieve
 import ssl
+from collections import OrderedDict
 
+import numpy as np
 from decouple import config
-from bs4 import BeautifulSoup as bs
+from bs4 import BeautifulSoup as bs, SoupStrainer
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 
+from django.db.models import Count, Max, OuterRef, Subquery
 from django.db.models.query import QuerySet
 from django.db import transaction
+from django.utils import timezone
 
-from .models import GICs, GICPlan, GICSelect, CDIC, DICO
+from pyondo.terms import TermLadder
 
-def update_gics(headless=False):
-    # host = "0.0.0.0"  # Bind to 0.0.0.0 to allow external access
+from .models import GICs, GICPlan, GICSelect, CDIC, DICO, InsuredVersion
 
-    # Set host to externally accessible web server address
-    # host = socket.gethostbyname(socket.gethostname())
+GIC_URL = "http://www.financialpost.com/personal-finance/rates/gic-annual.html"
+GIC_FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "gic-annual.html")
 
+def update_gics(headless=False, source=None):
+    """
+    Saves the latest Financial Post annual GIC rates to the GICs model
+    > the page is fetched by source (see fetch_gics), plain HTTP by default, and parsed in a
+      single pass; Chrome is only started if that fails
+
+    Parameters
+    -----------
+    headless:   run Chrome headless, if it is needed
+    source:     name of a fetcher in GIC_SOURCES; defaults to the GIC_SOURCE setting ("http")
+    """
     print ("initializing GIC Update...")
+    values = fetch_gics(source=source, headless=headless)
+    GICs.objects.bulk_create(GICs(**vals) for vals in values)
+    print ("GIC Update complete")
+    return values
+
+def parse_gics(page, year=None):
+    """
+    GIC rates of the Financial Post annual GIC table, read in one pass over its rows
+    > "heading" rows are skipped and the first "heading npTxtLeft" row ends the table
+    > each other row is issuer, date ("14 Feb"), minimum amount, then one rate per term in
+      percent; rows whose date or amount cannot be read and rates that are not numbers
+      (e.g. "N/A") are left out
+
+    Parameters
+    -----------
+    page:       HTML of the page (bytes or str)
+    year:       year of the dates; defaults to the current year
+
+    Returns
+    -----------
+    list of dicts of issuer, date, amount, term and rate, as GICs fields
+    """
+    year = year or dt.now().year
+    soup = bs(page, "html.parser", parse_only=SoupStrainer("tr"))
+
+    values = []
+    for row in soup.find_all("tr"):
+        heading = " ".join(row.get("class", []))
+        if heading == "heading":
+            continue
+        elif heading == "heading npTxtLeft":
+            break
+        cells = [cell.get_text(strip=True) for cell in row.find_all("td")]
+        if len(cells) < 4:
+            continue
+        try:
+            dct = {
+                "issuer": cells[0],
+                "date": dt.strptime(cells[1], "%d %b").replace(year=year),
+                "amount": int(cells[2].replace(",", "").replace("$", "")),
+            }
+        except ValueError:
+            continue
+        for term, cell in enumerate(cells[3:], 1):
+            try:
+                rate = float(cell) / 100
+            except ValueError:
+                continue
+            values.append(dict(dct, term=term, rate=rate))
+    return values
+
+def http_gics_page(url=GIC_URL, headless=False):
+    """The GIC page by plain HTTP request"""
+    return read_page(url)
+
+def chrome_gics_page(url=GIC_URL, headless=False):
+    """The GIC page as rendered by Chrome through Selenium (CHROME_BIN, CHROMEDRIVER_PATH)"""
     if headless:
-        # Instantiate the remote WebDriver
         options = Options()
         options.set_headless(headless=headless)
         options.binary_location = config('CHROME_BIN')
-        # chrome_options.add_argument('window-size=1920x1080')
-        # capabilities = {'browserName': 'chrome', 'javascriptEnabled': True}
-        # capabilities.update(chrome_options.to_capabilities())
     elif headless == False:
         options=None
     else:
@@ -39,32 +106,53 @@ def update_gics(headless=False):
     chrome = webdriver.Chrome(executable_path=config('CHROMEDRIVER_PATH'),
                     options=options
     )
-    print ("Success")
-    url = "http://www.financialpost.com/personal-finance/rates/gic-annual.html"
-    print ("Obtaining URL...")
-    chrome.get(url)
-    print ("Success")
-    print ("Updating values...")
-    rows = chrome.find_elements_by_tag_name("tr")
-    values = []
-    for row in rows:
-        dct = {}
-        if row.get_attribute("class") == "heading":
-            pass
-        elif row.get_attribute("class") == "heading npTxtLeft":
-            break
-        else:
-            cells = row.find_elements_by_tag_name("td")
-            dct["issuer"] = cells[0].text
-            dct["date"] = dt.strptime(cells[1].text, "%d %b").replace(year=dt.now().year)
-            dct["amount"] = cells[2].text
-            for i, cell in enumerate(cells[3:]):
-                dct["term"] = i + 1
-                dct["rate"] = float(cell.text) / 100
-                values.append(dct.copy())
-    chrome.quit()
-    GICs.objects.bulk_create(GICs(**vals) for vals in values)
-    print ("GIC Update complete")
+    try:
+        chrome.get(url)
+        return chrome.page_source
+    finally:
+        chrome.quit()
+
+def fixture_gics_page(url=None, headless=False):
+    """
+    A saved copy of the GIC page (GIC_FIXTURE setting, by default gic_select/fixtures/gic-annual.html)
+    for tests and offline development
+    """
+    with open(config("GIC_FIXTURE", default=GIC_FIXTURE), "rb") as page:
+        return page.read()
+
+GIC_SOURCES = OrderedDict([
+    ("http", http_gics_page),
+    ("chrome", chrome_gics_page),
+    ("fixture", fixture_gics_page),
+])
+
+def fetch_gics(source=None, headless=False):
+    """
+    Fetches the GIC page with GIC_SOURCES[source] and parses it with parse_gics
+    > if the http source cannot fetch the page or finds no rates in it (e.g. the table is
+      rendered by JavaScript), the page is fetched again with Chrome
+
+    Returns
+    -----------
+    list of dicts of GICs fields
+    """
+    source = source or config("GIC_SOURCE", default="http")
+    if source not in GIC_SOURCES:
+        raise ValueError("source must be one of {}".format(list(GIC_SOURCES)), source)
+
+    print ("Obtaining GIC rates ({})...".format(source))
+    try:
+        values = parse_gics(GIC_SOURCES[source](headless=headless))
+    except (OSError, ValueError) as e:
+        if source != "http":
+            raise
+        print ("{} failed: {}".format(source, e))
+        values = []
+    if not values and source == "http":
+        print ("Falling back to Chrome...")
+        values = parse_gics(chrome_gics_page(headless=headless))
+    print ("Success: {} rates".format(len(values)))
+    return values
 
 def read_page(url):
     ssl._create_default_https_context = ssl._create_unverified_context
@@ -101,46 +189,48 @@ def dico_insured():
 
     return  insureds
 
-@transaction.atomic
 def update_cdic_insured():
     """
     Function for updating CDIC model
     """
     print ("Updating CDIC insured list")
+    added, removed = sync_insureds(CDIC, cdic_insured())
+    print ("Complete! {} added, {} removed".format(len(added), len(removed)))
 
-    insureds = cdic_insured()
-
-    model_insureds = CDIC.objects.all()
-
-    for model_insured in model_insureds:
-        if model_insured.name not in insureds:
-            model_insured.delete()
-
-    model_insureds = insureds_list(CDIC)
-    for insured in insureds:
-        if insured not in model_insureds:
-            CDIC.objects.create(name=insured)
-    print ("Complete!")
-
-@transaction.atomic
 def update_dico_insured():
     """
-    Function for updating CDICInsured model
+    Function for updating DICO model
     """
     print ("Updating DICO insured list")
-    insureds = dico_insured()
+    added, removed = sync_insureds(DICO, dico_insured())
+    print ("Complete! {} added, {} removed".format(len(added), len(removed)))
+
+@transaction.atomic
+def sync_insureds(model, names):
+    """
+    Makes the names of an insured list model (CDIC or DICO) exactly names
+    > additions and removals are found by set difference with the names already saved, then
+      applied with one bulk delete and one bulk_create
+    > whenever it writes (or the list has never been stamped) the list gets a new
+      InsuredVersion, so insured_index() rebuilds; an unchanged list keeps its version and
+      every cached index
 
-    model_insureds = DICO.objects.all()
+    Returns
+    -----------
+    (added, removed):   sets of names added and removed
+    """
+    names = set(names)
+    saved = set(insureds_list(model))
+    added, removed = names - saved, saved - names
 
-    for model_insured in model_insureds:
-        if model_insured.name not in insureds:
-            model_insured.delete()
+    if removed:
+        model.objects.filter(name__in=removed).delete()
+    if added:
+        model.objects.bulk_create(model(name=name) for name in sorted(added))
+    if added or removed or not InsuredVersion.objects.filter(name=model.__name__).exists():
+        model.bump_version()
 
-    model_insureds = insureds_list(DICO)
-    for insured in insureds:
-        if insured not in model_insureds:
-            DICO.objects.create(name=insured)
-    print ("Complete!")
+    return added, removed
 
 def insureds_list(model):
     return [insured["name"] for insured in model.objects.all().values()]
@@ -148,7 +238,95 @@ def insureds_list(model):
 def all_insureds():
     return list(set(insureds_list(CDIC) + insureds_list(DICO)))
 
-def gic_select(invmts, gics, max_cdic=100000, max_dico=250000):
+class InsuredIndex:
+    """
+    CDIC and DICO insured names indexed for matching GIC issuers, as gic_select always has:
+    > an issuer is insured if its name appears within any CDIC or DICO name
+    > its limit is the DICO limit if it is exactly a DICO name, otherwise the CDIC limit
+
+    Names are joined into one text, so the first match of an issuer is a single substring
+    search rather than a test against every name; the result is kept, so every later
+    lookup of the issuer (e.g. in the allocation loop) is a dict lookup.
+    Use insured_index() for the index of the current lists
+    """
+    SEPARATOR = "\n"
+
+    def __init__(self, cdic_names, dico_names, version=None):
+        self.version = version
+        self.names = list(cdic_names) + list(dico_names)
+        self.dico = set(dico_names)
+        self.text = self.SEPARATOR.join(self.names)
+        self.matches = {}
+
+    def insured(self, issuer):
+        """True if issuer appears within any insured name"""
+        try:
+            return self.matches[issuer]
+        except KeyError:
+            match = bool(self.names) and self.SEPARATOR not in issuer and issuer in self.text
+            self.matches[issuer] = match
+            return match
+
+    def limit(self, issuer, max_cdic=100000, max_dico=250000):
+        """Insured limit per institution of issuer, or None if it is not insured"""
+        if not self.insured(issuer):
+            return None
+        return max_dico if issuer in self.dico else max_cdic
+
+# in-process InsuredIndex of the current insured lists, keyed by insured_version()
+INSURED_INDEX = {}
+
+def insured_version():
+    """
+    Version of the CDIC and DICO lists:
+    > the InsuredVersion stamps, replaced whenever sync_insureds or a record's save() or
+      delete() writes a list, so renaming an insured in place also invalidates insured_index()
+    > the row count and highest id of each table, so bulk writes that skip the stamp
+      (loaddata, data fixes) and databases never synced still invalidate it
+    """
+    stamps = tuple(InsuredVersion.objects.order_by("name").values_list("name", "version"))
+    return stamps + tuple(
+        tuple(model.objects.aggregate(count=Count("id"), last=Max("id")).values()) for model in (CDIC, DICO)
+    )
+
+def insured_index():
+    """
+    InsuredIndex of the current CDIC and DICO lists; built once per insured_version()
+    and cached in the process
+    """
+    version = insured_version()
+    index = INSURED_INDEX.get(version)
+    if index is None:
+        index = InsuredIndex(insureds_list(CDIC), insureds_list(DICO), version=version)
+        INSURED_INDEX.clear()
+        INSURED_INDEX[version] = index
+    return index
+
+def term_ladder(keys, terms=None):
+    """
+    TermLadder of Pyondo term keys ("term_1", ... "term_10"), whose number is the 1-based
+    column of the ladder
+    > terms is Pyondo.TERMS of the plan (a number of annual terms or a list of months); by
+      default, annual terms covering every key and at least the 5 GICs terms
+    > raises ValueError for a key that is not a column of the ladder
+    """
+    columns = [term_column(key) for key in keys]
+    ladder = TermLadder.of(terms if terms is not None else max(columns + [4]) + 1)
+    for key, column in zip(keys, columns):
+        if not 0 <= column < ladder.size:
+            raise ValueError("{} is not a term of the ladder {}".format(key, ladder.months.tolist()), key)
+    return ladder
+
+def term_column(key):
+    """0-based ladder column of a Pyondo term key: "term_10" is 9"""
+    return int(key[len("term_"):]) - 1
+
+def gic_years(ladder, column):
+    """GICs.term (years) of a ladder column, or None if its months are not whole years"""
+    months = int(ladder.months[column])
+    return None if months % 12 else months // 12
+
+def gic_select(invmts, gics, max_cdic=100000, max_dico=250000, terms=None):
     """
     Selects potential GIC investments from GIC model
     > Filters most recent date of GIC investments; eliminates any issuers that are not CDIC or DICO insured
@@ -166,6 +344,7 @@ def gic_select(invmts, gics, max_cdic=100000, max_dico=250000):
     gics:       GICs model object; should contain only GICs of the most recent date
     max_cdic:   CDIC-insured limit per institution
     max_dico:   DICO-insured limit per institution
+    terms:      Pyondo.TERMS of the plan, which the invmts keys are columns of; see term_ladder
 
     Returns
     -----------
@@ -181,53 +360,234 @@ def gic_select(invmts, gics, max_cdic=100000, max_dico=250000):
     if len(set(gics.values_list("date"))) > 1:
         raise ValueError("gics object should only contain records from the most recent date")
 
-    cdic_insureds = insureds_list(CDIC)
-    dico_insureds = insureds_list(DICO)
-    insureds = cdic_insureds + dico_insureds
+    ladder = term_ladder(list(invmts), terms)
+    index = insured_index()
+    issuers, array = gic_arrays(gics, index)
+    allocated = allocate(invmts, array, [index.limit(issuer, max_cdic, max_dico) for issuer in issuers], ladder)
+
+    invmts_by_issuer = {issuer: {"term_{}".format(i + 1): 0 for i in range(ladder.size)} for issuer in issuers}
+    for i, term in zip(*np.nonzero(allocated)):
+        invmts_by_issuer[issuers[i]]["term_{}".format(term + 1)] = float(allocated[i, term])
 
-    issuers = set(gics.values_list("issuer"))
-    issuers = [issuer for (issuer, ) in issuers]
+    return invmts_by_issuer
+
+GIC_FIELDS = [("id", int), ("issuer", int), ("term", int), ("rate", float), ("amount", int)]
+
+def gic_arrays(gics, index=None):
+    """
+    Loads GICs in one query as a NumPy structured array of GIC_FIELDS, where issuer is
+    a position in the returned list of issuer names
+    > if an InsuredIndex is given, GICs of issuers that are not insured are left out
+
+    Returns
+    -----------
+    (issuers, array):   sorted list of issuer names, structured array with one record per GIC
+    """
+    rows = list(gics.values_list("id", "issuer", "term", "rate", "amount"))
+    if index is not None:
+        rows = [row for row in rows if index.insured(row[1])]
+
+    array = np.zeros(len(rows), dtype=GIC_FIELDS)
+    if not rows:
+        return [], array
+    ids, names, terms, rates, amounts = zip(*rows)
+    issuers, array["issuer"] = np.unique(names, return_inverse=True)
+    array["id"], array["term"], array["rate"], array["amount"] = ids, terms, rates, amounts
+    return issuers.tolist(), array
+
+def allocate(invmts, array, limits, ladder=None):
+    """
+    The greedy allocation of gic_select on a gic_arrays() array: each term in invmts
+    order is filled from its highest rate GIC down, each issuer taking at most its limit
+    less what it already holds from earlier terms
 
-    insured_issuers = [issuer for issuer in issuers for insured in insureds if issuer in insured]
-    gics = gics.filter(issuer__in=insured_issuers)
+    Within a term an issuer's first (best) GIC is the only one that can take anything,
+    so the fill is a cumulative sum over the term's issuers in rate order.
 
-    invmts_by_issuer = {issuer: {"term_{}".format(i + 1): 0 for i in range(5)} for issuer in insured_issuers}
+    Parameters
+    -----------
+    invmts:     dictionary of terms ("term_1", ...) and amounts to be allocated
+    array:      structured array of GIC_FIELDS
+    limits:     insured limit of each issuer
+    ladder:     TermLadder of the terms; defaults to term_ladder(invmts)
+
+    Returns
+    -----------
+    array of the amount allocated to each [issuer, ladder column]; amounts that no GIC
+    has room for, and terms that are not whole years, are left unallocated
+    """
+    available = np.array(limits, dtype=float)
+    ladder = ladder if ladder is not None else term_ladder(list(invmts))
+    allocated = np.zeros((available.shape[0], ladder.size))
+    # highest rate first; ties in id order so the result does not depend on the query
+    array = array[np.lexsort((array["id"], -array["rate"]))]
 
     for term, amount in invmts.items():
-        gics_term = gics.filter(term=int(term[-1])).order_by("-rate")
-        for gic in gics_term:
-            max = max_dico if gic.issuer in dico_insureds else max_cdic
-            available = max - sum(invmts_by_issuer[gic.issuer].values())
-
-            if amount <= available:
-                invmts_by_issuer[gic.issuer][term] += amount
-                amount = 0
-            else:
-                invmts_by_issuer[gic.issuer][term] += available
-                amount -= available
-            if amount == 0:
-                break
+        column = term_column(term)
+        years = gic_years(ladder, column)
+        if years is None:
+            continue
+        issuers = array["issuer"][array["term"] == years]
+        # first (best rate) GIC of each issuer, in rate order
+        issuers = issuers[np.sort(np.unique(issuers, return_index=True)[1])]
+
+        room = available[issuers]
+        before = np.cumsum(room) - room
+        taken = np.clip(amount - before, 0., room)
+        allocated[issuers, column] += taken
+        available[issuers] -= taken
+
+    return allocated
+
+def issuer_terms(gics, max_cdic=100000, max_dico=250000):
+    """
+    Insured GICs as offered to pyondo.portfolio.PortfolioPyondo
+    > eliminates any issuers that are not CDIC or DICO insured, as gic_select does
+    > keeps the best rate each issuer offers for each term
 
-    return invmts_by_issuer
+    Parameters
+    -----------
+    gics:       GICs model object; should contain only GICs of the most recent date
+    max_cdic:   CDIC-insured limit per institution
+    max_dico:   DICO-insured limit per institution
+
+    Returns
+    -----------
+    list of dicts of issuer, months (term), rate and cap (insured limit per condo)
+    """
+    assert isinstance(gics, QuerySet)
+    assert gics.model is GICs
+
+    if len(set(gics.values_list("date"))) > 1:
+        raise ValueError("gics object should only contain records from the most recent date")
+
+    index = insured_index()
+
+    best = {}
+    for issuer, term, rate in gics.values_list("issuer", "term", "rate"):
+        if index.insured(issuer) and rate > best.get((issuer, term), -1):
+            best[issuer, term] = rate
+
+    return [
+        {
+            "issuer": issuer, "months": 12 * term, "rate": rate,
+            "cap": index.limit(issuer, max_cdic, max_dico)
+        }
+        for (issuer, term), rate in sorted(best.items())
+    ]
+
+def largest_gics(issuers, array):
+    """
+    {(issuer, term): id} of the GIC with the largest amount of each issuer and term, the
+    GIC a selection is recorded against
+    """
+    largest = {}
+    for record in array[np.argsort(array["amount"], kind="stable")]:
+        largest[issuers[record["issuer"]], int(record["term"])] = int(record["id"])
+    return largest
 
 @transaction.atomic
-def save_gic_selections(selected, gics, gic_plan):
+def save_gic_selections(selected, gics, gic_plan, terms=None):
+    """
+    Saves gic_select's allocation as GICSelect records of gic_plan, in one bulk_create
+    > each amount is recorded against the issuer's GIC of that term with the largest
+      amount, as before; terms is Pyondo.TERMS of the plan, as for gic_select
+    > raises ValueError, before anything is saved, for an amount with no such GIC
+    """
     assert isinstance(selected, dict)
     assert isinstance(gics, QuerySet)
     assert gics.model is GICs
 
+    largest = largest_gics(*gic_arrays(gics))
+    ladder = term_ladder(sorted({term for invmts in selected.values() for term in invmts}), terms)
+    selections = []
     for issuer, invmts in selected.items():
         for term, amount in invmts.items():
-            if amount != 0:
-                gic = gics.filter(issuer=issuer, term=int(term[-1])).latest("amount")
-                selected = GICSelect.objects.create(gic_plan=gic_plan, gic=gic, amount=amount)
-
-def select_and_save(values, plan):
+            if amount == 0:
+                continue
+            gic = (issuer, gic_years(ladder, term_column(term)))
+            if gic not in largest:
+                raise ValueError("{} has no GIC of {} for an amount of {}".format(issuer, term, amount), gic)
+            selections.append(GICSelect(gic_plan=gic_plan, gic_id=largest[gic], amount=amount))
+    GICSelect.objects.bulk_create(selections)
+
+def select_and_save(values, plan, terms=None):
     assert isinstance(values, dict)
 
-    invmts = {term: value for term, value in values.items() if term[0:4] == "term"}
+    invmts = {term: value for term, value in values.items() if term[0:5] == "term_"}
     last_date = GICs.objects.latest("date").date
     gics = GICs.objects.filter(date=last_date)
-    selected = gic_select(invmts, gics)
+    selected = gic_select(invmts, gics, terms=terms)
     gic_plan = GICPlan.objects.create(plan=plan, date=last_date)
-    save_gic_selections(selected, gics, gic_plan)
+    save_gic_selections(selected, gics, gic_plan, terms=terms)
+
+def select_and_save_all(plans=None, max_cdic=100000, max_dico=250000, terms=None):
+    """
+    Refreshes the GIC selections of many plans in one pass against the latest GICs, e.g.
+    after update_gics; no plan is re-solved
+    > the latest GICs, the insured index and each plan's first month of investments
+      (the Forecast select_and_save is given by pyondo_task) are each read in one query
+    > each plan is allocated as gic_select would, with its own insured limits
+    > one GICPlan per plan becomes its Current GICPlan, archiving the plan's earlier ones,
+      and every GICSelect is written in a single bulk_create
+
+    Parameters
+    -----------
+    plans:      Plan queryset; defaults to every Current plan
+    max_cdic:   CDIC-insured limit per institution
+    max_dico:   DICO-insured limit per institution
+    terms:      Pyondo.TERMS the plans were solved with; defaults to Pyondo.TERMS
+
+    Returns
+    -----------
+    list of the GICPlans created; plans without a Forecast are skipped
+    """
+    from investmentplan.models import Plan, Forecast
+    from pyondo.pyondo import Pyondo
+
+    if plans is None:
+        plans = Plan.objects.filter(status_bool=True)
+    ladder = TermLadder.of(terms if terms is not None else Pyondo.TERMS)
+    term_fields = ["term_{}".format(column + 1) for column in range(ladder.size)]
+    forecast_fields = {field.name for field in Forecast._meta.get_fields()}
+    missing = [field for field in term_fields if field not in forecast_fields]
+    if missing:
+        raise ValueError("Forecast does not store every term of the ladder {}".format(ladder.months.tolist()), missing)
+
+    last_date = GICs.objects.latest("date").date
+    index = insured_index()
+    issuers, array = gic_arrays(GICs.objects.filter(date=last_date), index)
+    limits = [index.limit(issuer, max_cdic, max_dico) for issuer in issuers]
+    largest = largest_gics(issuers, array)
+
+    first_period = Forecast.objects.filter(plan=OuterRef("plan")).order_by("period").values("period")[:1]
+    first_months = (
+        Forecast.objects.filter(plan__in=plans, period=Subquery(first_period))
+        .order_by("plan_id", "period")
+        .values("plan_id", *term_fields)
+    )
+    allocations = [
+        (first_month["plan_id"], allocate({term: first_month[term] for term in term_fields}, array, limits, ladder))
+        for first_month in first_months
+    ]
+
+    now = timezone.now()
+    with transaction.atomic():
+        plan_ids = [plan_id for plan_id, allocated in allocations]
+        GICPlan.objects.filter(plan_id__in=plan_ids).update(
+            status_bool=False, status=GICPlan.Status.ARCHIVED.value
+        )
+        gic_plans = GICPlan.objects.bulk_create(
+            GICPlan(
+                plan_id=plan_id, date=last_date, status_bool=True, status=GICPlan.Status.CURRENT.value,
+                date_added=now, date_modified=now
+            )
+            for plan_id in plan_ids
+        )
+        GICSelect.objects.bulk_create(
+            GICSelect(gic_plan=gic_plan, gic_id=largest[issuers[i], gic_years(ladder, term)], amount=float(allocated[i, term]))
+            for gic_plan, (plan_id, allocated) in zip(gic_plans, allocations)
+            for i, term in zip(*np.nonzero(allocated))
+        )
+
+    return gic_plans
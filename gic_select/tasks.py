@@ -1,3 +1,5 @@
+import time
+
 from celery import shared_task
 from celery.exceptions import Ignore
 
@@ -6,7 +8,7 @@ from django.db import transaction, IntegrityError
 
 from robocondo.celeryconf import app
 
-from .select import update_gics
+from .select import update_gics, select_and_save_all
 
 @shared_task(bind=True)
 def update_gics_task(self):
@@ -22,3 +24,14 @@ def update_gics_task(self):
             raise Ignore()
         else:
             raise
+
+@shared_task
+def select_all_task():
+    """
+    Refreshes the GIC selections of every Current plan against the latest GICs in one
+    pass (select_and_save_all), without re-running pyondo_task for each condo
+    """
+    start = time.perf_counter()
+    gic_plans = select_and_save_all()
+    print ("GIC selections refreshed for {} plans in {:.2f}s".format(len(gic_plans), time.perf_counter() - start))
+    return len(gic_plans)
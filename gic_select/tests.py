@@ -4,6 +4,7 @@ from datetime import datetime as dt, date
 from bs4 import BeautifulSoup as bs
 
 from django.test import TestCase, tag, LiveServerTestCase
+from django.utils import timezone
 
 from selenium import webdriver
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
@@ -25,8 +26,9 @@ from investmentplan.converter import Converter
 from investmentplan.tests.factories import PlanFactory
 from pyondo.pyondo import Pyondo
 
-from gic_select.models import GICs, GICPlan, GICSelect
-from gic_select.select import select_and_save, gic_select
+from gic_select.models import GICs, GICPlan, GICSelect, CDIC, DICO, InsuredVersion
+from gic_select.select import select_and_save, gic_select, insured_index, InsuredIndex, save_gic_selections, \
+            select_and_save_all, sync_insureds, parse_gics, fetch_gics, fixture_gics_page
 
 # This is to update the GIC data from FinancialPost and it requires Selenium!!
 @tag("selenium")
@@ -176,3 +178,178 @@ class SelectTests(TestCase):
         gic_plan = GICPlan.objects.get(pk=1)
         self.assertFalse(gic_plan.status_bool)
         self.assertEqual(gic_plan.status, "Archived")
+
+class InsuredIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        sync_insureds(CDIC, ["Bank of Montreal", "Home Trust Company", "Tangerine Bank"])
+        sync_insureds(DICO, ["Meridian Credit Union Limited", "Alterna Savings"])
+
+    def test_matches_insured_names(self):
+        index = insured_index()
+        insureds = [name for (name, ) in CDIC.objects.values_list("name")] + \
+            [name for (name, ) in DICO.objects.values_list("name")]
+        for issuer in ["Bank of Montreal", "Home Trust", "Tangerine", "Meridian Credit Union", "Alterna Savings",
+                       "Royal Bank", "Montreal\nHome", ""]:
+            self.assertEqual(index.insured(issuer), any(issuer in insured for insured in insureds))
+
+        self.assertEqual(index.limit("Home Trust"), 100000)
+        self.assertEqual(index.limit("Alterna Savings"), 250000)
+        # only an exact DICO name has the DICO limit, as gic_select has always done
+        self.assertEqual(index.limit("Meridian Credit Union"), 100000)
+        self.assertIsNone(index.limit("Royal Bank"))
+        self.assertFalse(InsuredIndex([], []).insured(""))
+
+    def test_index_is_rebuilt_when_lists_change(self):
+        index = insured_index()
+        self.assertIs(insured_index(), index)
+
+        sync_insureds(CDIC, ["Bank of Montreal", "Home Trust Company", "Tangerine Bank"])
+        self.assertIs(insured_index(), index)
+
+        sync_insureds(CDIC, ["Home Trust Company", "Tangerine Bank", "Royal Bank of Canada"])
+        updated = insured_index()
+        self.assertIsNot(updated, index)
+        self.assertTrue(updated.insured("Royal Bank"))
+        self.assertFalse(updated.insured("Bank of Montreal"))
+
+        # changes made without sync_insureds invalidate the index too
+        DICO.objects.create(name="Parama Credit Union")
+        self.assertTrue(insured_index().insured("Parama"))
+        DICO.objects.filter(name="Parama Credit Union").delete()
+        self.assertFalse(insured_index().insured("Parama"))
+
+        # renaming in place keeps the row count and ids
+        insured = CDIC.objects.get(name="Royal Bank of Canada")
+        insured.name = "RBC Royal Trust"
+        insured.save()
+        self.assertFalse(insured_index().insured("Royal Bank"))
+
+    def test_sync_insureds(self):
+        version = InsuredVersion.objects.get(name="DICO").version
+        added, removed = sync_insureds(DICO, ["Alterna Savings", "Alterna Savings", "Parama Credit Union"])
+        self.assertEqual((added, removed), ({"Parama Credit Union"}, {"Meridian Credit Union Limited"}))
+        self.assertEqual(sorted(DICO.objects.values_list("name", flat=True)), ["Alterna Savings", "Parama Credit Union"])
+        self.assertNotEqual(InsuredVersion.objects.get(name="DICO").version, version)
+
+        version = InsuredVersion.objects.get(name="DICO").version
+        self.assertEqual(sync_insureds(DICO, ["Parama Credit Union", "Alterna Savings"]), (set(), set()))
+        self.assertEqual(InsuredVersion.objects.get(name="DICO").version, version)
+
+class GICAllocationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        sync_insureds(CDIC, ["Home Trust Company", "Tangerine Bank"])
+        sync_insureds(DICO, ["Alterna Savings"])
+        day = date(2018, 6, 1)
+        for issuer, rates in [
+            ("Home Trust", [0.021, 0.026, 0.028, 0.030, 0.032]),
+            ("Tangerine", [0.022, 0.025, 0.027, 0.029, 0.031]),
+            ("Alterna Savings", [0.020, 0.024, 0.029, 0.031, 0.033]),
+            ("Uninsured Bank", [0.040, 0.040, 0.040, 0.040, 0.040]),
+        ]:
+            for term, rate in enumerate(rates, 1):
+                GICs.objects.create(date=day, issuer=issuer, amount=5000, term=term, rate=rate)
+                GICs.objects.create(date=day, issuer=issuer, amount=100000, term=term, rate=rate - 0.001)
+        cls.gics = GICs.objects.filter(date=day)
+        cls.invmts = {"term_5": 300000.0, "term_1": 120000.0, "term_3": 0.0}
+
+    def test_allocation(self):
+        insured_index()
+        with self.assertNumQueries(5):
+            selected = gic_select(self.invmts, self.gics)
+
+        self.assertEqual(set(selected), {"Home Trust", "Tangerine", "Alterna Savings"})
+        self.assertEqual(selected["Alterna Savings"], {"term_1": 0, "term_2": 0, "term_3": 0, "term_4": 0, "term_5": 250000})
+        self.assertEqual(selected["Home Trust"], {"term_1": 20000, "term_2": 0, "term_3": 0, "term_4": 0, "term_5": 50000})
+        self.assertEqual(selected["Tangerine"], {"term_1": 100000, "term_2": 0, "term_3": 0, "term_4": 0, "term_5": 0})
+
+    def test_allocation_on_term_ladder(self):
+        terms = [6, 12, 24, 36, 48, 60, 72, 84, 96, 120]
+        invmts = {"term_1": 40000.0, "term_2": 120000.0, "term_10": 50000.0}
+        selected = gic_select(invmts, self.gics, terms=terms)
+
+        self.assertEqual(set(selected["Tangerine"]), {"term_{}".format(term) for term in range(1, 11)})
+        # term_2 is the 12 month column; no GIC is offered for 6 months or 10 years
+        self.assertEqual(selected["Tangerine"]["term_2"], 100000)
+        self.assertEqual(selected["Home Trust"]["term_2"], 20000)
+        self.assertEqual(sum(amounts["term_1"] + amounts["term_10"] for amounts in selected.values()), 0)
+
+        with self.assertRaises(ValueError):
+            gic_select({"term_11": 1000.0}, self.gics, terms=terms)
+
+    def test_save_gic_selections_in_bulk(self):
+        plan = PlanFactory()
+        gic_plan = GICPlan.objects.create(plan=plan, date=date(2018, 6, 1))
+        selected = gic_select(self.invmts, self.gics)
+        save_gic_selections(selected, self.gics, gic_plan)
+
+        self.assertEqual(GICSelect.objects.filter(gic_plan=gic_plan).count(), 4)
+        for record in GICSelect.objects.filter(gic_plan=gic_plan):
+            self.assertEqual(record.gic.amount, 100000)
+            self.assertEqual(selected[record.gic.issuer]["term_{}".format(record.gic.term)], record.amount)
+
+    def test_save_gic_selections_without_matching_gic(self):
+        gic_plan = GICPlan.objects.create(plan=PlanFactory(), date=date(2018, 6, 1))
+        for selected, terms in [
+            ({"Tangerine": {"term_1": 1000.0}}, [6, 12]),
+            ({"Uninsured Bank": {"term_1": 0.0}, "Unknown Bank": {"term_1": 1000.0}}, None),
+        ]:
+            with self.assertRaises(ValueError):
+                save_gic_selections(selected, self.gics, gic_plan, terms=terms)
+        self.assertFalse(GICSelect.objects.filter(gic_plan=gic_plan).exists())
+
+    def test_select_and_save_all(self):
+        plan = PlanFactory()
+        fields = ["opening_balance", "contributions", "expenditures", "interest", "closing_balance",
+                  "bank_balance", "current_investments", "maturities", "total_investments"]
+        for period, invmts in [(2, {"term_2": 50000.0}), (1, self.invmts)]:
+            Forecast.objects.create(
+                plan=plan, period=period, month=timezone.now(), **dict({field: 0. for field in fields},
+                **{"term_{}".format(term): invmts.get("term_{}".format(term), 0.) for term in range(1, 6)})
+            )
+        old_plan = GICPlan.objects.create(plan=plan, date=date(2018, 5, 1))
+
+        gic_plans = select_and_save_all()
+        self.assertEqual([gic_plan.plan_id for gic_plan in gic_plans], [plan.id])
+
+        old_plan.refresh_from_db()
+        self.assertEqual(old_plan.status, "Archived")
+        self.assertEqual(GICPlan.objects.get(plan=plan, status_bool=True), gic_plans[0])
+
+        selected = gic_select(self.invmts, self.gics)
+        records = GICSelect.objects.filter(gic_plan=gic_plans[0])
+        self.assertEqual(records.count(), 4)
+        for record in records:
+            self.assertEqual(selected[record.gic.issuer]["term_{}".format(record.gic.term)], record.amount)
+
+        # Forecast stores five terms
+        with self.assertRaises(ValueError):
+            select_and_save_all(terms=7)
+
+class GICIngesterTests(TestCase):
+    """Reads the saved copy of the Financial Post page, so these run offline"""
+
+    def test_parse_gics(self):
+        values = parse_gics(fixture_gics_page(), year=2019)
+        self.assertEqual(len(values), 14)
+        self.assertEqual(values[0], {
+            "issuer": "Home Trust", "date": dt(2019, 2, 14), "amount": 5000, "term": 1, "rate": 0.0235
+        })
+        # "n/a" rates are left out and the table ends at the Redeemable GICs heading
+        self.assertEqual([value["term"] for value in values if value["issuer"] == "Alterna Savings"], [1, 2, 4, 5])
+        self.assertEqual({value["amount"] for value in values if value["issuer"] == "Alterna Savings"}, {100000})
+        self.assertNotIn("Royal Bank", {value["issuer"] for value in values})
+        # rows whose amount is not a number are left out
+        self.assertNotIn("Effort Trust", {value["issuer"] for value in values})
+
+    def test_update_gics_from_fixture(self):
+        values = update_gics(source="fixture")
+        self.assertEqual(GICs.objects.count(), len(values))
+        self.assertEqual(GICs.objects.get(issuer="Tangerine", term=5).rate, 0.0265)
+
+    def test_unknown_source_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            fetch_gics(source="telnet")
@@ -0,0 +1,19 @@
+# Generated by Django 2.1.3 on 2026-10-18 12:00
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investmentplan', '0015_plan_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plan',
+            name='stages',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict, verbose_name='Pipeline Stage Timings'),
+        ),
+    ]
@@ -5,6 +5,7 @@ from django.db.models import Manager, Model, BooleanField, CharField, DateField,
                             FloatField, IntegerField, PositiveSmallIntegerField, ForeignKey, \
                             OneToOneField, CASCADE, PROTECT
 from django.db import transaction
+from django.contrib.postgres.fields import JSONField
 from django.utils import timezone
 
 from .helpers import find_date
@@ -19,6 +20,7 @@ class Plan(Model):
     when it was added, and whether it is the Current or Archived Plan
     There is only ONE record designated Current and all other records are designated ARCHIVED
     by modifying the .save() method
+    stages holds the robocondo.instrumentation.StageTimer record of the run that created the plan
     """
 
     objects = RoCoManager()
@@ -31,6 +33,7 @@ class Plan(Model):
     status_bool = BooleanField("Current/Default Boolean", default=False)
     status = CharField("Current/Archived", choices=Status.choices(), max_length=9)
     time = FloatField("Time to Complete", default=0)
+    stages = JSONField("Pipeline Stage Timings", default=dict, blank=True)
     date_added = DateTimeField("Date and Time Added", editable=False)
     date_modified = DateTimeField("Date and Time Modified")
 
@@ -99,6 +102,25 @@ class ForecastManager(Manager):
                     """
             )
 
+    def bulk_create_array(self, array, plan, dates, batch_size=None):
+        """
+        bulk_create from a Pyondo.values_array(): each record becomes a Forecast with
+        plan set and month taken from dates, skipping the values() list of dicts
+        """
+        if len(array) != len(dates):
+            raise ValueError(
+                    """
+                    The length of the dates array does not match the number of periods
+                    in Pyondo model output
+                    """
+            )
+        names = array.dtype.names
+        objs = (
+            self.model(plan=plan, month=month, **dict(zip(names, row)))
+            for row, month in zip(array.tolist(), dates)
+        )
+        return super().bulk_create(objs, batch_size=batch_size)
+
 class Forecast(Model):
     objects = ForecastManager()
 
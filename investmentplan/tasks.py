@@ -2,6 +2,7 @@ import time
 from decimal import Decimal
 
 from celery import shared_task
+from decouple import config
 
 from django.db import transaction
 from django.core.exceptions import ObjectDoesNotExist
@@ -12,6 +13,9 @@ from robocondo.celeryconf import app
 def pyondo_task(self, condo_id, study_id):
 
     from pyondo.pyondo import Pyondo
+    from pyondo.rolling import RollingPyondo
+    from pyondo.cache import SolutionCache
+    from robocondo.instrumentation import StageTimer
     from condo.models import BankAccounts, AccountBalance, Investments
     from reservefundstudy.models import Study, Contributions, Expenditures
     from investmentplan.models import Plan, Forecast
@@ -19,25 +23,51 @@ def pyondo_task(self, condo_id, study_id):
     from pyyc.models import BOCGICForecast
     import gic_select
 
+    started = time.perf_counter()
     self.update_state(
         state="PROGRESS",
     )
+    timer = StageTimer(task_id=self.request.id)
 
-    converter = Converter(condo_id=condo_id, study_id=study_id)
-    kwargs = converter.make_kwargs()
-    invmt_plan = Pyondo(**kwargs)
-    model = invmt_plan.pyondo()
-    values = invmt_plan.values()
+    with timer.stage("converter"):
+        converter = Converter(condo_id=condo_id, study_id=study_id)
+    with timer.stage("make_kwargs"):
+        kwargs = converter.make_kwargs()
+    timer.count("periods", kwargs["periods"])
 
-    study = Study.objects.get(pk=study_id)
+    # studies longer than PYONDO_ROLLING_PERIODS months are solved in windows to stay
+    # inside the time limit; 0 (the default) always solves the whole horizon at once
+    rolling_periods = config("PYONDO_ROLLING_PERIODS", default=0, cast=int)
+    if rolling_periods and kwargs["periods"] > rolling_periods:
+        invmt_plan = RollingPyondo(**kwargs)
+    else:
+        invmt_plan = Pyondo(**kwargs)
+    # the solver gets whatever is left of PYONDO_TIME_BUDGET seconds from the start of the
+    # task, which must leave time under time_limit to save the plan; if it runs out, the best
+    # feasible plan found so far (or a greedy ladder) is saved and flagged in stages
+    budget = config("PYONDO_TIME_BUDGET", default=10., cast=float)
+    with timer.stage("pyondo"):
+        solved = SolutionCache().solve(invmt_plan, time_limit=budget - (time.perf_counter() - started))
+    values = solved["values"]
+    timer.count("status", solved["status"])
+    timer.count("cached", solved["cached"])
+    timer.count("solver_time", solved["time"])
+    for stage, seconds in getattr(invmt_plan, "timings", {}).items():
+        timer.record("pyondo.{}".format(stage), seconds)
+
+    with timer.stage("study"):
+        study = Study.objects.get(pk=study_id)
 
     with transaction.atomic():
-        plan = Plan.objects.create(study=study, time=invmt_plan.result_time())
-        forecast = Forecast.objects.bulk_create(
-            objs=(Forecast(**vals) for vals in values),
-            plan=plan,
-            dates=converter.dates
-        )
-        gic_select.select.select_and_save(values[0], plan)
+        with timer.stage("bulk_create"):
+            plan = Plan.objects.create(study=study, time=solved["time"])
+            forecast = Forecast.objects.bulk_create_array(
+                solved["array"],
+                plan=plan,
+                dates=converter.dates
+            )
+        with timer.stage("select_and_save"):
+            gic_select.select.select_and_save(values[0], plan, terms=invmt_plan.TERMS)
+        Plan.objects.filter(pk=plan.pk).update(stages=timer.as_dict())
 
     return values
@@ -1,3 +1,4 @@
 from .viewtests import *
 from .modeltests import *
 from .convertertests import *
+from .instrumentationtests import *
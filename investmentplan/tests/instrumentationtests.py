@@ -0,0 +1,45 @@
+import time
+import uuid
+
+import fakeredis
+
+from django.test import TestCase
+
+from investmentplan.models import Plan
+from robocondo.instrumentation import StageTimer
+
+class StageTimerTests(TestCase):
+
+    def setUp(self):
+        self.task_id = "test-{}".format(uuid.uuid4())
+        self.client = fakeredis.FakeRedis()
+
+    def test_stage_records_time_and_queries(self):
+        timer = StageTimer()
+        with timer.stage("query"):
+            Plan.objects.count()
+            Plan.objects.count()
+        with timer.stage("sleep"):
+            time.sleep(0.01)
+        timer.record("sleep.part", 0.005)
+        timer.count("periods", 344)
+
+        record = timer.as_dict()
+        self.assertEqual([stage["name"] for stage in record["stages"]], ["query", "sleep", "sleep.part"])
+        self.assertEqual(record["stages"][0]["queries"], 2)
+        self.assertTrue(record["stages"][1]["time"] >= 0.01)
+        self.assertEqual(record["queries"], 2)
+        self.assertAlmostEqual(record["total"], record["stages"][0]["time"] + record["stages"][1]["time"])
+        self.assertEqual(record["counters"], {"periods": 344})
+
+    def test_record_is_saved_per_stage(self):
+        timer = StageTimer(task_id=self.task_id, client=self.client)
+        with timer.stage("converter"):
+            pass
+        with self.assertRaises(ValueError):
+            with timer.stage("pyondo"):
+                raise ValueError
+
+        record = StageTimer.load(self.task_id, client=self.client)
+        self.assertEqual([stage["name"] for stage in record["stages"]], ["converter", "pyondo"])
+        self.assertIsNone(StageTimer.load("test-missing", client=self.client))
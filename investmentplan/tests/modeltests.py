@@ -48,7 +48,7 @@ def plan_maker(study=None, invmts=False, spread=None, naive_rates=True):
     model = invmt_plan.pyondo()
     values = invmt_plan.values()
     return {
-            "values":values, "plan": plan,
+            "values":values, "array": invmt_plan.values_array(), "plan": plan,
             "converter": converter, "bal": bal,
             "kwargs": kwargs
     }
@@ -152,6 +152,35 @@ class CreateNewForecastBankAccountAndInvestmentsTests(TestCase):
         for row in forecast:
             self.assertEqual(round(row.total_investments, 2), round((row.term_1 + row.term_2 + row.term_3 + row.term_4 + row.term_5), 2))
 
+class CreateForecastFromArrayTests(TestCase):
+    fixtures = ["users.json", "pyyc.json"]
+
+    @classmethod
+    def setUpTestData(self):
+        self.plan_objs = plan_maker(invmts=True)
+
+    def test_bulk_create_array_matches_bulk_create(self):
+        Forecast.objects.bulk_create_array(
+            self.plan_objs["array"],
+            plan=self.plan_objs["plan"],
+            dates=self.plan_objs["converter"].dates
+        )
+        forecast = Forecast.objects.filter(plan=self.plan_objs["plan"]).order_by("period")
+
+        self.assertEqual(forecast.count(), self.plan_objs["kwargs"]["periods"])
+        for row, vals in zip(forecast, self.plan_objs["values"]):
+            self.assertEqual(row.month, self.plan_objs["converter"].dates[vals["period"] - 1])
+            for field, value in vals.items():
+                self.assertAlmostEqual(getattr(row, field), value, places=4)
+
+    def test_bulk_create_array_checks_dates(self):
+        with self.assertRaises(ValueError):
+            Forecast.objects.bulk_create_array(
+                self.plan_objs["array"],
+                plan=self.plan_objs["plan"],
+                dates=self.plan_objs["converter"].dates[:-1]
+            )
+
 
 class AddMultipleInvestmentPlansTests(TestCase):
     """
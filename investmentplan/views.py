@@ -50,6 +50,8 @@ from reservefundstudy.models import Study
 
 from gic_select.models import GICPlan, GICSelect
 
+from robocondo.instrumentation import StageTimer
+
 class PlanView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
     """
     Main landing page for each Plan
@@ -74,7 +76,7 @@ class PlanView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
         context["plan"] = Plan.objects.get(status_bool=True, study=context["study"])
         forecast = Forecast.objects.filter(plan=context["plan"]).order_by("period")
         context["forecast"] = list(forecast.values())
-        context["gic_plan"] = GICPlan.objects.get(status_bool=True)
+        context["gic_plan"] = GICPlan.objects.get(status_bool=True, plan=context["plan"])
         recommends = GICSelect.objects.filter(gic_plan=context["gic_plan"])
         context["gic_recommends"] = list(recommends.values(
                                         "gic__issuer",
@@ -167,6 +169,7 @@ def get_progress(request, **kwargs):
     
     response_data = {
         "state": result.state,
-        "details": str(result.info) if insufficient or time_limit_exceeded else result.info
+        "details": str(result.info) if insufficient or time_limit_exceeded else result.info,
+        "stages": StageTimer.load(kwargs["task_id"]),
     }
     return JsonResponse(response_data)
@@ -0,0 +1,91 @@
+import os
+import time
+import multiprocessing
+
+# per-process state set by _initialize(); a worker keeps its model class, the shared
+# inputs and, for a ParametricPyondo, the instance it re-solves from one scenario to the next
+_worker = {}
+
+def _initialize(cls, base, options):
+    _worker.clear()
+    _worker.update(cls=cls, base=base, options=options, plan=None)
+
+def _solve(scenario):
+    """
+    Solves one scenario in the current process and returns its result dict
+    (see solve_many)
+    """
+    from .parametric import ParametricPyondo
+
+    cls, options = _worker["cls"], _worker["options"]
+    kwargs = dict(_worker["base"], **scenario)
+    start = time.perf_counter()
+
+    plan = _worker["plan"]
+    if plan is not None and set(plan.inputs()) == set(kwargs) and plan.periods == kwargs["periods"]:
+        plan.update(**kwargs)
+    else:
+        plan = cls(**kwargs)
+    if issubclass(cls, ParametricPyondo):
+        _worker["plan"] = plan
+
+    plan.pyondo(**options)
+    try:
+        array = plan.values_array()
+        status = "ok"
+    except TypeError:
+        array = None
+        status = "insufficient"
+
+    return {
+        "status": status,
+        "solve_status": getattr(plan, "status", "optimal"),
+        "array": array,
+        "values": plan.records(array) if array is not None else None,
+        "time": plan.result_time(),
+        "elapsed": time.perf_counter() - start,
+        "pid": os.getpid(),
+    }
+
+def solve_many(cls, scenarios, workers=None, base=None, **options):
+    """
+    Solves a batch of Pyondo scenarios across a local process pool
+
+    PARAMETERS:
+    > cls: Pyondo or a subclass; a ParametricPyondo is created once per worker process and
+    each further scenario in that process is a warm-started update()
+    > scenarios: list of Pyondo kwargs; each is merged over base
+    > workers: number of processes; defaults to the number of CPUs. With 1 worker the
+    scenarios are solved one after another in this process. A daemonic process (e.g. a
+    Celery prefork child) cannot start a multiprocessing pool, so it uses billiard's, as
+    Celery does
+    > base: kwargs shared by every scenario (e.g. Converter.make_kwargs()); sent to each
+    worker once rather than with every scenario
+    > options: passed to cls.pyondo()
+
+    RETURNS:
+    > list of dicts in scenario order with keys status ("ok" or "insufficient" if values()
+    would raise for lack of funds), solve_status (the plan's status, e.g. "optimal" or
+    "time_limit"), array (values_array() or None), values (values() or
+    None), time (solver time), elapsed (wall-clock seconds for the scenario) and pid
+    """
+    base = base or {}
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(scenarios))
+    if workers <= 1:
+        _initialize(cls, base, options)
+        try:
+            return [_solve(scenario) for scenario in scenarios]
+        finally:
+            _worker.clear()
+
+    if multiprocessing.current_process().daemon:
+        from billiard import Pool
+    else:
+        Pool = multiprocessing.Pool
+    pool = Pool(processes=workers, initializer=_initialize, initargs=(cls, base, options))
+    try:
+        return pool.map(_solve, scenarios, chunksize=1)
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,185 @@
+"""
+Pyondo benchmark harness over synthetic studies
+
+python -m pyondo.benchmarks --years 1 10 30 40 --terms 3 5 10 --output bench.jsonl
+python -m pyondo.benchmarks --baseline bench.jsonl --tolerance 1.5
+
+Each case (years, terms, existing investments, variant) runs in a fresh process and
+writes one JSON line with its build time, solve time, peak RSS and objective. With
+--baseline, cases more than --tolerance times slower than the baseline, or with a
+different objective, are reported and the command exits with status 1.
+"""
+import sys
+import json
+import time
+import argparse
+import resource
+import multiprocessing
+from collections import OrderedDict
+
+import numpy as np
+
+from .pyondo import Pyondo
+from .matrix import MatrixBuilder
+from .solvers import BACKENDS
+from .synthetic import synthetic_study
+
+# Pyondo.pyondo() options for each benchmarked build / solver combination
+VARIANTS = OrderedDict([
+    ("expression-glpk", {"build": "expression", "solver": "glpk"}),
+    ("matrix-glpk", {"build": "matrix", "solver": "glpk"}),
+    ("matrix-highs", {"build": "matrix", "solver": "highs"}),
+    ("compact-highs", {"build": "matrix", "solver": "highs", "formulation": "compact"}),
+])
+YEARS = [1, 5, 10, 20, 30, 40]
+TERMS = [3, 5, 10]
+
+def time_build(build, repeat=3, **kwargs):
+    """
+    Returns the best wall-clock time (seconds) over repeat runs to build, but not solve,
+    the Pyondo program for kwargs with the given build mode
+    """
+    best = None
+    for i in range(repeat):
+        invmt_plan = Pyondo(**kwargs)
+        start = time.perf_counter()
+        if build == "matrix":
+            MatrixBuilder(invmt_plan).build().kernel_model()
+        else:
+            invmt_plan.build_model()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def compare_builds(repeat=3, **kwargs):
+    """
+    Build-time comparison of the "expression" and "matrix" Pyondo build modes
+
+    Parameters
+    ----------
+    repeat: number of builds per mode; the best time is kept
+    kwargs: Pyondo inputs, e.g. Converter(...).make_kwargs()
+
+    Returns
+    ----------
+    dict of build times in seconds per mode and the expression / matrix speedup
+    """
+    times = {build: time_build(build, repeat=repeat, **kwargs) for build in Pyondo.BUILDS}
+    times["speedup"] = times["expression"] / times["matrix"]
+    return times
+
+def cases(years=YEARS, terms=TERMS, existing=(False, True), variants=VARIANTS, seed=0):
+    """All combinations of the benchmark dimensions, as dicts accepted by run_case()"""
+    return [
+        OrderedDict([("years", y), ("terms", t), ("existing", e), ("variant", v), ("seed", seed)])
+        for y in years for t in terms for e in existing for v in variants
+    ]
+
+def run_case(case):
+    """
+    Builds and solves one synthetic study and returns case with its measurements:
+    > build_time / solve_time: seconds from Pyondo.timings
+    > peak_rss_mb: peak resident memory of the process running the case
+    > objective: total interest, or None if the plan could not be funded
+    """
+    record = OrderedDict(case)
+    options = VARIANTS[case["variant"]]
+    if not BACKENDS[options["solver"]].available():
+        record["status"] = "unavailable"
+        return record
+
+    invmt_plan = Pyondo(**synthetic_study(case["years"], case["terms"], case["existing"], case["seed"]))
+    invmt_plan.TERMS = case["terms"]
+    invmt_plan.pyondo(**options)
+    try:
+        objective = float(invmt_plan.values_array()["interest"].sum())
+        status = "ok"
+    except TypeError:
+        objective = None
+        status = "infeasible"
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    record["periods"] = invmt_plan.periods
+    record["build_time"] = invmt_plan.timings["build"]
+    record["solve_time"] = invmt_plan.timings["solve"]
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    record["peak_rss_mb"] = peak / (1024 ** 2 if sys.platform == "darwin" else 1024)
+    record["objective"] = objective
+    record["status"] = status
+    return record
+
+def run_benchmarks(case_list, isolate=True):
+    """
+    Yields run_case() records in order. With isolate=True every case runs in a fresh
+    process, so peak_rss_mb is not inflated by earlier, larger cases
+    """
+    if not isolate:
+        for case in case_list:
+            yield run_case(case)
+        return
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=1, maxtasksperchild=1) as pool:
+        for record in pool.imap(run_case, case_list):
+            yield record
+
+def regressions(records, baseline, tolerance=1.5, rel_tol=1e-6):
+    """
+    Compares benchmark records to baseline records of the same case and returns a
+    message for each case whose build + solve time grew more than tolerance times or
+    whose objective changed by more than rel_tol
+    """
+    def key(record):
+        return (record["years"], record["terms"], record["existing"], record["variant"], record["seed"])
+
+    def elapsed(record):
+        return record["build_time"] + record["solve_time"]
+
+    previous = {key(record): record for record in baseline if record.get("status") == "ok"}
+    messages = []
+    for record in records:
+        old = previous.get(key(record))
+        if old is None or record.get("status") != "ok":
+            continue
+        if elapsed(record) > tolerance * elapsed(old):
+            messages.append("{}: {:.3f}s vs {:.3f}s baseline".format(key(record), elapsed(record), elapsed(old)))
+        if abs(record["objective"] - old["objective"]) > rel_tol * max(abs(old["objective"]), 1.):
+            messages.append("{}: objective {} vs {} baseline".format(key(record), record["objective"], old["objective"]))
+    return messages
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Pyondo builds and solvers on synthetic studies")
+    parser.add_argument("--years", type=int, nargs="+", default=YEARS)
+    parser.add_argument("--terms", type=int, nargs="+", default=TERMS)
+    parser.add_argument("--existing", choices=["with", "without", "both"], default="both")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON lines file; defaults to stdout")
+    parser.add_argument("--baseline", help="JSON lines file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--no-isolate", action="store_true", help="run every case in this process")
+    args = parser.parse_args(argv)
+
+    existing = {"with": (True, ), "without": (False, ), "both": (False, True)}[args.existing]
+    case_list = cases(args.years, args.terms, existing, args.variants, args.seed)
+    output = open(args.output, "w") if args.output else sys.stdout
+    records = []
+    try:
+        for record in run_benchmarks(case_list, isolate=not args.no_isolate):
+            records.append(record)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = [json.loads(line) for line in f if line.strip()]
+        messages = regressions(records, baseline, tolerance=args.tolerance)
+        for message in messages:
+            sys.stderr.write("REGRESSION {}\n".format(message))
+        return 1 if messages else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
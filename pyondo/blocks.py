@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+from .matrix import MatrixBuilder
+from .solvers import SolverResult, get_backend
+
+class BlockPyondo:
+    """
+    Base for linear programs made of several Pyondo programs (self.plans), one
+    MatrixBuilder block each, plus rows and columns of their own that link the blocks.
+
+    > subclasses set self.plans and implement build(formulation), which calls
+      build_blocks() and stack() and returns the combined LinearProgram
+    > pyondo() builds, solves and loads each block's share of the solution back into
+      its plan, so plans[i].values() / values_array() work as after Pyondo.pyondo()
+    """
+
+    def build_blocks(self, formulation="compact"):
+        """
+        Builds every plan's program; sets self.lps and self.offsets (first column of each
+        block, then the first column after the blocks) and returns the MatrixBuilders
+        """
+        builders = [MatrixBuilder(plan, formulation=formulation) for plan in self.plans]
+        self.lps = [builder.build() for builder in builders]
+        self.offsets = np.concatenate([[0], np.cumsum([lp.size for lp in self.lps])]).astype(int)
+        return builders
+
+    def stack(self, size, eq_rows=(), ub_rows=()):
+        """
+        The blocks' rows, block diagonal and widened to size columns, followed by the
+        linking rows; returns A_eq, b_eq, A_ub, b_ub
+
+        PARAMETERS:
+        > size: total number of columns
+        > eq_rows, ub_rows: (sparse matrix of size columns, right-hand side) pairs
+        """
+        eq_rows, ub_rows = list(eq_rows), list(ub_rows)
+        A_eq = sparse.vstack(
+            [_pad(sparse.block_diag([lp.A_eq for lp in self.lps]), size)] + [rows for rows, rhs in eq_rows],
+            format="csr"
+        )
+        b_eq = np.concatenate([lp.b_eq for lp in self.lps] + [rhs for rows, rhs in eq_rows])
+        A_ub = sparse.vstack(
+            [_pad(sparse.block_diag([lp.A_ub for lp in self.lps]), size)] + [rows for rows, rhs in ub_rows],
+            format="csr"
+        )
+        b_ub = np.concatenate([lp.b_ub for lp in self.lps] + [rhs for rows, rhs in ub_rows])
+        return A_eq, b_eq, A_ub, b_ub
+
+    def pyondo(self, solver="highs", formulation="compact", time_limit=None):
+        """
+        Builds and solves the combined program, then loads each block's share of the
+        solution into its plan (plans[i].solution, .values())
+
+        PARAMETERS:
+        > solver: name of a backend in pyondo.solvers.BACKENDS
+        > formulation: "compact" (default) or "full", as for Pyondo.pyondo()
+        > time_limit: solver time limit in seconds; if reached, every plan is left unsolved
+
+        RETURNS:
+        > the combined LinearProgram
+        """
+        self.timings = OrderedDict()
+        start = time.perf_counter()
+        lp = self.build(formulation=formulation)
+        self.timings["build"] = time.perf_counter() - start
+        self.results = get_backend(solver).solve(lp, time_limit=time_limit)
+        self.timings["solve"] = time.perf_counter() - start - self.timings["build"]
+
+        self.x = np.asarray(self.results.x, dtype=float)
+        if not self.results.solved:
+            self.x = np.full(lp.size, np.nan)
+        eq_start = ub_start = 0
+        for i, (plan, plan_lp) in enumerate(zip(self.plans, self.lps)):
+            duals = None
+            if self.results.duals is not None and self.results.solved:
+                eq_end, ub_end = eq_start + plan_lp.A_eq.shape[0], ub_start + plan_lp.A_ub.shape[0]
+                duals = (self.results.duals[0][eq_start:eq_end], self.results.duals[1][ub_start:ub_end])
+            eq_start += plan_lp.A_eq.shape[0]
+            ub_start += plan_lp.A_ub.shape[0]
+
+            plan_x = self.x[self.offsets[i]:self.offsets[i + 1]]
+            plan.lp = plan_lp
+            plan.formulation = formulation
+            plan.grid = None
+            plan.results = SolverResult(
+                x=plan_x, status=self.results.status, time=self.results.time,
+                message=type(self).__name__, duals=duals
+            )
+            plan.solution = plan_lp.unpack(plan_x)
+            plan.status = "optimal" if self.results.solved else "infeasible"
+            plan.timings = self.timings
+            plan.model = plan_lp
+        self.timings["load"] = time.perf_counter() - start - self.timings["build"] - self.timings["solve"]
+
+        return lp
+
+    def objective(self):
+        """Total interest over every plan"""
+        return float(sum(plan.solution["TotalInterest"].sum() for plan in self.plans))
+
+def _pad(matrix, size):
+    """Widens a sparse matrix with empty columns up to size"""
+    return sparse.hstack([matrix, sparse.csr_matrix((matrix.shape[0], size - matrix.shape[1]))], format="csr")
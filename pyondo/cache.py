@@ -0,0 +1,180 @@
+import json
+import time
+import zlib
+import hashlib
+
+import redis
+import numpy as np
+from decouple import config
+
+class SolutionCache:
+    """
+    Content-addressed cache of solved Pyondo plans, stored in Redis (REDIS_URL).
+
+    > entries are keyed by a hash of every Pyondo input that affects the solution,
+      so the same condo, study and rate forecast is only solved once
+    > the PYONDO_CACHE_SIZE most recently used entries are kept; older ones are evicted
+    > a Redis outage only disables the cache: get() misses and set() does nothing
+
+    cached = SolutionCache().solve(invmt_plan)
+    cached["array"]     # invmt_plan.values_array()
+    cached["values"]    # invmt_plan.values()
+    cached["time"]      # invmt_plan.result_time() of the original solve
+    """
+    PREFIX = "pyondo:solution:"
+    INDEX = "pyondo:solutions"
+    # bump to invalidate every cached solution when the model changes
+    VERSION = 2
+
+    def __init__(self, client=None, max_entries=None):
+        self._client = client
+        self.max_entries = max_entries or config("PYONDO_CACHE_SIZE", default=200, cast=int)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(config("REDIS_URL"))
+        return self._client
+
+    @classmethod
+    def key(cls, invmt_plan, **options):
+        """
+        Stable hash of a Pyondo instance's inputs, MINIMUM_BANK_BALANCE, TERMS, its class
+        and any options passed to its pyondo() method
+        """
+        def array(value):
+            return np.asarray(value, dtype=float).tolist()
+
+        def payments(value):
+            return sorted((int(period), float(amount)) for period, amount in (value or {}).items())
+
+        content = {
+            "version": cls.VERSION,
+            "model": type(invmt_plan).__name__,
+            "options": sorted((key, repr(value)) for key, value in options.items()),
+            "periods": invmt_plan.periods,
+            "contributions": array(invmt_plan.contributions),
+            "expenditures": array(invmt_plan.expenditures),
+            "opening_balance": float(invmt_plan.opening_balance),
+            "opening_reserve": float(invmt_plan.opening_reserve),
+            "rates": array(invmt_plan.rates),
+            "bank_rates": array(invmt_plan.bank_rates),
+            "existing_interest": payments(invmt_plan.existing_interest),
+            "existing_maturities": payments(invmt_plan.existing_maturities),
+            "minimum_bank_balance": float(invmt_plan.MINIMUM_BANK_BALANCE),
+            "terms": invmt_plan.TERMS,
+        }
+        digest = hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+        return cls.PREFIX + digest
+
+    def get(self, key):
+        """Returns the cached {"array", "time"} for key, or None"""
+        try:
+            data = self.client.get(key)
+            if data is None:
+                return None
+            self.client.zadd(self.INDEX, {key: time.time()})
+        except redis.RedisError:
+            return None
+        cached = json.loads(zlib.decompress(data).decode())
+        columns = cached["columns"]
+        array = np.zeros(
+            len(columns["period"]),
+            dtype=[(name, int if name == "period" else float) for name in cached["fields"]]
+        )
+        for name in cached["fields"]:
+            array[name] = columns[name]
+        return {"array": array, "time": cached["time"]}
+
+    def set(self, key, array, solve_time):
+        """
+        Stores a solved plan's values_array() under key, column by column, and evicts
+        the least recently used entries
+        """
+        data = zlib.compress(json.dumps({
+            "fields": list(array.dtype.names),
+            "columns": {name: array[name].tolist() for name in array.dtype.names},
+            "time": solve_time,
+        }).encode())
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(key, data)
+            pipe.zadd(self.INDEX, {key: time.time()})
+            pipe.execute()
+            self.evict()
+        except redis.RedisError:
+            pass
+
+    def evict(self):
+        """Deletes the least recently used entries beyond max_entries"""
+        excess = self.client.zcard(self.INDEX) - self.max_entries
+        if excess > 0:
+            keys = self.client.zrange(self.INDEX, 0, excess - 1)
+            pipe = self.client.pipeline()
+            pipe.delete(*keys)
+            pipe.zrem(self.INDEX, *keys)
+            pipe.execute()
+
+    def clear(self):
+        """Deletes every cached solution"""
+        keys = self.client.zrange(self.INDEX, 0, -1)
+        if keys:
+            self.client.delete(*keys)
+        self.client.delete(self.INDEX)
+
+    @classmethod
+    def solve_key(cls, invmt_plan, **options):
+        """key() of a solve with options; time_limit is left out, as it only decides whether the result is stored"""
+        return cls.key(invmt_plan, **{name: value for name, value in options.items() if name != "time_limit"})
+
+    def store(self, key, array, solve_time, status):
+        """set() for a plan whose solve status is "optimal"; any other plan is not cached"""
+        if status == "optimal":
+            self.set(key, array, solve_time)
+
+    def solve(self, invmt_plan, **options):
+        """
+        Returns {"array", "values", "time", "cached", "status"} for invmt_plan, calling
+        invmt_plan.pyondo(**options) only on a cache miss. A plan that cannot be solved
+        (values_array() raises) is not cached, nor is one cut short by a time_limit option
+        (status other than "optimal"); time_limit is not part of the key
+        """
+        key = self.solve_key(invmt_plan, **options)
+        cached = self.get(key)
+        if cached is not None:
+            cached["cached"] = True
+            cached["status"] = "optimal"
+        else:
+            invmt_plan.pyondo(**options)
+            cached = {
+                "array": invmt_plan.values_array(), "time": invmt_plan.result_time(), "cached": False,
+                "status": getattr(invmt_plan, "status", "optimal"),
+            }
+            self.store(key, cached["array"], cached["time"], cached["status"])
+        cached["values"] = invmt_plan.records(cached["array"])
+        return cached
+
+    def solve_many(self, cls, scenarios, workers=None, base=None, **options):
+        """
+        Cached counterpart of Pyondo.solve_many(): scenarios already in the cache are read
+        from it, the rest are solved together across the process pool and stored if
+        optimal, keyed and stored as solve() does. Each result also carries "cached"
+        """
+        base = base or {}
+        keys = [self.solve_key(cls(**dict(base, **scenario)), **options) for scenario in scenarios]
+        results = [self.get(key) for key in keys]
+        missing = [i for i, cached in enumerate(results) if cached is None]
+
+        solved = cls.solve_many([scenarios[i] for i in missing], workers=workers, base=base, **options) if missing else []
+        for i, result in zip(missing, solved):
+            result["cached"] = False
+            if result["status"] == "ok":
+                self.store(keys[i], result["array"], result["time"], result["solve_status"])
+            results[i] = result
+
+        for result in results:
+            if "status" not in result:
+                result.update(
+                    status="ok", solve_status="optimal", values=cls.records(result["array"]), cached=True, elapsed=0.
+                )
+        return results
@@ -0,0 +1,204 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+from scipy.linalg import cho_factor, cho_solve, LinAlgError
+
+from .pyondo import Pyondo
+from .matrix import MatrixBuilder
+from .solvers import SolverResult
+
+def cash_flow_program(invmt_plan):
+    """
+    The Pyondo program of a monthly plan as a cash flow over months, in standard form
+
+        maximize    w @ z
+        subject to  A @ z == b,  z >= 0
+
+    > one row per month t: the cash left in the bank above MINIMUM_BANK_BALANCE
+      (u[t] = Balance[t] - MINIMUM_BANK_BALANCE) plus the month's investments equals the
+      cash arriving: u[t - 1] grown by the bank rate, interest and maturities of earlier
+      investments, net flows and existing interest / maturities
+    > columns are u[t] for every month, then Investments[t, j] in row-major order; each
+      column takes cash from its own month and pays into later months only
+    > w is the interest each column earns within the horizon: the bank rate for u and
+      every payment of the investment's rate inside the horizon
+
+    PBalance and the other Pyondo variables are eliminated, so the program has one row
+    per month instead of MatrixBuilder's (terms + 6) and MINIMUM_BANK_BALANCE becomes
+    the non-negativity of u.
+
+    RETURNS:
+    > A (sparse CSC), b, w and the constant interest (existing interest, and bank interest
+    on the minimum balance) that the plan earns whatever it invests
+    """
+    builder = MatrixBuilder(invmt_plan)
+    months, terms = builder.months, builder.terms
+    rates = builder.origin_rates()
+    bank_rates = builder.bank_factors()
+    minimum = float(invmt_plan.MINIMUM_BANK_BALANCE)
+    existing_interest = builder.by_period(invmt_plan.existing_interest)
+
+    # mirrors the PBalance rows of MatrixBuilder.build_compact
+    b = builder.period_flows() + existing_interest + builder.by_period(invmt_plan.existing_maturities)
+    b[0] = invmt_plan.opening_balance + builder.period_flows()[0]
+    b[1:] += bank_rates[1:] * minimum
+    b[0] -= minimum
+
+    periods = np.arange(months)
+    invested = months + periods[:, None] * terms + np.arange(terms)
+    rows = [periods, periods[1:], np.repeat(periods, terms)]
+    cols = [periods, periods[:-1], invested.ravel()]
+    data = [np.ones(months), -(1 + bank_rates[1:]), np.ones(months * terms)]
+
+    w = np.zeros(months * (terms + 1))
+    w[:months - 1] = bank_rates[1:]
+    for term, fraction, matures, origins, paid in builder.lookback():
+        rows.append(paid)
+        cols.append(invested[origins, term])
+        data.append(-(rates[origins, term] * fraction + matures))
+        w[invested[origins, term]] += rates[origins, term] * fraction
+
+    A = sparse.csc_matrix(
+        (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(months, w.shape[0])
+    )
+    constant = float(existing_interest.sum() + minimum * bank_rates[1:].sum())
+    return A, b, w, constant
+
+def interior_point(A, b, c, tolerance=1e-8, max_iterations=80):
+    """
+    Mehrotra predictor-corrector interior point method for
+
+        minimize    c @ z
+        subject to  A @ z == b,  z >= 0
+
+    Each iteration factors the (rows x rows) matrix A @ diag(z / s) @ A.T; for
+    cash_flow_program() that is one row per month, whatever the number of terms.
+
+    RETURNS:
+    > (z, y, iterations): primal solution, row duals and iterations used; z is None if
+    the relative residuals and duality gap did not fall below tolerance
+    """
+    m, n = A.shape
+    At = A.T.tocsr()
+
+    def factor(d):
+        M = (A @ sparse.diags(d) @ At).toarray()
+        regularization = 1e-14 * max(np.trace(M) / m, 1.)
+        while True:
+            try:
+                return cho_factor(M + regularization * np.eye(m))
+            except LinAlgError:
+                regularization *= 100
+
+    # Mehrotra's starting point
+    normal = factor(np.ones(n))
+    z = At @ cho_solve(normal, b)
+    y = cho_solve(normal, A @ c)
+    s = c - At @ y
+    z += max(-1.5 * z.min(), 0.)
+    s += max(-1.5 * s.min(), 0.)
+    zs = z @ s
+    z += 0.5 * zs / s.sum()
+    s += 0.5 * zs / z.sum()
+
+    def step(values, direction):
+        negative = direction < 0
+        if not negative.any():
+            return 1.
+        return min(1., float(np.min(-values[negative] / direction[negative])))
+
+    for iteration in range(max_iterations):
+        primal = b - A @ z
+        dual = c - At @ y - s
+        objective = c @ z
+        if (
+            np.linalg.norm(primal) <= tolerance * (1 + np.linalg.norm(b))
+            and np.linalg.norm(dual) <= tolerance * (1 + np.linalg.norm(c))
+            and abs(objective - b @ y) <= tolerance * (1 + abs(objective))
+        ):
+            return z, y, iteration
+
+        d = z / s
+        normal = factor(d)
+
+        def direction(complementarity):
+            dy = cho_solve(normal, primal + A @ (d * dual) - A @ (complementarity / s))
+            dz = d * (At @ dy - dual) + complementarity / s
+            ds = (complementarity - s * dz) / z
+            return dz, dy, ds
+
+        # affine scaling predictor, then centering and second order corrector
+        dz, dy, ds = direction(-z * s)
+        mu = z @ s / n
+        affine = (z + step(z, dz) * dz) @ (s + step(s, ds) * ds) / n
+        sigma = (affine / mu) ** 3
+        dz, dy, ds = direction(-z * s - dz * ds + sigma * mu)
+
+        alpha_primal = 0.995 * step(z, dz)
+        alpha_dual = 0.995 * step(s, ds)
+        z = z + alpha_primal * dz
+        y = y + alpha_dual * dy
+        s = s + alpha_dual * ds
+    return None, y, max_iterations
+
+class CashFlowPyondo(Pyondo):
+    """
+    Pyondo solved by a specialised interior point method in NumPy / SciPy instead of a
+    general LP solver.
+
+    The program is written as a cash flow over months (cash_flow_program): one balance
+    row per month, with MINIMUM_BANK_BALANCE as the non-negativity of the cash kept in
+    the bank. Investments in multi-year terms pay interest into several later months,
+    so this is not a pure generalized network and a network simplex does not apply.
+    The rows do keep the structure, though: every interior point iteration
+    (interior_point) factors a single months x months matrix, and no LP is built,
+    written or parsed.
+
+    The plan is the same optimal plan Pyondo.pyondo() finds (to solver tolerance):
+    Investments are read from the interior point solution and every other variable is
+    rebuilt with roll_forward(). If the method does not converge, the study is solved
+    by Pyondo.pyondo() instead
+
+    invmt_plan = CashFlowPyondo(**kwargs)
+    invmt_plan.pyondo()
+    invmt_plan.values()
+    """
+
+    def pyondo(self, tolerance=1e-8, max_iterations=80, **options):
+        """
+        Solves the cash flow program; options are passed to Pyondo.pyondo() if it is
+        needed as a fallback. Returns self.model, as Pyondo.pyondo() does: None unless the
+        fallback solved the linear program
+        """
+        start = time.perf_counter()
+        A, b, w, constant = cash_flow_program(self)
+        build = time.perf_counter()
+
+        # scaled to dollars of the largest flow and the largest rate
+        scale = max(np.abs(b).max(), 1.)
+        weight = max(np.abs(w).max(), 1e-12)
+        z, y, self.iterations = interior_point(A, b / scale, -w / weight, tolerance, max_iterations)
+        solve = time.perf_counter()
+
+        if z is not None:
+            investments = np.maximum(z[self.periods:] * scale, 0.).reshape(self.periods, self.term_ladder.size)
+            solution = self.roll_forward(investments)
+            if self.feasible(solution):
+                self.solution = solution
+                self.timings = OrderedDict([
+                    ("build", build - start), ("solve", solve - build), ("load", time.perf_counter() - solve)
+                ])
+                self.formulation = "flow"
+                self.grid = None
+                self.lp = None
+                self.status = "optimal"
+                self.results = SolverResult(
+                    x=z * scale, status="ok", time=solve - build,
+                    message="interior point, {} iterations".format(self.iterations)
+                )
+                self.model = None
+                return self.model
+
+        return super().pyondo(**options)
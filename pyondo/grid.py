@@ -0,0 +1,82 @@
+import numpy as np
+
+class TimeGrid:
+    """
+    Partition of a monthly horizon into Pyondo periods of variable length.
+
+    > lengths: number of months in each period
+    > starts: 0-based month in which each period begins
+    > months: total months covered; must equal Pyondo.periods
+
+    TimeGrid.monthly(months) reproduces the standard one-month-per-period model.
+    TimeGrid.multiresolution(months, monthly_years, coarse) keeps monthly periods for
+    the first monthly_years and coarse-month (e.g. quarterly or annual) periods after
+
+    Period i represents the cash position at its first month, so anything received in
+    months (starts[i - 1], starts[i]] is credited to period i and nothing is counted as
+    available before it actually arrives
+    """
+    COARSE = [1, 3, 6, 12]
+
+    def __init__(self, lengths):
+        self.lengths = np.asarray(lengths, dtype=int)
+        if self.lengths.ndim != 1 or self.lengths.size == 0 or np.any(self.lengths < 1):
+            raise ValueError("TimeGrid lengths must be a non-empty list of positive month counts")
+        self.starts = np.concatenate([[0], np.cumsum(self.lengths)[:-1]])
+        self.months = int(self.lengths.sum())
+        self.size = self.lengths.size
+
+    @classmethod
+    def monthly(cls, months):
+        return cls(np.ones(months, dtype=int))
+
+    @classmethod
+    def multiresolution(cls, months, monthly_years=5, coarse=12):
+        """
+        Monthly periods for the first monthly_years, then periods of coarse months;
+        a shorter final period absorbs any remainder
+        """
+        if coarse not in cls.COARSE:
+            raise ValueError("coarse must be one of {}".format(cls.COARSE), coarse)
+        if monthly_years < 1:
+            raise ValueError("At least the first year must be monthly", monthly_years)
+        head = min(months, 12 * monthly_years)
+        tail = months - head
+        lengths = [1] * head + [coarse] * (tail // coarse)
+        if tail % coarse:
+            lengths.append(tail % coarse)
+        return cls(lengths)
+
+    @property
+    def is_monthly(self):
+        return self.size == self.months
+
+    @property
+    def key(self):
+        """Hashable description of the grid, used to cache matrix layouts"""
+        return (self.months, ) + tuple(np.flatnonzero(self.lengths != 1)) + tuple(self.lengths[self.lengths != 1])
+
+    def period_of(self, months):
+        """
+        0-based period to which a receipt in each 0-based month is credited: the first
+        period starting in or after that month; self.size if it is after the last start
+        """
+        return np.searchsorted(self.starts, months, side="left")
+
+    def aggregate(self, monthly):
+        """
+        Sums a monthly array into the periods given by period_of; months after the
+        last period start are dropped
+        """
+        periods = self.period_of(np.arange(self.months))
+        keep = periods < self.size
+        return np.bincount(periods[keep], weights=np.asarray(monthly, dtype=float)[keep], minlength=self.size)
+
+    def dips(self, monthly):
+        """
+        Lowest running total of a monthly net cash flow between the start of each period
+        and the start of the next, relative to the period start (0 if it never dips);
+        always 0 on a monthly grid
+        """
+        running = np.cumsum(np.asarray(monthly, dtype=float))
+        return np.minimum.reduceat(running, self.starts) - running[self.starts]
@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .pyondo import Pyondo
+from .matrix import MatrixBuilder
+from .solvers import SolverResult
+
+def greedy_ladder(invmt_plan):
+    """
+    Greedy rate ladder: a feasible [periods, terms] array of Investments for a Pyondo
+    instance, found without a solver in O(periods * terms) NumPy operations
+
+    > headroom is the projected Balance less MINIMUM_BANK_BALANCE in every month if
+      nothing more were invested, counting contributions, expenditures and existing
+      interest and maturities but not bank interest
+    > month by month, terms are taken from the highest rate down; each term receives the
+      smallest headroom between now and its maturity, which is then locked up until
+      the principal is repaid, and the interest it pays is added from each payment on
+    > only terms paying more than the bank rate are used, and only in months whose
+      investments receive a payment within the horizon
+
+    The bank interest left out of the projection can only raise the Balance, so the plan never
+    breaks the minimum balance unless the study cannot fund it with no investments at all
+    """
+    builder = MatrixBuilder(invmt_plan)
+    periods, ladder = invmt_plan.periods, invmt_plan.term_ladder
+    payments = [[] for term in range(ladder.size)]
+    for offset, term, fraction, matures in ladder.schedule:
+        payments[term].append((offset, fraction))
+    net_flows = invmt_plan._net_flows
+    inflows = (
+        net_flows + builder.by_period(invmt_plan.existing_interest)
+        + builder.by_period(invmt_plan.existing_maturities)
+    )
+    # mirrors the opening PBalance row, see MatrixBuilder.period_flows
+    inflows[0] = invmt_plan.opening_balance + net_flows[1]
+    headroom = np.cumsum(inflows) - invmt_plan.MINIMUM_BANK_BALANCE
+
+    rates = builder.origin_rates()
+    bank_rates = invmt_plan.bank_rates
+    investments = np.zeros((periods, ladder.size))
+    for period in range(periods - min(ladder.schedule)[0]):
+        for term in np.argsort(-rates[period], kind="stable"):
+            if rates[period, term] <= bank_rates[period]:
+                break
+            if period + payments[term][0][0] >= periods:
+                continue
+            end = min(period + ladder.months[term], periods)
+            amount = headroom[period:end].min()
+            if amount <= 0:
+                continue
+            investments[period, term] = amount
+            headroom[period:end] -= amount
+            # the interest it pays is cash from each payment on
+            for offset, fraction in payments[term]:
+                if period + offset < periods:
+                    headroom[period + offset:] += amount * rates[period, term] * fraction
+    return investments
+
+class LadderPyondo(Pyondo):
+    """
+    Pyondo planned by greedy_ladder() instead of a linear program.
+
+    Runs in milliseconds for any horizon and returns the same solution / values()
+    layout as Pyondo; the plan respects MINIMUM_BANK_BALANCE but earns less interest
+    than the optimal one. If even an uninvested plan breaks the minimum balance the
+    solution is left unsolved, so values() raises as it does for insufficient funds
+
+    invmt_plan = LadderPyondo(**kwargs)
+    invmt_plan.pyondo()
+    invmt_plan.values()
+    """
+
+    def pyondo(self, **options):
+        """
+        Builds the ladder plan; options accepted by Pyondo.pyondo() are ignored.
+        Returns self.model, as Pyondo.pyondo() does; it is None, as no program is solved
+        """
+        start = time.perf_counter()
+        investments = greedy_ladder(self)
+        build = time.perf_counter()
+        solution = self.roll_forward(investments)
+        if not self.feasible(solution):
+            solution = self.roll_forward(np.full_like(investments, np.nan))
+        self.solution = solution
+        self.timings = OrderedDict([("build", build - start), ("solve", 0.), ("load", time.perf_counter() - build)])
+
+        self.lp = None
+        self.status = "heuristic" if self.feasible(solution) else "infeasible"
+        self.results = SolverResult(
+            x=None, status="ok" if self.status == "heuristic" else "error",
+            time=time.perf_counter() - start, message="greedy ladder"
+        )
+        self.model = None
+
+        return self.model
@@ -0,0 +1,516 @@
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+import pyomo.kernel as pmo
+
+from .grid import TimeGrid
+
+# CSR layouts (row ordering, duplicate groups, column indices, row pointers) keyed by program shape,
+# least recently used first; only MAX_LAYOUTS are kept. See _Rows.tocsr
+LAYOUTS = OrderedDict()
+MAX_LAYOUTS = 64
+
+class LinearProgram:
+    """
+    Pyondo linear program held as sparse arrays:
+
+        maximize    c @ x + constant
+        subject to  A_eq @ x == b_eq
+                    A_ub @ x <= b_ub
+                    x >= 0
+
+    > columns maps each Pyondo variable name to its (offset, shape) in x so that
+      a solution vector can be unpacked back into named arrays
+    > expand: optional callable that derives the remaining Pyondo variables from the
+      unpacked columns (used by the compact formulation)
+    > rows maps "eq" and "ub" to the (offset, size) of each named block of rows, e.g.
+      rows["eq"]["PBalance"], so row duals can be unpacked the same way
+    """
+
+    def __init__(self, c, A_eq, b_eq, A_ub, b_ub, columns, constant=0., expand=None, rows=None):
+        self.c = c
+        self.A_eq = A_eq
+        self.b_eq = b_eq
+        self.A_ub = A_ub
+        self.b_ub = b_ub
+        self.columns = columns
+        self.constant = constant
+        self.expand = expand
+        self.rows = rows or {"eq": OrderedDict(), "ub": OrderedDict()}
+
+    @property
+    def size(self):
+        return self.c.shape[0]
+
+    def unpack(self, x):
+        """
+        Splits solution vector x into a dict of arrays keyed by variable name;
+        two-dimensional variables are returned with shape [periods, terms]
+        """
+        values = self.split(x)
+        return self.expand(values) if self.expand is not None else values
+
+    def split(self, x):
+        """Splits a vector over the columns into arrays keyed by variable name, without expand"""
+        x = np.asarray(x, dtype=float)
+        return {
+            name: x[offset:offset + int(np.prod(shape))].reshape(shape)
+            for name, (offset, shape) in self.columns.items()
+        }
+
+    def objective(self, x):
+        return float(self.c @ x) + self.constant
+
+    def unpack_duals(self, duals):
+        """
+        Splits (eq duals, ub duals) into a dict of arrays keyed by row block name.
+        Duals are the change in the objective per unit increase of each right-hand side
+        """
+        unpacked = OrderedDict()
+        for kind, values in zip(("eq", "ub"), duals):
+            for name, (offset, size) in self.rows[kind].items():
+                unpacked[name] = np.asarray(values[offset:offset + size], dtype=float)
+        return unpacked
+
+    def reduced_costs(self, duals):
+        """
+        Objective coefficients less the dual value of the rows each column enters,
+        unpacked by variable name: the change in the objective per unit of a column
+        forced into the solution (zero for columns in the basis, at most zero otherwise)
+        """
+        y_eq, y_ub = duals
+        return self.split(self.c - self.A_eq.T @ y_eq - self.A_ub.T @ y_ub)
+
+    def lagrangian(self, x, duals):
+        """
+        c @ x + constant + duals @ (b - A @ x) for a solution x and its (eq, ub) duals;
+        at the optimum this equals the objective, and its change between two programs of
+        the same shape estimates the change in the optimal objective to first order
+        """
+        y_eq, y_ub = duals
+        return (
+            self.objective(x) + float(y_eq @ (self.b_eq - self.A_eq @ x))
+            + float(y_ub @ (self.b_ub - self.A_ub @ x))
+        )
+
+    def kernel_model(self):
+        """
+        Wraps the arrays in a pyomo.kernel block so the program can be handed to
+        any Pyomo solver plugin (e.g. glpsol) without building expressions row by row
+        """
+        model = pmo.block()
+        model.x = pmo.variable_list(pmo.variable(lb=0) for i in range(self.size))
+        x = list(model.x)
+        model.eq = pmo.matrix_constraint(self.A_eq, lb=self.b_eq, ub=self.b_eq, x=x)
+        model.ub = pmo.matrix_constraint(self.A_ub, ub=self.b_ub, x=x)
+        nonzero = np.flatnonzero(self.c)
+        model.obj = pmo.objective(
+            sum(self.c[i] * x[i] for i in nonzero) + self.constant,
+            sense=pmo.maximize
+        )
+        model.dual = pmo.suffix(direction=pmo.suffix.IMPORT)
+        return model
+
+    def kernel_values(self, model):
+        """Reads the solved kernel model back into a solution vector"""
+        return np.array([var.value for var in model.x], dtype=float)
+
+    def kernel_duals(self, model):
+        """Reads the row duals of the solved kernel model back into (eq duals, ub duals)"""
+        return tuple(
+            np.array([model.dual.get(con, np.nan) for con in rows], dtype=float)
+            for rows in (model.eq, model.ub)
+        )
+
+class MatrixBuilder:
+    """
+    Assembles the Pyondo linear program directly as sparse SciPy arrays.
+
+    Produces the same program as Pyondo.build_model() (same variables, rows and
+    objective) but every block of rows is generated with NumPy index arithmetic
+    instead of one Pyomo expression per constraint.
+
+    > rows are collected as COO triplets (row, col, coefficient) and converted to
+      CSR once all blocks are added
+    > the lookback for interest and maturities is done per payment in the term ladder's
+      schedule (pyondo.terms.TermLadder) over all periods at once, i.e. 15 vectorized
+      slices for TERMS = 5; each added term adds only its own payments
+
+    formulation="compact" substitutes the definitional variables (TotalInvestment,
+    Balance, Maturities, InvestmentInterest, AccountInterest, TotalInterest) into the
+    PBalance rows and the objective, leaving only Investments and PBalance as columns
+    and only the PBalance and MBB rows. The substituted variables are rebuilt from the
+    solution by expand(). Their non-negativity is implied by the MBB rows as long as
+    rates, bank rates and existing interest/maturities are non-negative, which is checked.
+
+    grid (pyondo.grid.TimeGrid) sets the length of each period; defaults to one month per
+    period. With coarser periods:
+    > flows and existing interest/maturities received since the previous period start
+      are summed into each period (TimeGrid.aggregate)
+    > an investment made at the start of a period pays out in the first period starting
+      on or after the month in which the payment falls due
+    > the MBB row of each period also reserves the period's largest running cash
+      shortfall (TimeGrid.dips) so the monthly bank balance stays above the minimum
+    > bank interest on Balance[i - 1] accrues for the length of period i - 1
+    > solutions are spread back onto monthly rows by monthly()
+    """
+    VARIABLES = OrderedDict([
+        ("Investments", 2), ("TotalInvestment", 1), ("Balance", 1), ("PBalance", 1),
+        ("Maturities", 1), ("InvestmentInterest", 2), ("AccountInterest", 1), ("TotalInterest", 1),
+    ])
+    DECISIONS = ["Investments", "PBalance"]
+    FORMULATIONS = ["full", "compact"]
+
+    def __init__(self, pyondo, formulation="full", grid=None):
+        if formulation not in self.FORMULATIONS:
+            raise ValueError("formulation must be one of {}".format(self.FORMULATIONS), formulation)
+        grid = grid if grid is not None else TimeGrid.monthly(pyondo.periods)
+        if grid.months != pyondo.periods:
+            raise ValueError("The TimeGrid must cover exactly Pyondo.periods months", grid.months)
+        pyondo._validate_terms()
+        self.pyondo = pyondo
+        self.formulation = formulation
+        self.grid = grid
+        self.months = pyondo.periods
+        self.periods = grid.size
+        self.ladder = pyondo.term_ladder
+        self.terms = self.ladder.size
+        self.columns = OrderedDict()
+        offset = 0
+        self.layout = (formulation, grid.key, self.ladder.key)
+        names = self.DECISIONS if formulation == "compact" else self.VARIABLES.keys()
+        for name in names:
+            dims = self.VARIABLES[name]
+            shape = (self.periods, self.terms) if dims == 2 else (self.periods, )
+            self.columns[name] = (offset, shape)
+            offset += int(np.prod(shape))
+        self.size = offset
+
+    def col(self, name, period, term=None):
+        """
+        Column index of variable name at 0-based period (and term); accepts arrays
+        """
+        offset, shape = self.columns[name]
+        if term is None:
+            return offset + np.asarray(period)
+        return offset + np.asarray(period) * self.terms + np.asarray(term)
+
+    def by_period(self, dct):
+        """
+        Converts an existing_interest / existing_maturities dict keyed by 1-based
+        month into an array of length periods; missing months are 0
+        """
+        arr = np.zeros(self.months)
+        for period, value in (dct or {}).items():
+            if 1 <= period <= self.months:
+                arr[period - 1] += value
+        return self.grid.aggregate(arr)
+
+    def lookback(self):
+        """
+        Yields (term, fraction, matures, origins, periods) for every payment in the term
+        ladder's schedule: origins are the 0-based investment periods and periods are the
+        0-based periods in which the payment lands (origins + offset on a monthly grid);
+        see TermLadder for fraction and matures
+        """
+        paid_by_offset = {}
+        for offset in self.ladder.offsets():
+            paid = self.grid.period_of(self.grid.starts + offset)
+            origins = np.flatnonzero(paid < self.periods)
+            paid_by_offset[offset] = (origins, paid[origins])
+        for offset, term, fraction, matures in self.ladder.schedule:
+            origins, paid = paid_by_offset[offset]
+            yield term, fraction, matures, origins, paid
+
+    def origin_rates(self):
+        """
+        Rate earned by an investment originating in each 0-based period.
+        Mirrors Pyondo._build_int_constraint, which reads self.rates[period - 12n]
+        i.e. the row one month after the investment was made
+        """
+        return self.pyondo.rates[np.minimum(self.grid.starts + 1, self.months - 1)]
+
+    def bank_factors(self):
+        """
+        Multiplier on Balance[i - 1] giving AccountInterest[i]: BR[i] / 12 for each month
+        of period i - 1 (BR[i] / 12 on a monthly grid). Entry 0 is unused
+        """
+        bank_rates = self.pyondo.bank_rates
+        factors = np.zeros(self.periods)
+        factors[1:] = bank_rates[self.grid.starts[1:]] * self.grid.lengths[:-1] / 12
+        return factors
+
+    def monthly_flows(self):
+        """
+        Net cash flow of each month as the PBalance recursion applies it.
+        Mirrors Pyondo.build_model(), whose opening row reads _net_flows[1]
+        """
+        flows = self.pyondo._net_flows.copy()
+        flows[0] = flows[1]
+        return flows
+
+    def period_flows(self):
+        """Net cash flow entering the PBalance row of each period"""
+        return self.grid.aggregate(self.monthly_flows())
+
+    def minimum_balances(self):
+        """
+        Right-hand side of the MBB rows: -MINIMUM_BANK_BALANCE, lowered by any cash
+        shortfall within a coarse period
+        """
+        dips = self.grid.dips(self.monthly_flows())
+        return -float(self.pyondo.MINIMUM_BANK_BALANCE) + dips
+
+    def build(self):
+        if self.formulation == "compact":
+            return self.build_compact()
+        return self.build_full()
+
+    def build_full(self):
+        P, T = self.periods, self.terms
+        periods = np.arange(P)
+        terms = np.arange(T)
+        every = np.repeat(periods, T)
+        each = np.tile(terms, P)
+
+        eq = _Rows()
+        ub = _Rows()
+
+        # InvestmentInterest[i, j] - sum(Investments[i - offset, j] * rate * fraction) == 0
+        rates = self.origin_rates()
+        rows = eq.block(P * T, name="InvestmentInterest")
+        eq.add(rows, self.col("InvestmentInterest", every, each), 1.)
+        for term, fraction, matures, origins, paid in self.lookback():
+            eq.add(rows[paid * T + term], self.col("Investments", origins, term), -rates[origins, term] * fraction)
+
+        # AccountInterest[i] - Balance[i - 1] * BR[i] / 12 == 0
+        rows = eq.block(P, name="AccountInterest")
+        eq.add(rows, self.col("AccountInterest", periods), 1.)
+        eq.add(rows[1:], self.col("Balance", periods[:-1]), -self.bank_factors()[1:])
+
+        # TotalInterest[i] - AccountInterest[i] - sum(InvestmentInterest[i, j]) == existing interest
+        rows = eq.block(P, rhs=self.by_period(self.pyondo.existing_interest), name="TotalInterest")
+        eq.add(rows, self.col("TotalInterest", periods), 1.)
+        eq.add(rows, self.col("AccountInterest", periods), -1.)
+        eq.add(rows[every], self.col("InvestmentInterest", every, each), -1.)
+
+        # Maturities[i] - sum(Investments[i - months[j], j]) == existing maturities
+        rows = eq.block(P, rhs=self.by_period(self.pyondo.existing_maturities), name="Maturities")
+        eq.add(rows, self.col("Maturities", periods), 1.)
+        for term, fraction, matures, origins, paid in self.lookback():
+            if matures:
+                eq.add(rows[paid], self.col("Investments", origins, term), -1.)
+
+        # TotalInvestment[i] - sum(Investments[i, j]) == 0
+        rows = eq.block(P, name="TotalInvestment")
+        eq.add(rows, self.col("TotalInvestment", periods), 1.)
+        eq.add(rows[every], self.col("Investments", every, each), -1.)
+
+        # PBalance[i] - PBalance[i - 1] + sum(Investments[i - 1, j]) - TotalInterest[i] - Maturities[i] == flow
+        flows = self.period_flows()
+        flows[0] += self.pyondo.opening_balance
+        rows = eq.block(P, rhs=flows, name="PBalance")
+        eq.add(rows, self.col("PBalance", periods), 1.)
+        eq.add(rows[1:], self.col("PBalance", periods[:-1]), -1.)
+        later = every[every < P - 1]
+        eq.add(rows[later + 1], self.col("Investments", later, each[:later.shape[0]]), 1.)
+        eq.add(rows[1:], self.col("TotalInterest", periods[1:]), -1.)
+        eq.add(rows[1:], self.col("Maturities", periods[1:]), -1.)
+
+        # Balance[i] - PBalance[i] + sum(Investments[i, j]) == 0
+        rows = eq.block(P, name="Balance")
+        eq.add(rows, self.col("Balance", periods), 1.)
+        eq.add(rows, self.col("PBalance", periods), -1.)
+        eq.add(rows[every], self.col("Investments", every, each), 1.)
+
+        # sum(Investments[i, j]) - PBalance[i] <= -MINIMUM_BANK_BALANCE
+        rows = ub.block(P, rhs=self.minimum_balances(), name="MBB")
+        ub.add(rows[every], self.col("Investments", every, each), 1.)
+        ub.add(rows, self.col("PBalance", periods), -1.)
+
+        c = np.zeros(self.size)
+        c[self.col("TotalInterest", periods)] = 1.
+
+        A_eq, b_eq = eq.tocsr(self.size, layout=self.layout + ("eq", ))
+        A_ub, b_ub = ub.tocsr(self.size, layout=self.layout + ("ub", ))
+        expand = None if self.grid.is_monthly else self.monthly
+        return LinearProgram(
+            c, A_eq, b_eq, A_ub, b_ub, self.columns, expand=expand, rows={"eq": eq.names, "ub": ub.names}
+        )
+
+    def build_compact(self):
+        P, T = self.periods, self.terms
+        periods = np.arange(P)
+        every = np.repeat(periods, T)
+        each = np.tile(np.arange(T), P)
+
+        rates = self.origin_rates()
+        bank_rates = self.bank_factors()
+        existing_interest = self.by_period(self.pyondo.existing_interest)
+        existing_maturities = self.by_period(self.pyondo.existing_maturities)
+        if (
+            np.any(rates < 0) or np.any(bank_rates < 0)
+            or np.any(existing_interest < 0) or np.any(existing_maturities < 0)
+        ):
+            raise ValueError("The compact formulation requires non-negative rates and existing flows")
+
+        eq = _Rows()
+        ub = _Rows()
+        c = np.zeros(self.size)
+
+        # PBalance[i] - (1 + BR[i] / 12) * (PBalance[i - 1] - sum(Investments[i - 1, j]))
+        #   - sum(Investments[i - offset, j] * rate * fraction) - sum(Investments[i - months[j], j]) == flow + existing
+        flows = self.period_flows() + existing_interest + existing_maturities
+        flows[0] = self.pyondo.opening_balance + self.period_flows()[0]
+        rows = eq.block(P, rhs=flows, name="PBalance")
+        eq.add(rows, self.col("PBalance", periods), 1.)
+        eq.add(rows[1:], self.col("PBalance", periods[:-1]), -(1 + bank_rates[1:]))
+        later = every[every < P - 1]
+        eq.add(rows[later + 1], self.col("Investments", later, each[:later.shape[0]]), 1 + bank_rates[later + 1])
+        for term, fraction, matures, origins, paid in self.lookback():
+            cols = self.col("Investments", origins, term)
+            eq.add(rows[paid], cols, -rates[origins, term] * fraction - matures)
+            # sum(TotalInterest) picks up every investment interest payment in the horizon
+            c[cols] += rates[origins, term] * fraction
+
+        # sum(Investments[i, j]) - PBalance[i] <= -MINIMUM_BANK_BALANCE
+        rows = ub.block(P, rhs=self.minimum_balances(), name="MBB")
+        ub.add(rows[every], self.col("Investments", every, each), 1.)
+        ub.add(rows, self.col("PBalance", periods), -1.)
+
+        # AccountInterest[i] = Balance[i - 1] * BR[i] / 12
+        c[self.col("PBalance", periods[:-1])] += bank_rates[1:]
+        c[self.col("Investments", later, each[:later.shape[0]])] -= bank_rates[later + 1]
+
+        A_eq, b_eq = eq.tocsr(self.size, layout=self.layout + ("eq", ))
+        A_ub, b_ub = ub.tocsr(self.size, layout=self.layout + ("ub", ))
+        return LinearProgram(
+            c, A_eq, b_eq, A_ub, b_ub, self.columns,
+            constant=float(existing_interest.sum()),
+            expand=self.expand if self.grid.is_monthly else lambda decisions: self.monthly(self.expand(decisions)),
+            rows={"eq": eq.names, "ub": ub.names}
+        )
+
+    def expand(self, decisions):
+        """
+        Rebuilds every Pyondo variable from solved Investments and PBalance values
+        using the definitional rows of the full formulation
+        """
+        investments = decisions["Investments"]
+        pbalance = decisions["PBalance"]
+
+        total_investment = investments.sum(axis=1)
+        balance = pbalance - total_investment
+        account_interest = np.zeros(self.periods)
+        account_interest[1:] = balance[:-1] * self.bank_factors()[1:]
+        investment_interest, maturities = self.payments(investments)
+        total_interest = (
+            account_interest + investment_interest.sum(axis=1)
+            + self.by_period(self.pyondo.existing_interest)
+        )
+
+        return {
+            "Investments": investments, "TotalInvestment": total_investment,
+            "Balance": balance, "PBalance": pbalance, "Maturities": maturities,
+            "InvestmentInterest": investment_interest, "AccountInterest": account_interest,
+            "TotalInterest": total_interest,
+        }
+
+    def payments(self, investments):
+        """
+        Investment interest [periods, terms] and maturities [periods] paid by investments,
+        including existing maturities
+        """
+        rates = self.origin_rates()
+        investment_interest = np.zeros((self.periods, self.terms))
+        maturities = self.by_period(self.pyondo.existing_maturities)
+        for term, fraction, matures, origins, paid in self.lookback():
+            np.add.at(investment_interest[:, term], paid, investments[origins, term] * rates[origins, term] * fraction)
+            if matures:
+                np.add.at(maturities, paid, investments[origins, term])
+        return investment_interest, maturities
+
+    def monthly(self, solution):
+        """
+        Spreads a solution on a coarse grid back onto one row per month:
+        > investments and bank interest are placed in the first month of their period
+        > investment interest and maturities land in the exact month they are paid
+        > Balance runs the PBalance recursion month by month on monthly_flows(), so it is the
+          balance the program constrained: existing interest and maturities of month 0 are
+          left out of it, as in the opening PBalance row
+        """
+        months = MatrixBuilder(self.pyondo)
+        starts = self.grid.starts
+
+        investments = np.zeros((self.months, self.terms))
+        investments[starts] = solution["Investments"]
+        total_investment = investments.sum(axis=1)
+        investment_interest, maturities = months.payments(investments)
+        account_interest = np.zeros(self.months)
+        account_interest[starts] = solution["AccountInterest"]
+        total_interest = (
+            account_interest + investment_interest.sum(axis=1)
+            + months.by_period(self.pyondo.existing_interest)
+        )
+
+        received = total_interest + maturities
+        received[0] = 0.
+        balance = self.pyondo.opening_balance + np.cumsum(months.monthly_flows() + received - total_investment)
+
+        return {
+            "Investments": investments, "TotalInvestment": total_investment,
+            "Balance": balance, "PBalance": balance + total_investment, "Maturities": maturities,
+            "InvestmentInterest": investment_interest, "AccountInterest": account_interest,
+            "TotalInterest": total_interest,
+        }
+
+class _Rows:
+    """Accumulates COO triplets and right-hand sides for a group of constraint rows"""
+
+    def __init__(self):
+        self.count = 0
+        self.rhs = []
+        self.triplets = []
+        self.names = OrderedDict()
+
+    def block(self, size, rhs=None, name=None):
+        rows = np.arange(self.count, self.count + size)
+        if name is not None:
+            self.names[name] = (self.count, size)
+        self.count += size
+        self.rhs.append(np.zeros(size) if rhs is None else np.asarray(rhs, dtype=float))
+        return rows
+
+    def add(self, rows, cols, data):
+        rows = np.asarray(rows)
+        self.triplets.append((rows, np.asarray(cols), np.broadcast_to(data, rows.shape)))
+
+    def tocsr(self, size, layout=None):
+        """
+        Converts the triplets to CSR. The sparsity pattern depends only on the program
+        shape, so the sort that places each triplet in CSR order is cached in LAYOUTS
+        under layout and later builds of the same shape only permute (and sum) the coefficients;
+        the MAX_LAYOUTS most recently used layouts are kept
+        """
+        rows, cols, data = (np.concatenate(arrays) for arrays in zip(*self.triplets))
+        if layout in LAYOUTS and LAYOUTS[layout][0].shape == data.shape:
+            LAYOUTS.move_to_end(layout)
+            order, groups, indices, indptr = LAYOUTS[layout]
+        else:
+            order = np.lexsort((cols, rows))
+            rows, cols = rows[order], cols[order]
+            # triplets that share a (row, col) position are summed
+            first = np.ones(order.shape[0], dtype=bool)
+            first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+            groups = np.flatnonzero(first)
+            indices = cols[groups]
+            indptr = np.searchsorted(rows[groups], np.arange(self.count + 1))
+            if layout is not None:
+                LAYOUTS[layout] = (order, groups, indices, indptr)
+                LAYOUTS.move_to_end(layout)
+                while len(LAYOUTS) > MAX_LAYOUTS:
+                    LAYOUTS.popitem(last=False)
+        data = np.add.reduceat(data[order], groups)
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(self.count, size))
+        return matrix, np.concatenate(self.rhs)
@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+
+from .pyondo import Pyondo
+from .matrix import MatrixBuilder
+from .solvers import get_backend
+
+class ParametricPyondo(Pyondo):
+    """
+    Pyondo program that persists between solves for one (periods, TERMS) shape.
+
+    > the compact program's sparsity pattern is cached per shape (pyondo.matrix.LAYOUTS),
+      so a re-solve only recomputes coefficient and right-hand-side vectors
+    > the solver is a persistent HiGHS instance of its own that restarts from the previous optimal
+      basis (falls back to a cold in-process solve if highspy is not installed)
+    > update() swaps in new rates, bank_rates, flows or existing investments; periods
+      cannot change
+
+    invmt_plan = ParametricPyondo(**kwargs)
+    invmt_plan.pyondo()
+    invmt_plan.update(bank_rates=bank_rates, rates=rates)
+    invmt_plan.pyondo()     # warm-started
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.backend = get_backend("highs-persistent", shared=False)
+        self.solves = 0
+
+    def update(self, **kwargs):
+        """
+        Replaces any of the Pyondo inputs and re-validates them against the current ones
+        """
+        if "periods" in kwargs and kwargs["periods"] != self.periods:
+            raise ValueError("ParametricPyondo cannot change periods; create a new instance")
+
+        current = self.inputs()
+        current.update(kwargs)
+        Pyondo.__init__(self, **current)
+
+    def pyondo(self, grid=None, time_limit=None):
+        """
+        Solves the compact program for the current inputs; returns the LinearProgram
+        > grid: optional pyondo.grid.TimeGrid, as for Pyondo.pyondo()
+        > time_limit: optional wall-clock budget in seconds for building and solving; as
+          for Pyondo.pyondo(), a solve stopped by it keeps the better of the solver's last
+          iterate and the greedy ladder
+
+        self.status is "optimal", "time_limit", "heuristic" or "infeasible", as for Pyondo.pyondo()
+        """
+        start = time.perf_counter()
+        self.formulation = "compact"
+        self.grid = grid
+        self.lp = MatrixBuilder(self, formulation="compact", grid=grid).build()
+        build = time.perf_counter()
+        remaining = None if time_limit is None else time_limit - (build - start)
+        self.results = self.backend.solve(self.lp, time_limit=remaining)
+        solve = time.perf_counter()
+        self.solution = self.lp.unpack(self.results.x)
+        self.timings = OrderedDict([
+            ("build", build - start), ("solve", solve - build), ("load", time.perf_counter() - solve)
+        ])
+
+        self._set_status()
+        self.model = self.lp
+        self.solves += 1
+
+        return self.lp
+
+    @property
+    def warm(self):
+        """True if the last solve restarted from the previous basis"""
+        return getattr(self.backend, "warm", False)
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+from .pyondo import Pyondo
+from .matrix import LinearProgram
+from .blocks import BlockPyondo
+
+class PortfolioPyondo(BlockPyondo):
+    """
+    Many condos' Pyondo programs solved as one block-structured linear program, with the
+    first month's investments allocated to insured GICs inside the same program.
+
+    > each condo keeps its own Pyondo block (MatrixBuilder rows and columns); blocks
+      share no rows, so the constraint matrix is block diagonal
+    > allocation columns A[condo, gic] >= 0 split each condo's first-month Investments of
+      a term over the GICs offered for that term
+    > per condo, the amount placed with an issuer stays within the issuer's insured limit
+      (CDIC / DICO), less anything the condo already holds there
+    > per issuer, capacity limits the firm-wide amount placed across every condo; these
+      are the only rows linking the blocks
+    > the objective is the sum of the condos' total interest plus, for each allocated
+      dollar, the difference between the GIC's rate and the forecast rate for the payments
+      that fall inside the condo's horizon, so the best-paying GICs are chosen first
+
+    Solved together, a binding issuer limit moves money to the next best GIC or term in
+    whichever condo loses least, instead of leaving it unallocated after the fact as
+    independent solves followed by gic_select would.
+
+    portfolio = PortfolioPyondo(
+        [converter.make_kwargs() for converter in converters],
+        gics=gic_select.select.issuer_terms(GICs.objects.latest_gics()),
+        capacity={"Big Bank": 2000000}
+    )
+    portfolio.pyondo()
+    portfolio.plans[0].values()     # the first condo's plan
+    portfolio.allocations[0]        # {issuer: {"term_1": amount, ...}} as from gic_select
+    """
+
+    def __init__(self, kwargs_list, gics, capacity=None, held=None):
+        """
+        PARAMETERS:
+        > kwargs_list: Pyondo kwargs of each condo, e.g. Converter.make_kwargs()
+        > gics: list of dicts with issuer, months (term), rate and cap (insured limit per condo)
+        > capacity: optional dict of issuer: firm-wide limit on the first month's allocations
+        > held: optional list (one per condo) of dicts of issuer: amount already invested
+        """
+        if held is not None and len(held) != len(kwargs_list):
+            raise ValueError("held must have one dict per condo", len(held))
+        self.plans = [Pyondo(**kwargs) for kwargs in kwargs_list]
+        self.gics = list(gics)
+        self.capacity = capacity or {}
+        self.held = held or [{} for kwargs in kwargs_list]
+        self.issuers = sorted(set(gic["issuer"] for gic in self.gics))
+
+    def build(self, formulation="compact"):
+        """
+        Builds every condo's program and the allocation and issuer rows;
+        returns the combined LinearProgram
+        """
+        builders = self.build_blocks(formulation)
+        G = len(self.gics)
+        C = len(self.plans)
+        base = int(self.offsets[-1])
+        size = base + C * G
+
+        issuer = np.array([self.issuers.index(gic["issuer"]) for gic in self.gics], dtype=int)
+        rates = np.array([gic["rate"] for gic in self.gics], dtype=float)
+        caps = np.array([gic["cap"] for gic in self.gics], dtype=float)
+
+        c = np.zeros(size)
+        eq_rows, eq_cols, eq_data = [], [], []
+        ub_blocks = []
+        count = 0
+        for i, (plan, builder, lp) in enumerate(zip(self.plans, builders, self.lps)):
+            c[self.offsets[i]:self.offsets[i + 1]] = lp.c
+            cols = base + i * G + np.arange(G)
+            months = plan.term_ladder.months
+            term = self._terms(plan)
+            # GICs of a term the condo's ladder does not have cannot be allocated
+            offered = term >= 0
+
+            # sum(A[i, g] for g of term j) - Investments[0, j] == 0
+            invested = self.offsets[i] + builder.col("Investments", 0, np.arange(months.size))
+            eq_rows += [count + np.arange(months.size), count + term[offered]]
+            eq_cols += [invested, cols[offered]]
+            eq_data += [-np.ones(months.size), np.ones(offered.sum())]
+            count += months.size
+
+            # premium of the GIC's rate over the forecast, for each payment in the horizon
+            forecast = builder.origin_rates()[0]
+            paid = np.zeros(months.size)
+            for payment_term, fraction, matures, origins, periods in builder.lookback():
+                if origins.size and origins[0] == 0:
+                    paid[payment_term] += fraction
+            c[cols[offered]] = (rates[offered] - forecast[term[offered]]) * paid[term[offered]]
+
+            # insured limit per issuer: sum(A[i, g] for g of issuer k) <= cap - held
+            limit = np.full(len(self.issuers), np.inf)
+            np.minimum.at(limit, issuer, caps)
+            limit -= np.array([self.held[i].get(name, 0.) for name in self.issuers])
+            ub_blocks.append((
+                sparse.csr_matrix((np.ones(G), (issuer, cols)), shape=(len(self.issuers), size)),
+                np.maximum(limit, 0.)
+            ))
+
+        # firm-wide capacity per issuer links the condos
+        linked = [k for k, name in enumerate(self.issuers) if name in self.capacity]
+        if linked:
+            rows = np.concatenate([np.flatnonzero(issuer == k) for k in linked])
+            lookup = {k: row for row, k in enumerate(linked)}
+            link_rows = np.tile(np.array([lookup[k] for k in issuer[rows]]), C)
+            link_cols = (base + np.arange(C)[:, None] * G + rows[None, :]).ravel()
+            ub_blocks.append((
+                sparse.csr_matrix((np.ones(link_cols.size), (link_rows, link_cols)), shape=(len(linked), size)),
+                np.array([self.capacity[self.issuers[k]] for k in linked], dtype=float)
+            ))
+
+        allocation = sparse.csr_matrix(
+            (np.concatenate(eq_data), (np.concatenate(eq_rows), np.concatenate(eq_cols))), shape=(count, size)
+        )
+        A_eq, b_eq, A_ub, b_ub = self.stack(size, eq_rows=[(allocation, np.zeros(count))], ub_rows=ub_blocks)
+
+        columns = OrderedDict([("Allocations", (base, (C, G)))])
+        self.lp = LinearProgram(c, A_eq, b_eq, A_ub, b_ub, columns, constant=sum(lp.constant for lp in self.lps))
+        return self.lp
+
+    def pyondo(self, solver="highs", formulation="compact", time_limit=None):
+        """
+        Builds and solves the portfolio program (see BlockPyondo.pyondo), then reads the
+        allocations into self.allocations: one {issuer: {"term_1": amount, ...}} per condo
+        """
+        lp = super().pyondo(solver=solver, formulation=formulation, time_limit=time_limit)
+
+        allocations = lp.unpack(self.x)["Allocations"]
+        self.allocations = []
+        for i, plan in enumerate(self.plans):
+            selected = {name: {} for name in self.issuers}
+            for gic, term, amount in zip(self.gics, self._terms(plan), allocations[i]):
+                if term >= 0:
+                    name = "term_{}".format(term + 1)
+                    selected[gic["issuer"]][name] = selected[gic["issuer"]].get(name, 0.) + float(amount)
+            self.allocations.append(selected)
+
+        return lp
+
+    def _terms(self, plan):
+        """0-based column in plan's term ladder of each GIC's term, or -1 if it has none"""
+        position = {months: term for term, months in enumerate(plan.term_ladder.months.tolist())}
+        return np.array([position.get(int(gic["months"]), -1) for gic in self.gics], dtype=int)
@@ -1,13 +1,15 @@
 import os
+import time
 import pandas as pd
 import numpy as np
-from operator import sub
 from itertools import chain
 from collections import OrderedDict
 from pyomo.environ import *
-from pyomo.opt import SolverFactory
 
-from decouple import config
+from .grid import TimeGrid
+from .terms import TermLadder
+from .matrix import MatrixBuilder
+from .solvers import get_backend, timed_out
 
 class Pyondo:
     """
@@ -17,28 +19,36 @@ class Pyondo:
     MINIMUM_BANK_BALANCE = 100000
     MinIA = 25000 # currently unutilized
     MaxIA = 10000000    # currently unutilized
+    # number of annual terms, or a list of terms in months, e.g. [6, 12, 18, 24, 36, 48, 60];
+    # rates need one column per term. See pyondo.terms.TermLadder
     TERMS = 5
-    # TERMS = [12, 24, 36, 48, 60]
     BLP = 0.005 / 12    # liquidity premium for bank balances; currently unutilized
+    BUILDS = ["expression", "matrix"]
+    # error raised by values() when the solver returned no solution (insufficient funds)
+    UNSOLVED = "unsupported operand type(s) for +: 'float' and 'NoneType'"
 
     REQUIRED_KEYS = [
                     "periods", "contributions", "expenditures", "opening_balance",
                      "opening_reserve", "rates", "bank_rates"
     ]
     OPTIONAL_KEYS = ["existing_interest", "existing_maturities"]
+    ARRAY_TYPES = (list, tuple, np.ndarray)
     REQUIRED_TYPES = {
             "existing_interest": dict, "existing_maturities": dict,
-            "periods": int, "contributions": list, "expenditures": list,
-            "bank_rates": list, "rates": list,
+            "periods": int, "contributions": ARRAY_TYPES, "expenditures": ARRAY_TYPES,
+            "bank_rates": ARRAY_TYPES, "rates": ARRAY_TYPES,
             "opening_balance": float, "opening_reserve": float
     }
-    REQUIRED_LISTS = [key for key, value in REQUIRED_TYPES.items() if value == list]
+    # dimensions each list / array input is stored with: rates is a [periods, terms] matrix
+    ARRAY_DIMS = OrderedDict([("contributions", 1), ("expenditures", 1), ("bank_rates", 1), ("rates", 2)])
+    REQUIRED_LISTS = list(ARRAY_DIMS)
 
     def __init__(self, **kwargs):
         """
         > OPTIONAL_KEYS: if not provided, these are set to None
         > REQUIRED_LISTS is used to compare the length of all list type items
         to ensure they are equal length as part of _same_length() method
+        > list / array inputs are stored as contiguous float64 NumPy arrays (see _as_array)
         """
         if not self._same_length(**kwargs):
             raise ValueError(
@@ -61,9 +71,11 @@ class Pyondo:
                         """
                         Kwargs contained object of the wrong type; 'existing_interest' and 'existing_maturities' require dict, \
                         'opening_balance' and 'opening_reserve' require float, \
-                        remainder require list
+                        remainder require list or numpy array
                         """, key
                     )
+                elif key in self.ARRAY_DIMS:
+                    self.__setattr__(key, self._as_array(key, value, kwargs.get("periods")))
                 else:
                     self.__setattr__(key, value)
 
@@ -74,68 +86,265 @@ class Pyondo:
 
         self._net_flows = self._find_net_cash_flow()
 
+    @classmethod
+    def solve_many(cls, scenarios, workers=None, base=None, **options):
+        """
+        Solves a list of scenario kwargs (each merged over base) across a process pool and
+        returns one result dict per scenario, in order; see pyondo.batch.solve_many
+
+        results = Pyondo.solve_many([{"rates": r} for r in curves], base=kwargs, workers=4)
+        """
+        from .batch import solve_many
+        return solve_many(cls, scenarios, workers=workers, base=base, **options)
+
+    def inputs(self):
+        """
+        Returns the Pyondo kwargs currently set on this instance, e.g. to build a
+        modified copy: Pyondo(**dict(invmt_plan.inputs(), rates=rates))
+        """
+        return {
+            key: getattr(self, key) for key in self.REQUIRED_KEYS + self.OPTIONAL_KEYS
+            if getattr(self, key) is not None
+        }
+
     def _same_length(self, **kwargs):
         """
         Tests if objects of type list are the same length
         Returns True or False
         """
-        lists = [(key, value[-24:]) for key, value in kwargs.items() if key in self.REQUIRED_LISTS]
         list_lengths = [len(value) for key, value in kwargs.items() if key in self.REQUIRED_LISTS]
         return len(set(list_lengths)) == 1
 
+    def _as_array(self, key, value, periods=None):
+        """
+        Converts a list / array input to a contiguous float64 array and validates it in one
+        pass: ARRAY_DIMS[key] dimensions, one row per period and only finite values.
+        Raises ValueError naming the key otherwise
+        """
+        try:
+            array = np.ascontiguousarray(value, dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError("Kwargs contained a list that is not numeric or not rectangular", key)
+        if array.ndim != self.ARRAY_DIMS[key]:
+            raise ValueError(
+                "Kwargs contained a list with {} dimensions; {} requires {}".format(
+                    array.ndim, key, self.ARRAY_DIMS[key]
+                ), key
+            )
+        if isinstance(periods, int) and array.shape[0] != periods:
+            raise ValueError("Kwargs contained a list without one entry per period", key)
+        if not np.isfinite(array).all():
+            raise ValueError("Kwargs contained a list with NaN or infinite values", key)
+        return array
+
     def _find_net_cash_flow(self):
         """
         Find net cash flow for a monthly period.
-        Subtracts list of monthly contributions from list of monthly expenditures
-        Returns list
+        Subtracts array of monthly expenditures from array of monthly contributions
+        Returns array
         """
-        return list(map(sub, self.contributions, self.expenditures))
+        return self.contributions - self.expenditures
+
+    @property
+    def term_ladder(self):
+        """pyondo.terms.TermLadder of TERMS: the investment terms in months and their payments"""
+        return TermLadder.of(self.TERMS)
 
-    def _build_int_constraint(self, period, term, investments):
+    def _validate_terms(self):
+        """
+        Checks that rates has one column per term of TERMS; run when the program is
+        built, as TERMS may be set on an instance after __init__
+        """
+        if self.rates.shape[1] != self.term_ladder.size:
+            raise ValueError(
+                "rates has {} columns; TERMS requires {}".format(self.rates.shape[1], self.term_ladder.size),
+                "rates"
+            )
+
+    def _build_int_constraint(self, period, term, investments, lookback):
         """
         Builds the Interest constraint for each investment term in each period.
-        > Loops over term and adds to the constraint at each new investment term
-        > Each new interest payment is received from the investment made [period - (12 * n)] periods
-        ago multiplied by the interest rate in the same period
-        > If the period is less than term of the investment, than
-        ***THIS ASSUMES ONLY ANNUAL INTEREST PAYMENTS***
+        > Each interest payment is received from an investment made [period - offset] periods
+        ago multiplied by the interest rate in the same period and the fraction of the
+        annual rate paid (see pyondo.terms.TermLadder)
+        > lookback is the precomputed TermLadder.index(), so only the investments that
+        actually pay into [period, term] are visited
 
         PARAMETERS:
         > period: the current period for which the constraint is being built
         > term: the current investment term for which the constraint is being built
         > investments: model.Investments array of dimensions [periods, terms]
+        > lookback: term_ladder.index(periods)
 
         RETURNS:
         > interest constraint specific to [period, term]
         """
         constraint = 0
-
-        for n in range(1, term + 1):
-            constraint += investments[period - (12 * n), term] * self.rates[period - (12 * n)][term - 1] if period > (12 * n) else 0
-            # should be self.rates[period - (12 * n) - 1]
-        # for n in self.TERMS:
-            # constraint += investments[period - n, term] * self.rates[period - n - 1][term - 1] if period > n else 0
+        for origin, fraction, matures in lookback.get((period, term), ()):
+            constraint += investments[origin, term] * self.rates[origin, term - 1] * fraction
+            # should be self.rates[origin - 1]
         return constraint
 
-    def _build_mat_constraint(self, period, investments):
+    def _build_mat_constraint(self, period, investments, lookback):
         """
-        Builds maturity constraint for each investment term in each period.
-        > Loops over term and adds to the constraint at each new investment term
-        >
-        and looking back to the balance invested [period - (12 * n)] periods ago
+        Builds maturity constraint for each investment term in each period
+        > sums the investments whose term ends in period, read from the precomputed
+        lookback index (TermLadder.index())
         """
         constraint = 0
-        for n in range(1, self.TERMS + 1):
-            constraint += investments[period - (12 * n), n] if period > (12 * n) else 0
-        # for n in self.TERMS:
-            # constraint += investments[period - n, n] if period > n else 0
+        for term in range(1, self.term_ladder.size + 1):
+            for origin, fraction, matures in lookback.get((period, term), ()):
+                if matures:
+                    constraint += investments[origin, term]
         return constraint
 
-    def pyondo(self):
+    def pyondo(self, build=None, solver=None, formulation="full", grid=None, time_limit=None):
         """
         Linear program that determines maximum interest earned from timing of Investments
         in various terms.
         Considers timing of contributions, timing of expenditures, interest rate projections
+
+        PARAMETERS:
+        > build: "expression" builds the Pyomo model constraint by constraint (build_model);
+        "matrix" assembles the same program as sparse arrays (pyondo.matrix.MatrixBuilder),
+        which avoids constructing a Python expression per constraint.
+        Defaults to "expression" for solvers that accept Pyomo models, else "matrix"
+        > solver: name of a backend in pyondo.solvers.BACKENDS; defaults to the
+        PYONDO_SOLVER setting ("glpk" if unset)
+        > formulation: "full" keeps every Pyondo variable in the program; "compact" keeps
+        only Investments and PBalance and rebuilds the rest after the solve (build="matrix" only)
+        > grid: pyondo.grid.TimeGrid of period lengths, e.g. TimeGrid.multiresolution(periods, 5, 12)
+        for monthly periods over 5 years and annual periods after; results are still one row
+        per month (build="matrix" only). Defaults to monthly periods
+        > time_limit: wall-clock budget in seconds for the whole call; what is left after
+        the build is passed to the solver. If the solver stops at its limit, the better of
+        its last iterate (if feasible) and a greedy ladder plan (pyondo.ladder.greedy_ladder)
+        is kept. Building is not interrupted, so a large expression build can still overrun
+
+        RETURNS:
+        > the solved model: Pyomo ConcreteModel for build="expression", pyomo.kernel block
+        for build="matrix" with glpk, or the pyondo.matrix.LinearProgram for in-process solvers.
+        It is also kept in self.model; subclasses that solve no single program
+        (LadderPyondo, CashFlowPyondo, RollingPyondo) return and keep None
+
+        Wall-clock seconds spent building the program, solving it (for glpk this includes
+        writing the LP file and parsing glpsol's output) and loading the solution are kept
+        in self.timings. self.status is "optimal", "time_limit" (the solver's last iterate
+        was kept), "heuristic" (the greedy ladder was kept) or "infeasible"
+        """
+        backend = get_backend(solver)
+        if build is None:
+            build = "expression" if backend.MODELS and formulation == "full" and grid is None else "matrix"
+        if build not in self.BUILDS:
+            raise ValueError("build must be one of {}".format(self.BUILDS), build)
+        if build == "expression" and not backend.MODELS:
+            raise ValueError("The {} solver requires build='matrix'".format(backend.name))
+        if build == "expression" and formulation != "full":
+            raise ValueError("The {} formulation requires build='matrix'".format(formulation))
+        if build == "expression" and grid is not None and not grid.is_monthly:
+            raise ValueError("A coarse TimeGrid requires build='matrix'")
+
+        self.timings = OrderedDict()
+        self.formulation = formulation
+        self.grid = grid
+        start = time.perf_counter()
+
+        def remaining():
+            return None if time_limit is None else time_limit - (time.perf_counter() - start)
+
+        if build == "matrix":
+            self.lp = MatrixBuilder(self, formulation=formulation, grid=grid).build()
+            self.timings["build"] = time.perf_counter() - start
+            self.results = backend.solve(self.lp, time_limit=remaining())
+            self.timings["solve"] = time.perf_counter() - start - self.timings["build"]
+            self.solution = self.lp.unpack(self.results.x)
+            model = self.results.model if self.results.model is not None else self.lp
+        else:
+            self.lp = None
+            model = self.build_model()
+            self.timings["build"] = time.perf_counter() - start
+            self.results = backend.solve_model(model, time_limit=remaining())
+            self.timings["solve"] = time.perf_counter() - start - self.timings["build"]
+            model.solutions.store_to(self.results)
+            self.solution = self._model_values(model)
+        self.timings["load"] = time.perf_counter() - start - self.timings["build"] - self.timings["solve"]
+
+        self._set_status()
+        self.model = model
+
+        return model
+
+    def _set_status(self):
+        """
+        Sets self.status from self.results and self.solution after a solve; a solve stopped
+        by its time limit falls back (see _fallback) and the time that takes is added to
+        self.timings
+        """
+        if timed_out(self.results):
+            fallback = time.perf_counter()
+            self._fallback()
+            self.timings["fallback"] = time.perf_counter() - fallback
+        else:
+            self.status = "infeasible" if np.isnan(self.solution["TotalInterest"]).any() else "optimal"
+
+    def _fallback(self):
+        """
+        Replaces the solution of a solve stopped by its time limit with the better of the
+        solver's last iterate, when it satisfies every constraint, and the greedy ladder plan
+        """
+        from .ladder import greedy_ladder
+
+        candidates = []
+        investments = self.solution["Investments"]
+        if not np.isnan(investments).any():
+            incumbent = self.roll_forward(np.maximum(investments, 0.))
+            if self.feasible(incumbent):
+                candidates.append(("time_limit", incumbent))
+        ladder = self.roll_forward(greedy_ladder(self))
+        if self.feasible(ladder):
+            candidates.append(("heuristic", ladder))
+
+        if candidates:
+            self.status, self.solution = max(candidates, key=lambda candidate: candidate[1]["TotalInterest"].sum())
+        else:
+            self.status = "infeasible"
+            self.solution = self.roll_forward(np.full((self.periods, self.term_ladder.size), np.nan))
+
+    def roll_forward(self, investments):
+        """
+        Every Pyondo variable implied by a [periods, TERMS] array of Investments, found by
+        running the PBalance recursion month by month
+        """
+        builder = MatrixBuilder(self)
+        investment_interest, maturities = builder.payments(investments)
+        received = investment_interest.sum(axis=1) + builder.by_period(self.existing_interest)
+        bank_rates = self.bank_rates / 12
+        net_flows = self._net_flows
+        total_investment = investments.sum(axis=1)
+
+        pbalance = np.zeros(self.periods)
+        pbalance[0] = self.opening_balance + net_flows[1]
+        for period in range(1, self.periods):
+            balance = pbalance[period - 1] - total_investment[period - 1]
+            pbalance[period] = (
+                balance * (1 + bank_rates[period]) + received[period]
+                + net_flows[period] + maturities[period]
+            )
+        return builder.expand({"Investments": investments, "PBalance": pbalance})
+
+    def feasible(self, solution, tolerance=0.01):
+        """
+        True if a solution dict keeps Balance at or above MINIMUM_BANK_BALANCE and every
+        Investment non-negative, to within tolerance (dollars)
+        """
+        return bool(
+            (solution["Balance"] >= self.MINIMUM_BANK_BALANCE - tolerance).all()
+            and (solution["Investments"] >= -tolerance).all()
+        )
+
+    def build_model(self):
+        """
+        Builds the Pyondo linear program as a Pyomo ConcreteModel, one constraint at a time
         """
 
         """
@@ -147,6 +356,7 @@ class Pyondo:
         self.opening_balance = OB1
         """
 
+        self._validate_terms()
         model = ConcreteModel()
 
         """
@@ -155,10 +365,8 @@ class Pyondo:
         Terms = j;  (as in number of years in invmt)
         """
         model.Periods = range(1, (self.periods) + 1)
-        model.Terms = range(1, self.TERMS + 1)
-        # model.Terms = self.TERMS # will this work with a list???????
-        # model.Terms = (i for i in self.TERMS) # will this work with a list???????
-        # model.Terms = range(TERMS[0], TERMS[-1], space_between_terms)
+        model.Terms = range(1, self.term_ladder.size + 1)
+        lookback = self.term_ladder.index(self.periods)
 
         """
         MODEL VARIABLES
@@ -247,7 +455,7 @@ class Pyondo:
             for term in model.Terms:
                 model.InvestmentInterest_Constraint.add(
                     model.InvestmentInterest[period, term] ==
-                                    self._build_int_constraint(period, term, model.Investments)
+                                    self._build_int_constraint(period, term, model.Investments, lookback)
                 )
             model.AccountInterest_Constraint.add(
                 model.AccountInterest[period] == (model.Balance[period - 1] * (self.bank_rates[period - 1] / 12) if period > 1 else 0)
@@ -261,7 +469,7 @@ class Pyondo:
             )
             model.Maturities_Constraint.add(
                 model.Maturities[period] == (
-                    self._build_mat_constraint(period, model.Investments)
+                    self._build_mat_constraint(period, model.Investments, lookback)
                     + (self.existing_maturities[period] if self.existing_maturities else 0)
                 )
             )
@@ -279,15 +487,95 @@ class Pyondo:
             )
             model.Balance_Constraint.add(model.Balance[period] == model.PBalance[period] - sum(model.Investments[period, term] for term in model.Terms)
             )
-        
-        opt = SolverFactory("glpk", executable=config('GLPSOL_PATH'))
 
-        self.results = opt.solve(model, symbolic_solver_labels=True)
-        model.solutions.store_to(self.results)
+        return model
 
-        self.model = model
+    def _model_values(self, model):
+        """
+        Reads the solved ConcreteModel into a dict of arrays keyed by variable name,
+        matching the layout of MatrixBuilder.columns
+        """
+        solution = {}
+        for name in MatrixBuilder.VARIABLES.keys():
+            var = getattr(model, name)
+            values = np.array([var[index].value for index in var], dtype=float)
+            if var.dim() == 2:
+                values = values.reshape(self.periods, self.term_ladder.size)
+            solution[name] = values
+        return solution
 
-        return model
+    def _duals(self):
+        """(eq duals, ub duals) of the last solve, or ValueError if there are none"""
+        results = getattr(self, "results", None)
+        if getattr(self, "lp", None) is None or results is None or results.duals is None:
+            raise ValueError(
+                "Marginal values need a build='matrix' solve with a solver that reports duals: "
+                "highs-persistent, glpk, or highs with scipy >= 1.7"
+            )
+        if getattr(self, "status", "optimal") != "optimal":
+            raise ValueError("Marginal values need an optimal solve", self.status)
+        return results.duals
+
+    def marginal_values(self):
+        """
+        Per-period marginal values of the last solve, read from the duals of its
+        PBalance and MBB rows and the reduced costs of Investments; no re-solve is needed
+
+        RETURNS:
+        > NumPy structured array with one record per program period (per month unless a
+        coarse TimeGrid was used):
+            period: first month of the period (1-based)
+            cash: total interest gained per extra dollar of net cash flow in the period
+            minimum_balance: total interest gained per dollar the minimum bank balance is
+            lowered in the period (0 where the minimum is not binding)
+            term_1 .. term_N: total interest lost per dollar forced into an investment of
+            that term in the period (0 for investments in the plan)
+        Valid for changes small enough to keep the optimal basis; see estimate()
+        """
+        duals = self._duals()
+        rows = self.lp.unpack_duals(duals)
+        reduced_costs = self.lp.reduced_costs(duals)["Investments"]
+        starts = (self.grid or TimeGrid.monthly(self.periods)).starts
+
+        terms = ["term_{}".format(term) for term in range(1, self.term_ladder.size + 1)]
+        array = np.zeros(starts.shape[0], dtype=[("period", int), ("cash", float), ("minimum_balance", float)] + [
+            (name, float) for name in terms
+        ])
+        array["period"] = starts + 1
+        array["cash"] = rows["PBalance"]
+        array["minimum_balance"] = rows["MBB"]
+        for term, name in enumerate(terms):
+            array[name] = np.minimum(reduced_costs[:, term], 0.)
+        return array
+
+    def estimate(self, **changes):
+        """
+        First-order estimate of the change in total interest if Pyondo inputs were
+        changed, without re-solving: the program is rebuilt with the changes and its
+        Lagrangian is evaluated at the last solution and duals.
+
+        Exact for changes to contributions, expenditures, opening balances and existing
+        interest / maturities that keep the optimal basis (the usual case for small
+        changes); a first-order approximation for rate changes. Re-solve for large changes
+
+        invmt_plan.estimate(expenditures=shifted)     # move a $50k expenditure
+        invmt_plan.estimate(rates=invmt_plan.rates + 0.0025)
+
+        PARAMETERS:
+        > changes: Pyondo kwargs to replace; periods cannot change
+
+        RETURNS:
+        > estimated change in total interest
+        """
+        duals = self._duals()
+        if changes.get("periods", self.periods) != self.periods:
+            raise ValueError("estimate() cannot change periods", changes["periods"])
+        changed = Pyondo(**dict(self.inputs(), **changes))
+        changed.MINIMUM_BANK_BALANCE = self.MINIMUM_BANK_BALANCE
+        changed.TERMS = self.TERMS
+        lp = MatrixBuilder(changed, formulation=self.formulation, grid=self.grid).build()
+        x = np.asarray(self.results.x, dtype=float)
+        return lp.lagrangian(x, duals) - self.lp.lagrangian(x, duals)
 
     def results_json(self):
         return self.results.json_repn()
@@ -295,33 +583,71 @@ class Pyondo:
     def result_time(self):
         return self.results_json()["Solver"][0]["Time"]
 
+    def value_fields(self):
+        """
+        Column names of values_array() / values_frame() and keys of each values() dict, in order
+        """
+        return (
+            ["period", "opening_balance", "contributions", "expenditures", "interest",
+             "closing_balance", "bank_balance", "current_investments", "maturities"]
+            + ["term_{}".format(term) for term in range(1, self.term_ladder.size + 1)]
+            + ["total_investments"]
+        )
+
+    def values_array(self):
+        """
+        Solved plan as a NumPy structured array with one record per period and the columns
+        of value_fields(); "period" is int, everything else float.
+        > every column is read from self.solution in one operation
+        > closing_balance is opening_reserve plus the cumulative sum of contributions
+        - expenditures + interest; opening_balance is the prior closing_balance
+
+        Raises the same TypeError as values() if the solver returned no solution
+        (e.g. insufficient funds), which investmentplan.views.get_progress relies on
+        """
+        solution = self.solution
+        if any(np.isnan(solution[name]).any() for name in ("TotalInterest", "Balance", "Investments")):
+            raise TypeError(self.UNSOLVED)
+
+        fields = self.value_fields()
+        array = np.zeros(self.periods, dtype=[(name, int if name == "period" else float) for name in fields])
+        array["period"] = np.arange(1, self.periods + 1)
+        array["contributions"] = self.contributions
+        array["expenditures"] = self.expenditures
+        array["interest"] = solution["TotalInterest"]
+        array["closing_balance"] = self.opening_reserve + np.cumsum(
+            array["contributions"] - array["expenditures"] + array["interest"]
+        )
+        array["opening_balance"][0] = self.opening_reserve
+        array["opening_balance"][1:] = array["closing_balance"][:-1]
+        array["bank_balance"] = solution["Balance"]
+        array["current_investments"] = array["closing_balance"] - array["bank_balance"]
+        array["maturities"] = solution["Maturities"]
+        for term in range(1, self.term_ladder.size + 1):
+            array["term_{}".format(term)] = solution["Investments"][:, term - 1]
+        array["total_investments"] = solution["TotalInvestment"]
+
+        return array
+
+    def values_frame(self):
+        """
+        values_array() as a pandas DataFrame indexed by period
+        """
+        array = self.values_array()
+        return pd.DataFrame(array, index=array["period"])
+
+    @staticmethod
+    def records(array):
+        """
+        Converts a values_array() into the list of dicts returned by values()
+        """
+        names = array.dtype.names
+        return [dict(zip(names, row)) for row in array.tolist()]
+
     def values(self):
         """
         Inputs the solved model returned by Pyondo solver and sorts values for Easy
         bulk upload to Django model
         Use list of dicts with each list index a period in the model
         """
-        results = []
-        for period in range(1, self.periods + 1):
-            dict = {}
-            dict["period"] = period
-            if period == 1:
-                dict["opening_balance"] = self.opening_reserve
-            else:
-                dict["opening_balance"] = results[period - 2]["closing_balance"]
-            dict["contributions"] = self.contributions[period - 1]
-            dict["expenditures"] = self.expenditures[period - 1]
-            dict["interest"] = self.model.TotalInterest[period].value
-            dict["closing_balance"] = (
-                                    dict["opening_balance"] + dict["contributions"]
-                                    - dict["expenditures"] + dict["interest"]
-            )
-            dict["bank_balance"] = self.model.Balance[period].value
-            dict["current_investments"] = dict["closing_balance"] - dict["bank_balance"]
-            dict["maturities"] = self.model.Maturities[period].value
-            for term in self.model.Terms:
-                dict["term_{}".format(term)] = self.model.Investments[period, term].value
-            results.append(dict)
-            dict["total_investments"] = self.model.TotalInvestment[period].value
-
-        return results
+        return self.records(self.values_array())
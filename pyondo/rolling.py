@@ -0,0 +1,181 @@
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from .pyondo import Pyondo
+from .matrix import MatrixBuilder
+from .solvers import SolverResult
+
+class RollingPyondo(Pyondo):
+    """
+    Pyondo solved as a sequence of overlapping windows rather than one program.
+
+    > each window optimizes lookahead months but only its first commit months of
+      Investments are kept; the next window starts where the commitment ends
+    > lookahead must be at least commit + the longest term, so every committed
+      investment matures inside the window that chose it
+    > a window starts from the PBalance left by the committed investments; interest and
+      maturities those investments still owe are passed in as existing_interest and
+      existing_maturities, next to the study's own existing investments
+    > the final window runs to the end of the horizon and commits everything
+    > each window keeps TOLERANCE more in the bank than the next one requires, so the
+      solver's rounding cannot leave a later window a few cents short of its minimum
+    > the committed Investments are rolled forward through the full monthly program, so
+      solution / values() have the same layout as Pyondo and satisfy every constraint
+
+    Each window is a Pyondo of at most lookahead periods, so build time, memory and solve
+    time grow roughly linearly with the horizon. The plan is feasible but may earn less
+    than the monolithic solve; gap_report() measures the difference.
+
+    invmt_plan = RollingPyondo(**kwargs)
+    invmt_plan.pyondo(commit=60, lookahead=120)
+    invmt_plan.values()
+    """
+    COMMIT = 60
+    LOOKAHEAD = 120
+    TOLERANCE = 1.  # extra minimum balance per remaining window; see pyondo()
+
+    def window_starts(self, commit, lookahead):
+        """0-based first month of each window"""
+        if commit < 12:
+            raise ValueError("commit must be at least 12 months", commit)
+        if lookahead < commit + self.term_ladder.longest:
+            raise ValueError(
+                "lookahead must cover commit plus the longest term so committed investments "
+                "mature inside their window", lookahead
+            )
+        starts = [0]
+        while starts[-1] + lookahead < self.periods:
+            starts.append(starts[-1] + commit)
+        return starts
+
+    def pyondo(self, commit=None, lookahead=None, time_limit=None, **options):
+        """
+        Solves the horizon window by window
+
+        PARAMETERS:
+        > commit: months of Investments kept from each window; defaults to COMMIT
+        > lookahead: months optimized in each window; defaults to LOOKAHEAD, or commit plus
+        the longest term if that is longer
+        > time_limit: wall-clock budget in seconds, shared out evenly over the windows still
+        to solve; a window that runs out falls back as in Pyondo.pyondo()
+        > options: passed to Pyondo.pyondo() for every window (build, solver, formulation)
+
+        RETURNS:
+        > self.model, as Pyondo.pyondo() does; it is None, as no single program is solved.
+        The solved window Pyondo instances are kept in self.windows
+        """
+        commit = commit or self.COMMIT
+        lookahead = lookahead or max(self.LOOKAHEAD, commit + self.term_ladder.longest)
+        starts = self.window_starts(commit, lookahead)
+
+        self.lp = None
+        self.windows = []
+        investments = np.zeros((self.periods, self.term_ladder.size))
+        solve_time = 0.
+        start_time = time.perf_counter()
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else self.periods
+            window = Pyondo(**self.window_inputs(start, min(start + lookahead, self.periods), investments))
+            window.MINIMUM_BANK_BALANCE = self.MINIMUM_BANK_BALANCE + self.TOLERANCE * (len(starts) - 1 - i)
+            window.TERMS = self.TERMS
+            budget = None
+            if time_limit is not None:
+                budget = (time_limit - (time.perf_counter() - start_time)) / (len(starts) - i)
+            window.pyondo(time_limit=budget, **options)
+            solve_time += window.result_time()
+            self.windows.append(window)
+
+            # solvers can return investments a rounding error below zero
+            committed = np.maximum(window.solution["Investments"][:end - start], 0.)
+            investments[start:end] = committed
+            if np.isnan(committed).any():
+                # no feasible plan for this window; leave the rest unsolved as a failed solve would
+                investments[start:] = np.nan
+                break
+
+        self.timings = OrderedDict(
+            (stage, sum(window.timings[stage] for window in self.windows)) for stage in ("build", "solve", "load")
+        )
+        self.timings["roll_forward"] = time.perf_counter() - start_time - sum(self.timings.values())
+        self.solution = self.roll_forward(investments)
+        self.results = SolverResult(
+            x=None, status="ok" if not np.isnan(investments).any() else "error", time=solve_time,
+            message="{} windows in {:.3f}s".format(len(self.windows), time.perf_counter() - start_time)
+        )
+        statuses = [window.status for window in self.windows]
+        if np.isnan(investments).any():
+            self.status = "infeasible"
+        else:
+            self.status = next((status for status in ("heuristic", "time_limit") if status in statuses), "optimal")
+        self.model = None
+
+        return self.model
+
+    def window_inputs(self, start, end, investments):
+        """
+        Pyondo kwargs for the window of months [start, end), given the Investments
+        committed before start
+        """
+        inputs = self.inputs()
+        for key in self.REQUIRED_LISTS:
+            inputs[key] = inputs[key][start:end]
+        inputs["periods"] = end - start
+        if start == 0:
+            return inputs
+
+        state = self.roll_forward(investments)
+        builder = MatrixBuilder(self)
+        interest = builder.by_period(self.existing_interest) + state["InvestmentInterest"].sum(axis=1)
+        maturities = state["Maturities"]
+        net_flows = self._net_flows
+
+        # A window's first PBalance is opening_balance + the flow of its second month, and it
+        # receives no interest or maturities of its own; pass the rolled-forward PBalance instead
+        inputs["opening_balance"] = float(state["PBalance"][start] - net_flows[start + 1])
+        inputs["opening_reserve"] = float(
+            self.opening_reserve + net_flows[:start].sum() + state["TotalInterest"][:start].sum()
+        )
+        inputs["existing_interest"] = Counter({
+            month - start + 1: float(interest[month]) for month in range(start + 1, end) if interest[month]
+        })
+        inputs["existing_maturities"] = Counter({
+            month - start + 1: float(maturities[month]) for month in range(start + 1, end) if maturities[month]
+        })
+        return inputs
+
+    def objective(self):
+        """Total interest earned by the solved plan"""
+        return float(self.solution["TotalInterest"].sum())
+
+    def gap_report(self, commit=None, lookahead=None, **options):
+        """
+        Solves the horizon both window by window and as one program and compares them
+
+        RETURNS:
+        > dict of each objective (total interest), the absolute and relative gap
+        (monolithic - rolling), solve times and the number of windows
+        """
+        start_time = time.perf_counter()
+        self.pyondo(commit=commit, lookahead=lookahead, **options)
+        rolling_time = time.perf_counter() - start_time
+
+        monolithic = Pyondo(**self.inputs())
+        monolithic.MINIMUM_BANK_BALANCE = self.MINIMUM_BANK_BALANCE
+        monolithic.TERMS = self.TERMS
+        start_time = time.perf_counter()
+        monolithic.pyondo(**options)
+        monolithic_time = time.perf_counter() - start_time
+        monolithic_objective = float(monolithic.solution["TotalInterest"].sum())
+
+        gap = monolithic_objective - self.objective()
+        return {
+            "rolling": self.objective(),
+            "monolithic": monolithic_objective,
+            "gap": gap,
+            "relative_gap": gap / monolithic_objective if monolithic_objective else 0.,
+            "windows": len(self.windows),
+            "rolling_time": rolling_time,
+            "monolithic_time": monolithic_time,
+        }
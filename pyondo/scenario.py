@@ -0,0 +1,129 @@
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+from .pyondo import Pyondo
+from .matrix import LinearProgram
+from .blocks import BlockPyondo
+
+class ScenarioPyondo(BlockPyondo):
+    """
+    One investment plan for a study that hedges across several forecast rate paths,
+    solved as a single extensive-form linear program.
+
+    > each path (e.g. one YCForecast curve's rates and bank_rates) gets its own copy of
+      the Pyondo program, a block of the constraint matrix
+    > the Investments of the first shared months are the same in every path: they are the
+      decisions made today, before knowing which path rates follow; later Investments
+      adapt to each path
+    > objective "expected" maximizes the weighted average total interest over the
+      paths; "worst_case" maximizes the total interest of the worst path, with the
+      expected interest as a small tie-break so the other paths' later decisions stay
+      sensible
+
+    One sparse solve replaces solving the study once per path and comparing the
+    first months by hand.
+
+    robust = ScenarioPyondo(kwargs, [{"rates": r, "bank_rates": b} for r, b in curves])
+    robust.pyondo()
+    robust.first_month()        # {"term_1": amount, ...}, e.g. for gic_select.select_and_save
+    robust.statistics()         # interest and balances of the plan under each path
+    """
+    OBJECTIVES = ["expected", "worst_case"]
+    TIE_BREAK = 1e-4
+
+    def __init__(self, kwargs, paths, weights=None, objective="expected", shared=1):
+        """
+        PARAMETERS:
+        > kwargs: Pyondo kwargs of the study, e.g. Converter.make_kwargs()
+        > paths: list of dicts of Pyondo kwargs that differ by path, usually rates and bank_rates
+        > weights: optional probability of each path; equal by default
+        > objective: "expected" or "worst_case"
+        > shared: number of leading months whose Investments are common to every path
+        """
+        if not paths:
+            raise ValueError("ScenarioPyondo needs at least one rate path", paths)
+        if objective not in self.OBJECTIVES:
+            raise ValueError("objective must be one of {}".format(self.OBJECTIVES), objective)
+        if not 1 <= shared <= kwargs["periods"]:
+            raise ValueError("shared must be between 1 and periods", shared)
+        weights = np.ones(len(paths)) if weights is None else np.asarray(weights, dtype=float)
+        if weights.shape != (len(paths), ) or np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError("weights must be one non-negative number per path", weights)
+
+        self.plans = [Pyondo(**dict(kwargs, **path)) for path in paths]
+        self.weights = weights / weights.sum()
+        self.objective_name = objective
+        self.shared = shared
+
+    def build(self, formulation="compact"):
+        """
+        Builds every path's program and the rows sharing the first months' Investments;
+        returns the combined LinearProgram
+        """
+        builders = self.build_blocks(formulation)
+        base = int(self.offsets[-1])
+        worst_case = self.objective_name == "worst_case"
+        size = base + 1 if worst_case else base
+
+        c = np.zeros(size)
+        for i, lp in enumerate(self.lps):
+            c[self.offsets[i]:self.offsets[i + 1]] = self.weights[i] * lp.c
+        constant = float(sum(weight * lp.constant for weight, lp in zip(self.weights, self.lps)))
+
+        # Investments[path, month, term] - Investments[0, month, term] == 0 for the shared months
+        months, terms = np.meshgrid(np.arange(self.shared), np.arange(builders[0].terms), indexing="ij")
+        decisions = [
+            self.offsets[i] + builder.col("Investments", months.ravel(), terms.ravel())
+            for i, builder in enumerate(builders)
+        ]
+        count = (len(decisions) - 1) * decisions[0].size
+        cols = np.concatenate(decisions[1:] + [np.tile(decisions[0], len(decisions) - 1)])
+        shared = sparse.csr_matrix(
+            (np.repeat([1., -1.], count), (np.tile(np.arange(count), 2), cols)), shape=(count, size)
+        )
+        ub_rows = []
+        if worst_case:
+            # worst <= c_k @ x_k + constant_k for every path k
+            paths = sparse.block_diag([-lp.c.reshape(1, -1) for lp in self.lps], format="csr")
+            paths = sparse.hstack([paths, np.ones((len(self.plans), 1))], format="csr")
+            ub_rows.append((paths, np.array([lp.constant for lp in self.lps])))
+            c *= self.TIE_BREAK
+            c[base] = 1.
+            constant *= self.TIE_BREAK
+
+        A_eq, b_eq, A_ub, b_ub = self.stack(size, eq_rows=[(shared, np.zeros(count))], ub_rows=ub_rows)
+        columns = OrderedDict([("Worst", (base, (1, )))]) if worst_case else OrderedDict()
+        self.lp = LinearProgram(c, A_eq, b_eq, A_ub, b_ub, columns, constant=constant)
+        return self.lp
+
+    def first_month(self):
+        """
+        The shared first month's Investments as {"term_1": amount, ...}, the keys of
+        Pyondo.values() that gic_select.select_and_save() allocates
+        """
+        investments = self.plans[0].solution["Investments"][0]
+        if np.isnan(investments).any():
+            raise TypeError(Pyondo.UNSOLVED)
+        return OrderedDict(
+            ("term_{}".format(term + 1), float(amount)) for term, amount in enumerate(investments)
+        )
+
+    def statistics(self):
+        """
+        The robust plan under each path: NumPy structured array with one record per path
+        of path (0-based), weight, interest (total over the horizon), minimum_balance and
+        average_balance (of the bank balance)
+        """
+        array = np.zeros(len(self.plans), dtype=[
+            ("path", int), ("weight", float), ("interest", float), ("minimum_balance", float), ("average_balance", float)
+        ])
+        array["path"] = np.arange(len(self.plans))
+        array["weight"] = self.weights
+        for i, plan in enumerate(self.plans):
+            values = plan.values_array()
+            array["interest"][i] = values["interest"].sum()
+            array["minimum_balance"][i] = values["bank_balance"].min()
+            array["average_balance"][i] = values["bank_balance"].mean()
+        return array
@@ -0,0 +1,250 @@
+import os
+import time
+import logging
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+from pyomo.opt import SolverFactory, TerminationCondition
+
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+class SolverResult:
+    """
+    Outcome of solving a pyondo.matrix.LinearProgram
+
+    > x: primal solution vector; all NaN when the solver found no solution so that
+      Pyondo.values() fails the same way it does for an infeasible glpsol run
+    > status: "ok", "error", or "time_limit" if the solver stopped at its time limit;
+      x is then the solver's last iterate (if any), which need not be feasible
+    > duals: (eq duals, ub duals) for the rows of A_eq and A_ub, the change in the objective
+      per unit increase of each right-hand side; None if the solver did not report them
+    > json_repn() mirrors pyomo's SolverResults.json_repn() for the keys Pyondo reads
+    """
+
+    def __init__(self, x, status, time, message="", results=None, model=None, duals=None):
+        self.x = x
+        self.status = status
+        self.time = time
+        self.message = message
+        self.results = results
+        self.model = model
+        self.duals = duals
+
+    @property
+    def solved(self):
+        return self.status == "ok"
+
+    def json_repn(self):
+        if self.results is not None:
+            return self.results.json_repn()
+        return {
+            "Solver": [{"Status": self.status, "Message": self.message, "Time": self.time}]
+        }
+
+class SolverBackend:
+    """
+    Interface for Pyondo solver backends
+
+    > solve(lp, time_limit=None): solves a LinearProgram and returns a SolverResult;
+      time_limit is a wall-clock budget in seconds passed on to the solver
+    > MODELS: True if the backend can also solve a Pyomo ConcreteModel (Pyondo build="expression")
+    """
+    name = None
+    MODELS = False
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def solve(self, lp, time_limit=None):
+        raise NotImplementedError
+
+class GLPKBackend(SolverBackend):
+    """
+    Shells out to glpsol through Pyomo: writes an LP file, runs the subprocess and
+    parses the text solution back
+    """
+    name = "glpk"
+    MODELS = True
+
+    @classmethod
+    def available(cls):
+        """True if glpsol is found at GLPSOL_PATH"""
+        import pyomo.environ
+        executable = config("GLPSOL_PATH", default="glpsol")
+        return bool(SolverFactory("glpk", executable=executable).available(exception_flag=False))
+
+    def solve_model(self, model, time_limit=None):
+        opt = SolverFactory("glpk", executable=config("GLPSOL_PATH"))
+        if time_limit is not None:
+            # glpsol --tmlim only takes whole seconds
+            opt.options["tmlim"] = max(1, int(time_limit))
+        return opt.solve(model, symbolic_solver_labels=True)
+
+    def solve(self, lp, time_limit=None):
+        model = lp.kernel_model()
+        results = self.solve_model(model, time_limit=time_limit)
+        solver = results.json_repn()["Solver"][0]
+        return SolverResult(
+            x=lp.kernel_values(model), status="time_limit" if timed_out(results) else solver["Status"],
+            time=solver["Time"], results=results, model=model, duals=lp.kernel_duals(model)
+        )
+
+class HiGHSBackend(SolverBackend):
+    """
+    Solves the arrays in-process with the HiGHS solver behind scipy.optimize.linprog;
+    no LP file, subprocess or text parsing is involved
+    """
+    name = "highs"
+    _available = None
+
+    @classmethod
+    def available(cls):
+        """method="highs" requires scipy >= 1.5"""
+        if cls._available is None:
+            try:
+                linprog([1.], bounds=[(0, 1)], method="highs")
+                cls._available = True
+            except ValueError:
+                cls._available = False
+        return cls._available
+
+    def solve(self, lp, time_limit=None):
+        start = time.perf_counter()
+        res = linprog(
+            -lp.c, A_ub=lp.A_ub, b_ub=lp.b_ub, A_eq=lp.A_eq, b_eq=lp.b_eq,
+            bounds=(0, None), method="highs",
+            options={"time_limit": max(float(time_limit), 0.)} if time_limit is not None else None
+        )
+        elapsed = time.perf_counter() - start
+        if res.status == 0:
+            # marginals (scipy >= 1.7) are for the minimization of -c
+            duals = (-res.eqlin.marginals, -res.ineqlin.marginals) if "eqlin" in res else None
+            return SolverResult(x=res.x, status="ok", time=elapsed, message=res.message, duals=duals)
+        x = res.x if res.x is not None else np.full(lp.size, np.nan)
+        if res.status == 1:
+            # iteration or time limit
+            return SolverResult(x=x, status="time_limit", time=elapsed, message=res.message)
+        return SolverResult(x=np.full(lp.size, np.nan), status="error", time=elapsed, message=res.message)
+
+class PersistentHiGHSBackend(SolverBackend):
+    """
+    Keeps one HiGHS instance (through the optional highspy package) alive between solves.
+    Each solve passes the new arrays and, when the program has the same shape as the
+    previous one, restarts the simplex from the previous optimal basis.
+
+    > warm: True if the last solve was warm-started
+    > iterations: simplex iterations used by the last solve
+    """
+    name = "highs-persistent"
+
+    def __init__(self):
+        import highspy
+        self.highspy = highspy
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue("output_flag", False)
+        self.basis = None
+        self.shape = None
+        self.warm = False
+        self.iterations = 0
+
+    @classmethod
+    def available(cls):
+        try:
+            import highspy
+        except ImportError:
+            return False
+        return True
+
+    def _highs_lp(self, lp):
+        """Stacks the equality and inequality rows into one row-wise HighsLp with row bounds"""
+        highspy = self.highspy
+        A = sparse.vstack([lp.A_eq, lp.A_ub], format="csr")
+        model = highspy.HighsLp()
+        model.num_col_ = lp.size
+        model.num_row_ = A.shape[0]
+        model.sense_ = highspy.ObjSense.kMaximize
+        model.offset_ = lp.constant
+        model.col_cost_ = np.asarray(lp.c, dtype=float)
+        model.col_lower_ = np.zeros(lp.size)
+        model.col_upper_ = np.full(lp.size, highspy.kHighsInf)
+        model.row_lower_ = np.concatenate([lp.b_eq, np.full(lp.b_ub.shape[0], -highspy.kHighsInf)])
+        model.row_upper_ = np.concatenate([lp.b_eq, lp.b_ub])
+        model.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        model.a_matrix_.start_ = A.indptr
+        model.a_matrix_.index_ = A.indices
+        model.a_matrix_.value_ = A.data
+        return model
+
+    def solve(self, lp, time_limit=None):
+        start = time.perf_counter()
+        shape = (lp.A_eq.shape, lp.A_ub.shape)
+        self.highs.setOptionValue(
+            "time_limit", max(float(time_limit), 0.) if time_limit is not None else self.highspy.kHighsInf
+        )
+        self.highs.passModel(self._highs_lp(lp))
+        self.warm = self.basis is not None and shape == self.shape
+        if self.warm:
+            self.highs.setBasis(self.basis)
+        self.highs.run()
+        elapsed = time.perf_counter() - start
+        self.shape = shape
+        self.iterations = self.highs.getInfo().simplex_iteration_count
+
+        if self.highs.getModelStatus() == self.highspy.HighsModelStatus.kOptimal:
+            self.basis = self.highs.getBasis()
+            solution = self.highs.getSolution()
+            x = np.asarray(solution.col_value, dtype=float)
+            row_dual = np.asarray(solution.row_dual, dtype=float)
+            duals = (row_dual[:lp.A_eq.shape[0]], row_dual[lp.A_eq.shape[0]:])
+            return SolverResult(x=x, status="ok", time=elapsed, duals=duals)
+        self.basis = None
+        if self.highs.getModelStatus() == self.highspy.HighsModelStatus.kTimeLimit:
+            solution = self.highs.getSolution()
+            x = np.asarray(solution.col_value, dtype=float) if solution.value_valid else np.full(lp.size, np.nan)
+            return SolverResult(x=x, status="time_limit", time=elapsed, message="Time limit reached")
+        return SolverResult(
+            x=np.full(lp.size, np.nan), status="error", time=elapsed,
+            message=self.highs.modelStatusToString(self.highs.getModelStatus())
+        )
+
+def timed_out(results):
+    """
+    True if a SolverResult, or the pyomo SolverResults of a Pyomo model solve, stopped
+    at the solver's time limit
+    """
+    if isinstance(results, SolverResult):
+        return results.status == "time_limit"
+    return results.solver.termination_condition == TerminationCondition.maxTimeLimit
+
+BACKENDS = {backend.name: backend for backend in (GLPKBackend, HiGHSBackend, PersistentHiGHSBackend)}
+
+# the PersistentHiGHSBackend of this process, keyed by pid so a forked worker starts its own
+_PERSISTENT = {}
+
+def get_backend(name=None, shared=True):
+    """
+    Returns a solver backend instance by name; defaults to the PYONDO_SOLVER setting.
+    Falls back to GLPK if the requested backend is not available in this environment.
+    Unless shared is False, "highs-persistent" returns the same instance for every call
+    in a process, so each solve can warm-start from the basis of the previous one
+    """
+    name = name or config("PYONDO_SOLVER", default="glpk")
+    if name not in BACKENDS:
+        raise ValueError("solver must be one of {}".format(list(BACKENDS)), name)
+    backend = BACKENDS[name]
+    if backend is PersistentHiGHSBackend and not backend.available():
+        logger.warning("highspy is not installed, solving with %s without warm starts", HiGHSBackend.name)
+        backend = HiGHSBackend
+    if not backend.available():
+        logger.warning("%s is not available, solving with %s", backend.name, GLPKBackend.name)
+        backend = GLPKBackend
+    if backend is PersistentHiGHSBackend and shared:
+        if os.getpid() not in _PERSISTENT:
+            _PERSISTENT.clear()
+            _PERSISTENT[os.getpid()] = backend()
+        return _PERSISTENT[os.getpid()]
+    return backend()
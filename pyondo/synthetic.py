@@ -0,0 +1,50 @@
+"""
+Synthetic Pyondo studies, for benchmarks (pyondo.benchmarks), worker warm-up
+(pyondo.warmup) and tests
+"""
+from collections import Counter
+
+import numpy as np
+
+from .pyondo import Pyondo
+
+def synthetic_study(years, terms=Pyondo.TERMS, existing=False, seed=0):
+    """
+    Pyondo kwargs for a random but fundable study of years years with a ladder of terms
+    annual terms: contributions grow 3% a year, expenditures are lumpy and never draw
+    the reserve below twice MINIMUM_BANK_BALANCE, and rates rise with term.
+    With existing=True the condo also holds a GIC paying annual interest and maturing
+    in year min(years, 3)
+    """
+    rng = np.random.RandomState(seed)
+    periods = years * 12
+    opening_balance = 750000.
+
+    contributions = 200000. * 1.03 ** np.arange(years)
+    expenditures = np.zeros(years)
+    reserve = opening_balance
+    for year in range(years):
+        reserve += contributions[year]
+        lump = rng.uniform(0., 1.8) * contributions[year] if rng.uniform() < 0.6 else 0.
+        expenditures[year] = min(lump, max(reserve - 2 * Pyondo.MINIMUM_BANK_BALANCE, 0.))
+        reserve -= expenditures[year]
+
+    base = 0.01 + 0.005 * np.arange(terms)
+    rates = base + rng.uniform(-0.002, 0.002, (periods, terms))
+    bank_rates = 0.008 + rng.uniform(-0.002, 0.002, periods)
+
+    kwargs = {
+        "periods": periods,
+        "contributions": list(np.repeat(contributions / 12, 12)),
+        "expenditures": list(np.repeat(expenditures / 12, 12)),
+        "opening_balance": opening_balance,
+        "opening_reserve": opening_balance,
+        "rates": rates.tolist(),
+        "bank_rates": bank_rates.tolist(),
+    }
+    if existing:
+        maturity = min(years, 3) * 12
+        kwargs["existing_interest"] = Counter({period: 3000. for period in range(12, maturity + 1, 12)})
+        kwargs["existing_maturities"] = Counter({maturity: 150000.})
+        kwargs["opening_reserve"] += 150000.
+    return kwargs
@@ -0,0 +1,74 @@
+from functools import lru_cache
+from collections import defaultdict
+
+import numpy as np
+
+class TermLadder:
+    """
+    Investment terms available to Pyondo, in months, and the payments each one makes.
+
+    > months: term of each investment column, e.g. [6, 12, 18, 24, 36, 48, 60]
+    > size: number of terms (investment columns)
+    > schedule: every payment an investment makes as (offset, term, fraction, matures):
+      offset months after it is made, term the 0-based column, fraction the share of the
+      annual rate paid and matures True if the principal is repaid with it
+
+    Interest is paid every 12 months at the full annual rate; a term that is not a whole
+    number of years pays the remaining fraction of the rate with the principal, so a
+    6-month GIC pays half the rate at maturity and an 18-month GIC pays the rate after
+    12 months and half the rate at 18.
+
+    TermLadder.of(Pyondo.TERMS) accepts either a list of months or, as Pyondo has
+    always used, a number of annual terms: TermLadder.of(5) is [12, 24, 36, 48, 60]
+    """
+
+    def __init__(self, months):
+        self.months = np.asarray(months, dtype=int)
+        if (
+            self.months.ndim != 1 or self.months.size == 0 or np.any(self.months < 1)
+            or np.unique(self.months).size != self.months.size
+        ):
+            raise ValueError("Terms must be a non-empty list of distinct positive month counts", months)
+        self.size = self.months.size
+        self.longest = int(self.months.max())
+
+        schedule = []
+        for term, months in enumerate(self.months.tolist()):
+            for offset in range(12, months + 1, 12):
+                schedule.append((offset, term, 1., offset == months))
+            if months % 12:
+                schedule.append((months, term, (months % 12) / 12, True))
+        self.schedule = sorted(schedule)
+
+    @classmethod
+    def of(cls, terms):
+        """TermLadder for a number of annual terms or a list of terms in months"""
+        if isinstance(terms, (int, np.integer)):
+            return _ladder(tuple(12 * n for n in range(1, terms + 1)))
+        return _ladder(tuple(int(months) for months in terms))
+
+    @property
+    def key(self):
+        """Hashable description of the ladder, used to cache matrix layouts"""
+        return tuple(self.months.tolist())
+
+    def offsets(self):
+        """Distinct payment offsets in months, in increasing order"""
+        return sorted(set(offset for offset, term, fraction, matures in self.schedule))
+
+    def index(self, periods):
+        """
+        Lookback index of a monthly horizon: maps each (1-based period, 1-based term) to
+        the list of (1-based origin period, fraction, matures) of the investments paying
+        into it. Only non-empty entries are stored, so building it costs one step per
+        payment in the horizon
+        """
+        index = defaultdict(list)
+        for offset, term, fraction, matures in self.schedule:
+            for origin in range(1, periods - offset + 1):
+                index[origin + offset, term + 1].append((origin, fraction, matures))
+        return index
+
+@lru_cache(maxsize=None)
+def _ladder(months):
+    return TermLadder(list(months))
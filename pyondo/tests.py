@@ -1,5 +1,9 @@
 import time
 import inspect
+import numpy as np
+import fakeredis
+from unittest import skipUnless
+from unittest.mock import patch
 from operator import sub
 from datetime import datetime as dt, date
 from dateutil.relativedelta import relativedelta
@@ -22,6 +26,20 @@ from investmentplan.helpers import find_dates, find_period
 from investmentplan.converter import Converter
 
 from .pyondo import Pyondo
+from .matrix import MatrixBuilder, LAYOUTS
+from .benchmarks import compare_builds, cases, run_case, regressions
+from .synthetic import synthetic_study
+from .solvers import get_backend, BACKENDS, GLPKBackend, HiGHSBackend, PersistentHiGHSBackend
+from .parametric import ParametricPyondo
+from .grid import TimeGrid
+from .rolling import RollingPyondo
+from .cache import SolutionCache
+from .ladder import LadderPyondo, greedy_ladder
+from .flows import CashFlowPyondo, cash_flow_program
+from .terms import TermLadder
+from .portfolio import PortfolioPyondo
+from .scenario import ScenarioPyondo
+from .warmup import preload, warm_solver
 
 class PyondoInitializationTests(TestCase):
     fixtures = ["users.json", "forecasts.json"]
@@ -42,8 +60,8 @@ class PyondoInitializationTests(TestCase):
         cls.opt_keys = ["existing_interest", "existing_maturities"]
         cls.rqrd_types = {
             "existing_interest": dict, "existing_maturities": dict,
-            "periods": int, "contributions": list, "expenditures": list,
-            "rates": list, "bank_rates": list,
+            "periods": int, "contributions": (list, tuple, np.ndarray), "expenditures": (list, tuple, np.ndarray),
+            "rates": (list, tuple, np.ndarray), "bank_rates": (list, tuple, np.ndarray),
             "opening_balance": float, "opening_reserve": float
         }
         cls.output_keys = ['period', 'opening_balance', 'contributions', 'expenditures',
@@ -76,10 +94,12 @@ class PyondoInitializationTests(TestCase):
                 and attr != "CONSTANTS"):
                 if (attr == "existing_interest" or attr == "existing_maturities"):
                     self.assertEqual(getattr(self.pyondo_setup, attr), None)
+                elif attr in Pyondo.ARRAY_DIMS:
+                    self.assertTrue(np.array_equal(getattr(self.pyondo_setup, attr), self.values[attr]))
                 else:
                     self.assertEqual(getattr(self.pyondo_setup, attr), self.values[attr])
-        self.assertEqual(self.pyondo_setup._find_net_cash_flow(),
-            list(map(sub, self.values["contributions"], self.values["expenditures"])))
+        self.assertTrue(np.array_equal(self.pyondo_setup._find_net_cash_flow(),
+            list(map(sub, self.values["contributions"], self.values["expenditures"]))))
 
     def test_same_length(self):
         self.pyondo_setup = Pyondo(**self.values)
@@ -108,9 +128,37 @@ class PyondoInitializationTests(TestCase):
         for attr in dir(pyondo_setup):
             if (not attr.startswith("__") and not attr.startswith("_")
                 and attr not in method_list and attr != "CONSTANTS"):
-                self.assertEqual(getattr(pyondo_setup, attr), self.values2[attr])
-        self.assertEqual(pyondo_setup._find_net_cash_flow(),
-            list(map(sub, self.values2["contributions"], self.values2["expenditures"])))
+                if attr in Pyondo.ARRAY_DIMS:
+                    self.assertTrue(np.array_equal(getattr(pyondo_setup, attr), self.values2[attr]))
+                else:
+                    self.assertEqual(getattr(pyondo_setup, attr), self.values2[attr])
+        self.assertTrue(np.array_equal(pyondo_setup._find_net_cash_flow(),
+            list(map(sub, self.values2["contributions"], self.values2["expenditures"]))))
+
+    def test_array_inputs(self):
+        pyondo_setup = Pyondo(**self.values)
+        self.assertEqual(pyondo_setup.rates.shape, (pyondo_setup.periods, Pyondo.TERMS))
+        for key in Pyondo.ARRAY_DIMS:
+            value = getattr(pyondo_setup, key)
+            self.assertEqual(value.dtype, np.float64)
+            self.assertTrue(value.flags["C_CONTIGUOUS"])
+
+        arrays = dict(self.values, **{key: np.array(self.values[key]) for key in Pyondo.ARRAY_DIMS})
+        self.assertTrue(np.array_equal(Pyondo(**arrays).rates, pyondo_setup.rates))
+
+    def test_array_input_exceptions(self):
+        for key, value in [
+            ("rates", self.values["bank_rates"]),
+            ("contributions", [[value] for value in self.values["contributions"]]),
+            ("bank_rates", [np.nan] * self.values["periods"]),
+            ("expenditures", ["not numeric"] * self.values["periods"]),
+        ]:
+            with self.assertRaises(ValueError):
+                Pyondo(**dict(self.values, **{key: value}))
+        with self.assertRaises(ValueError):
+            Pyondo(**dict(self.values, periods=self.values["periods"] + 1))
+        with self.assertRaises(ValueError):
+            Pyondo(**dict(self.values, rates=[row[:3] for row in self.values["rates"]])).pyondo(build="matrix", solver="highs")
 
     def test_pyondo_output(self):
         pyondo_setup = Pyondo(**self.values)
@@ -129,3 +177,728 @@ class PyondoInitializationTests(TestCase):
             for k, v in dct.items():
                 self.assertTrue(k in self.output_keys)
             self.assertTrue(isinstance(dct, dict))
+
+class PyondoTestCase(TestCase):
+    """Study, bank balance and Converter kwargs shared by the Pyondo tests; existing investments unless existing_investments is False"""
+    fixtures = ["users.json"]
+    existing_investments = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.contributions = ContFactory(**cont_kwargs)
+        cls.expenditures = ExpFactory(study=cls.contributions.study, **exp_kwargs)
+        cls.account = BAFactory(condo=cls.contributions.study.condo)
+        cls.balance = ABFactory(account=cls.account)
+        if cls.existing_investments:
+            cls.invmts = InvmtsFactory(condo=cls.contributions.study.condo)
+        cls.converter = Converter(condo_id=cls.contributions.study.condo.id, study_id=cls.contributions.study.id, naive_rates=True)
+        cls.values = cls.converter.make_kwargs()
+
+class PyondoMatrixBuildTests(PyondoTestCase):
+
+    def test_matrix_dimensions(self):
+        pyondo_setup = Pyondo(**self.values)
+        lp = MatrixBuilder(pyondo_setup).build()
+        periods, terms = pyondo_setup.periods, Pyondo.TERMS
+
+        self.assertEqual(lp.size, periods * (2 * terms + 6))
+        self.assertEqual(lp.A_eq.shape, (periods * (terms + 6), lp.size))
+        self.assertEqual(lp.A_ub.shape, (periods, lp.size))
+        self.assertEqual(lp.unpack(np.zeros(lp.size))["Investments"].shape, (periods, terms))
+
+    @skipUnless(GLPKBackend.available(), "glpsol is not installed")
+    def test_matrix_build_matches_expression_build(self):
+        expression = Pyondo(**self.values)
+        expression.pyondo()
+        matrix = Pyondo(**self.values)
+        model = matrix.pyondo(build="matrix", solver="highs")
+
+        self.assertFalse(isinstance(model, ConcreteModel))
+        self.assertAlmostEqual(
+            sum(row["interest"] for row in expression.values()),
+            sum(row["interest"] for row in matrix.values()),
+            places=2
+        )
+        for row in matrix.values():
+            self.assertTrue(row["bank_balance"] >= Pyondo.MINIMUM_BANK_BALANCE - 1e-6)
+
+        lp = matrix.lp
+        x = np.concatenate([expression.solution[name].ravel() for name in MatrixBuilder.VARIABLES])
+        self.assertTrue(np.allclose(lp.A_eq @ x, lp.b_eq, atol=1e-4))
+        self.assertTrue(np.all(lp.A_ub @ x <= lp.b_ub + 1e-4))
+
+    def test_compact_formulation_matches_full(self):
+        full = Pyondo(**self.values)
+        full.pyondo(build="matrix", solver="highs")
+        compact = Pyondo(**self.values)
+        compact.pyondo(build="matrix", solver="highs", formulation="compact")
+
+        self.assertEqual(list(compact.lp.columns.keys()), MatrixBuilder.DECISIONS)
+        self.assertEqual(compact.lp.A_eq.shape[0], compact.periods)
+        self.assertEqual(set(compact.solution.keys()), set(MatrixBuilder.VARIABLES.keys()))
+        for full_row, compact_row in zip(full.values(), compact.values()):
+            self.assertEqual(full_row.keys(), compact_row.keys())
+        self.assertAlmostEqual(
+            sum(row["interest"] for row in full.values()),
+            sum(row["interest"] for row in compact.values()),
+            places=2
+        )
+
+        lp = full.lp
+        x = np.concatenate([compact.solution[name].ravel() for name in MatrixBuilder.VARIABLES])
+        self.assertTrue(np.allclose(lp.A_eq @ x, lp.b_eq, atol=1e-4))
+        self.assertTrue(np.all(lp.A_ub @ x <= lp.b_ub + 1e-4))
+        self.assertTrue(np.all(x >= -1e-6))
+
+    def test_compact_formulation_rejects_negative_rates(self):
+        values = dict(self.values)
+        values["bank_rates"] = [-0.01 for rate in self.values["bank_rates"]]
+        with self.assertRaises(ValueError):
+            MatrixBuilder(Pyondo(**values), formulation="compact").build()
+        with self.assertRaises(ValueError):
+            Pyondo(**self.values).pyondo(build="expression", formulation="compact")
+
+    def test_compare_builds(self):
+        times = compare_builds(repeat=1, **self.values)
+        for build in Pyondo.BUILDS:
+            self.assertTrue(times[build] > 0)
+
+    def test_unknown_build(self):
+        with self.assertRaises(ValueError):
+            Pyondo(**self.values).pyondo(build="something else")
+
+    def test_values_array_matches_values(self):
+        invmt_plan = Pyondo(**self.values)
+        invmt_plan.pyondo(build="matrix", solver="highs")
+        array = invmt_plan.values_array()
+        values = invmt_plan.values()
+
+        self.assertEqual(list(array.dtype.names), list(values[0].keys()))
+        self.assertEqual(array.shape, (invmt_plan.periods, ))
+        self.assertEqual(array["period"].dtype, np.dtype(int))
+        self.assertTrue(np.allclose(array["opening_balance"][1:], array["closing_balance"][:-1]))
+        self.assertAlmostEqual(array["closing_balance"][-1], values[-1]["closing_balance"], places=4)
+
+        frame = invmt_plan.values_frame()
+        self.assertEqual(list(frame.columns), invmt_plan.value_fields())
+        self.assertAlmostEqual(frame.loc[1, "bank_balance"], values[0]["bank_balance"])
+
+    def test_values_array_unsolved_raises_type_error(self):
+        invmt_plan = Pyondo(**self.values)
+        invmt_plan.pyondo(build="matrix", solver="highs")
+        invmt_plan.solution["Balance"][3] = np.nan
+        with self.assertRaisesMessage(TypeError, Pyondo.UNSOLVED):
+            invmt_plan.values_array()
+
+class PyondoSolverBackendTests(PyondoTestCase):
+    existing_investments = False
+
+    def test_get_backend(self):
+        self.assertTrue(isinstance(get_backend("glpk"), GLPKBackend))
+        self.assertTrue(isinstance(get_backend("highs"), (HiGHSBackend, GLPKBackend)))
+        with self.assertRaises(ValueError):
+            get_backend("cplex")
+
+    @skipUnless(PersistentHiGHSBackend.available(), "highspy is not installed")
+    def test_persistent_backend_is_shared(self):
+        backend = get_backend("highs-persistent")
+        self.assertIs(get_backend("highs-persistent"), backend)
+        self.assertIsNot(get_backend("highs-persistent", shared=False), backend)
+        for i in range(2):
+            Pyondo(**self.values).pyondo(solver="highs-persistent")
+        self.assertTrue(backend.warm)
+
+    @skipUnless(GLPKBackend.available(), "glpsol is not installed")
+    def test_highs_matches_glpk(self):
+        glpk = Pyondo(**self.values)
+        glpk.pyondo(solver="glpk")
+        highs = Pyondo(**self.values)
+        highs.pyondo(solver="highs")
+
+        glpk_output = glpk.values()
+        highs_output = highs.values()
+        self.assertEqual(len(glpk_output), len(highs_output))
+        self.assertEqual(glpk_output[0].keys(), highs_output[0].keys())
+        self.assertAlmostEqual(
+            sum(row["interest"] for row in glpk_output),
+            sum(row["interest"] for row in highs_output),
+            places=2
+        )
+        self.assertTrue(isinstance(glpk.result_time(), float))
+        self.assertTrue(isinstance(highs.result_time(), float))
+
+    def test_expression_build_requires_model_solver(self):
+        if HiGHSBackend.available():
+            with self.assertRaises(ValueError):
+                Pyondo(**self.values).pyondo(build="expression", solver="highs")
+
+    def test_insufficient_funds_raises_type_error(self):
+        values = dict(self.values)
+        values["opening_balance"] = 0.
+        values["contributions"] = [0. for cont in self.values["contributions"]]
+        for solver in ("glpk", "highs"):
+            if not BACKENDS[solver].available():
+                continue
+            invmt_plan = Pyondo(**values)
+            invmt_plan.pyondo(solver=solver)
+            with self.assertRaises(TypeError):
+                invmt_plan.values()
+
+class PyondoSensitivityTests(PyondoTestCase):
+
+    def test_marginal_values(self):
+        invmt_plan = Pyondo(**self.values)
+        invmt_plan.pyondo(build="matrix", solver="highs-persistent")
+        marginal = invmt_plan.marginal_values()
+        self.assertEqual(marginal.shape, (invmt_plan.periods, ))
+        self.assertEqual(list(marginal["period"]), list(range(1, invmt_plan.periods + 1)))
+        self.assertTrue((marginal["cash"] >= 0).all())
+        self.assertTrue((marginal["minimum_balance"] >= -1e-9).all())
+        self.assertTrue((marginal["term_1"] <= 0).all())
+
+    def test_estimate_matches_resolve(self):
+        invmt_plan = Pyondo(**self.values)
+        invmt_plan.pyondo(build="matrix", solver="highs-persistent")
+        contributions = list(self.values["contributions"])
+        contributions[24] += 1000.
+
+        resolved = Pyondo(**dict(self.values, contributions=contributions))
+        resolved.pyondo(build="matrix", solver="highs-persistent")
+        change = resolved.values_array()["interest"].sum() - invmt_plan.values_array()["interest"].sum()
+        self.assertAlmostEqual(invmt_plan.estimate(contributions=contributions), change, places=2)
+        self.assertAlmostEqual(
+            invmt_plan.estimate(contributions=contributions),
+            1000. * invmt_plan.marginal_values()["cash"][24],
+            places=2
+        )
+
+    @skipUnless(GLPKBackend.available(), "glpsol is not installed")
+    def test_marginal_values_require_duals(self):
+        invmt_plan = Pyondo(**self.values)
+        invmt_plan.pyondo(build="expression")
+        with self.assertRaises(ValueError):
+            invmt_plan.marginal_values()
+
+class ParametricPyondoTests(PyondoTestCase):
+    existing_investments = False
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.new_rates = [[rate + 0.005 for rate in period] for period in cls.values["rates"]]
+        cls.new_bank_rates = [rate / 2 for rate in cls.values["bank_rates"]]
+
+    def test_update_matches_fresh_solve(self):
+        invmt_plan = ParametricPyondo(**self.values)
+        invmt_plan.pyondo()
+        self.assertFalse(invmt_plan.warm)
+
+        invmt_plan.update(rates=self.new_rates, bank_rates=self.new_bank_rates)
+        invmt_plan.pyondo()
+        self.assertEqual(invmt_plan.solves, 2)
+
+        values = dict(self.values)
+        values["rates"] = self.new_rates
+        values["bank_rates"] = self.new_bank_rates
+        fresh = Pyondo(**values)
+        fresh.pyondo(build="matrix", solver="highs")
+
+        self.assertAlmostEqual(
+            sum(row["interest"] for row in invmt_plan.values()),
+            sum(row["interest"] for row in fresh.values()),
+            places=2
+        )
+
+    def test_status_and_time_limit(self):
+        invmt_plan = ParametricPyondo(**self.values)
+        invmt_plan.pyondo(time_limit=60.)
+        self.assertEqual(invmt_plan.status, "optimal")
+
+        invmt_plan.pyondo(time_limit=0.)
+        self.assertIn(invmt_plan.status, ["optimal", "time_limit", "heuristic"])
+        self.assertTrue(invmt_plan.feasible(invmt_plan.solution))
+
+        invmt_plan.update(opening_balance=0., contributions=[0.] * self.values["periods"])
+        invmt_plan.pyondo()
+        self.assertEqual(invmt_plan.status, "infeasible")
+
+    def test_update_validates_inputs(self):
+        invmt_plan = ParametricPyondo(**self.values)
+        with self.assertRaises(ValueError):
+            invmt_plan.update(periods=self.values["periods"] + 12)
+        with self.assertRaises(ValueError):
+            invmt_plan.update(contributions=self.values["contributions"][:-1])
+        with self.assertRaises(IndexError):
+            invmt_plan.update(new_key=1)
+
+    def test_solve_many_matches_individual_solves(self):
+        scenarios = [
+            {"rates": self.new_rates},
+            {},
+            {"rates": self.new_rates, "bank_rates": self.new_bank_rates},
+            {"opening_balance": 0., "contributions": [0.] * self.values["periods"]},
+        ]
+        expected = []
+        for scenario in scenarios[:-1]:
+            invmt_plan = Pyondo(**dict(self.values, **scenario))
+            invmt_plan.pyondo(build="matrix", solver="highs")
+            expected.append(sum(row["interest"] for row in invmt_plan.values()))
+
+        for cls, workers in [(Pyondo, 2), (ParametricPyondo, 1), (ParametricPyondo, 2)]:
+            options = {"build": "matrix", "solver": "highs"} if cls is Pyondo else {}
+            results = cls.solve_many(scenarios, workers=workers, base=self.values, **options)
+            self.assertEqual([result["status"] for result in results], ["ok", "ok", "ok", "insufficient"])
+            self.assertIsNone(results[-1]["array"])
+            for result, interest in zip(results, expected):
+                self.assertAlmostEqual(sum(row["interest"] for row in result["values"]), interest, places=2)
+                self.assertGreater(result["elapsed"], 0.)
+
+class TermLadderTests(PyondoTestCase):
+
+    class MonthlyTermsPyondo(Pyondo):
+        TERMS = [6, 12, 18, 24, 36, 48, 60]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # one rate column per term; 6 and 18 month GICs priced between their neighbours
+        rates = np.asarray(cls.values["rates"])
+        cls.values["rates"] = np.column_stack([
+            rates[:, 0] - 0.002, rates[:, 0], (rates[:, 0] + rates[:, 1]) / 2, rates[:, 1:]
+        ]).tolist()
+
+    def test_schedule(self):
+        self.assertEqual(list(TermLadder.of(5).months), [12, 24, 36, 48, 60])
+        self.assertIs(TermLadder.of(5), TermLadder.of([12, 24, 36, 48, 60]))
+
+        ladder = TermLadder.of([6, 18, 24])
+        self.assertEqual(ladder.schedule, [
+            (6, 0, 0.5, True), (12, 1, 1., False), (12, 2, 1., False), (18, 1, 0.5, True), (24, 2, 1., True)
+        ])
+        index = ladder.index(30)
+        self.assertEqual(index[19, 2], [(7, 1., False), (1, 0.5, True)])
+        self.assertNotIn((5, 1), index)
+
+        with self.assertRaises(ValueError):
+            TermLadder([12, 12])
+
+    @skipUnless(GLPKBackend.available(), "glpsol is not installed")
+    def test_monthly_terms_match_across_builds(self):
+        expression = self.MonthlyTermsPyondo(**self.values)
+        expression.pyondo(build="expression")
+        matrix = self.MonthlyTermsPyondo(**self.values)
+        matrix.pyondo(build="matrix", solver="highs")
+
+        self.assertEqual(matrix.lp.A_eq.shape[1], (2 * 7 + 6) * matrix.periods)
+        self.assertAlmostEqual(
+            sum(row["interest"] for row in expression.values()),
+            sum(row["interest"] for row in matrix.values()),
+            places=2
+        )
+        self.assertIn("term_7", matrix.values()[0])
+        self.assertTrue(matrix.solution["Investments"].shape == (matrix.periods, 7))
+
+class TimeGridTests(PyondoTestCase):
+
+    def test_multiresolution_grid(self):
+        grid = TimeGrid.multiresolution(125, monthly_years=5, coarse=12)
+        self.assertEqual(grid.months, 125)
+        self.assertEqual(list(grid.lengths[58:]), [1, 1, 12, 12, 12, 12, 12, 5])
+        self.assertEqual(list(grid.period_of([0, 60, 61, 72])), [0, 60, 61, 61])
+        self.assertEqual(list(grid.aggregate(np.ones(125))[59:]), [1, 1, 12, 12, 12, 12, 12])
+        self.assertTrue(TimeGrid.monthly(12).is_monthly)
+        self.assertEqual(list(TimeGrid([2, 2]).dips([0, -1, 3, -5])), [-1, -5])
+
+        with self.assertRaises(ValueError):
+            TimeGrid([1, 0, 3])
+        with self.assertRaises(ValueError):
+            TimeGrid.multiresolution(125, monthly_years=5, coarse=5)
+        with self.assertRaises(ValueError):
+            TimeGrid.multiresolution(125, monthly_years=0)
+
+    def test_monthly_grid_matches_default(self):
+        default = Pyondo(**self.values)
+        default.pyondo(build="matrix", solver="highs")
+        monthly = Pyondo(**self.values)
+        monthly.pyondo(build="matrix", solver="highs", grid=TimeGrid.monthly(monthly.periods))
+
+        self.assertEqual(default.values(), monthly.values())
+
+    def test_coarse_grid_solve(self):
+        invmt_plan = Pyondo(**self.values)
+        grid = TimeGrid.multiresolution(invmt_plan.periods, monthly_years=1, coarse=12)
+        for formulation in MatrixBuilder.FORMULATIONS:
+            invmt_plan.pyondo(build="matrix", solver="highs", formulation=formulation, grid=grid)
+            self.assertEqual(invmt_plan.lp.A_ub.shape[0], grid.size)
+
+            values = invmt_plan.values()
+            self.assertEqual(len(values), invmt_plan.periods)
+            for row in values:
+                self.assertTrue(row["bank_balance"] >= Pyondo.MINIMUM_BANK_BALANCE - 1e-4)
+
+        with self.assertRaises(ValueError):
+            invmt_plan.pyondo(build="expression", grid=grid)
+
+    def test_coarse_grid_balance_with_large_first_expenditure(self):
+        expenditures = np.array(self.values["expenditures"], dtype=float)
+        expenditures[0] += 200000.
+        invmt_plan = Pyondo(**dict(self.values, expenditures=expenditures))
+        grid = TimeGrid.multiresolution(invmt_plan.periods, monthly_years=1, coarse=12)
+        for formulation in MatrixBuilder.FORMULATIONS:
+            invmt_plan.pyondo(build="matrix", solver="highs", formulation=formulation, grid=grid)
+            self.assertEqual(invmt_plan.status, "optimal")
+            balances = invmt_plan.values_array()["bank_balance"]
+            self.assertTrue((balances >= Pyondo.MINIMUM_BANK_BALANCE - 1e-4).all())
+
+class RollingPyondoTests(PyondoTestCase):
+
+    def test_rolling_plan_is_feasible(self):
+        invmt_plan = RollingPyondo(**self.values)
+        self.assertIsNone(invmt_plan.pyondo(commit=24, lookahead=84, solver="highs"))
+        self.assertTrue(len(invmt_plan.windows) > 1)
+        self.assertTrue(invmt_plan.results.solved)
+        self.assertTrue(isinstance(invmt_plan.result_time(), float))
+
+        values = invmt_plan.values()
+        self.assertEqual(len(values), invmt_plan.periods)
+        for row in values:
+            self.assertTrue(row["bank_balance"] >= Pyondo.MINIMUM_BANK_BALANCE - 1e-2)
+
+        lp = MatrixBuilder(invmt_plan).build()
+        x = np.concatenate([invmt_plan.solution[name].ravel() for name in MatrixBuilder.VARIABLES])
+        self.assertTrue(np.allclose(lp.A_eq @ x, lp.b_eq, atol=1e-4))
+
+    def test_single_window_matches_monolithic(self):
+        invmt_plan = RollingPyondo(**self.values)
+        report = invmt_plan.gap_report(commit=12, lookahead=invmt_plan.periods, solver="highs")
+        self.assertEqual(report["windows"], 1)
+        self.assertAlmostEqual(report["gap"], 0, places=2)
+
+    def test_gap_report(self):
+        report = RollingPyondo(**self.values).gap_report(solver="highs")
+        self.assertTrue(report["windows"] > 1)
+        self.assertTrue(report["gap"] >= -1e-2)
+        self.assertTrue(0 <= report["relative_gap"] < 0.1)
+
+    def test_default_lookahead_covers_longest_term(self):
+        invmt_plan = RollingPyondo(**synthetic_study(years=20, terms=10))
+        invmt_plan.TERMS = 10
+        invmt_plan.pyondo(solver="highs")
+        self.assertTrue(len(invmt_plan.windows) > 1)
+        self.assertEqual(invmt_plan.status, "optimal")
+
+    def test_window_validation(self):
+        invmt_plan = RollingPyondo(**self.values)
+        with self.assertRaises(ValueError):
+            invmt_plan.pyondo(commit=6, lookahead=120)
+        with self.assertRaises(ValueError):
+            invmt_plan.pyondo(commit=60, lookahead=90)
+
+class LadderPyondoTests(PyondoTestCase):
+
+    def test_ladder_plan_is_feasible(self):
+        invmt_plan = LadderPyondo(**self.values)
+        invmt_plan.pyondo()
+        self.assertEqual(invmt_plan.status, "heuristic")
+        self.assertTrue(invmt_plan.feasible(invmt_plan.solution))
+        self.assertTrue(invmt_plan.solution["Investments"].sum() > 0)
+
+        optimal = Pyondo(**self.values)
+        optimal.pyondo(build="matrix", solver="highs")
+        self.assertEqual(optimal.status, "optimal")
+        self.assertEqual(list(invmt_plan.values()[0]), list(optimal.values()[0]))
+        self.assertTrue(
+            invmt_plan.values_array()["interest"].sum() <= optimal.values_array()["interest"].sum() + 1e-4
+        )
+
+        lp = MatrixBuilder(invmt_plan).build()
+        x = np.concatenate([invmt_plan.solution[name].ravel() for name in MatrixBuilder.VARIABLES])
+        self.assertTrue(np.allclose(lp.A_eq @ x, lp.b_eq, atol=1e-4))
+
+    def test_ladder_insufficient_funds_raises_type_error(self):
+        values = dict(self.values, opening_balance=0., contributions=[0.] * self.values["periods"])
+        invmt_plan = LadderPyondo(**values)
+        invmt_plan.pyondo()
+        self.assertEqual(invmt_plan.status, "infeasible")
+        with self.assertRaisesMessage(TypeError, Pyondo.UNSOLVED):
+            invmt_plan.values()
+
+    def test_time_limit_falls_back_to_feasible_plan(self):
+        invmt_plan = Pyondo(**self.values)
+        invmt_plan.pyondo(build="matrix", solver="highs", time_limit=0.)
+        self.assertIn(invmt_plan.status, ["time_limit", "heuristic"])
+        self.assertIn("fallback", invmt_plan.timings)
+        self.assertTrue(invmt_plan.feasible(invmt_plan.solution))
+        self.assertEqual(len(invmt_plan.values()), invmt_plan.periods)
+
+        ladder = Pyondo(**self.values)
+        ladder.solution = ladder.roll_forward(greedy_ladder(ladder))
+        self.assertTrue(
+            invmt_plan.values_array()["interest"].sum() >= ladder.values_array()["interest"].sum() - 1e-4
+        )
+
+class CashFlowPyondoTests(PyondoTestCase):
+
+    class MonthlyTermsPyondo(CashFlowPyondo):
+        TERMS = [6, 12, 18, 24, 36, 48, 60]
+
+    def test_matches_linear_program(self):
+        invmt_plan = CashFlowPyondo(**self.values)
+        invmt_plan.pyondo()
+        self.assertEqual(invmt_plan.status, "optimal")
+        self.assertIsNone(invmt_plan.lp)
+        self.assertTrue(invmt_plan.feasible(invmt_plan.solution))
+
+        optimal = Pyondo(**self.values)
+        optimal.pyondo(build="matrix", solver="highs", formulation="compact")
+        interest = optimal.solution["TotalInterest"].sum()
+        self.assertAlmostEqual(invmt_plan.solution["TotalInterest"].sum() / interest, 1., places=6)
+
+        A, b, w, constant = cash_flow_program(invmt_plan)
+        self.assertEqual(A.shape, (invmt_plan.periods, invmt_plan.periods * (invmt_plan.term_ladder.size + 1)))
+        self.assertAlmostEqual((w @ invmt_plan.results.x + constant) / interest, 1., places=6)
+
+    def test_monthly_terms_match_linear_program(self):
+        rates = np.asarray(self.values["rates"])
+        values = dict(self.values, rates=np.column_stack([
+            rates[:, 0] - 0.002, rates[:, 0], (rates[:, 0] + rates[:, 1]) / 2, rates[:, 1:]
+        ]))
+        invmt_plan = self.MonthlyTermsPyondo(**values)
+        invmt_plan.pyondo()
+        self.assertEqual(invmt_plan.status, "optimal")
+
+        optimal = TermLadderTests.MonthlyTermsPyondo(**values)
+        optimal.pyondo(build="matrix", solver="highs")
+        self.assertAlmostEqual(
+            invmt_plan.solution["TotalInterest"].sum() / optimal.solution["TotalInterest"].sum(), 1., places=6
+        )
+
+    def test_insufficient_funds_falls_back_to_linear_program(self):
+        values = dict(self.values, opening_balance=0., contributions=[0.] * self.values["periods"])
+        invmt_plan = CashFlowPyondo(**values)
+        invmt_plan.pyondo(max_iterations=20, build="matrix", solver="highs")
+        self.assertEqual(invmt_plan.status, "infeasible")
+        with self.assertRaisesMessage(TypeError, Pyondo.UNSOLVED):
+            invmt_plan.values()
+
+class PortfolioPyondoTests(PyondoTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.kwargs_list = [
+            cls.values, dict(cls.values, opening_balance=cls.values["opening_balance"] + 500000)
+        ]
+        cls.gics = [
+            {"issuer": issuer, "months": 12 * term, "rate": rate + 0.002 * term, "cap": 100000.}
+            for issuer, rate in [("Bank A", 0.03), ("Bank B", 0.02), ("Bank C", 0.01)]
+            for term in range(1, 6)
+        ]
+
+    def test_allocations_respect_limits(self):
+        portfolio = PortfolioPyondo(
+            self.kwargs_list, self.gics, capacity={"Bank A": 150000.}, held=[{"Bank B": 40000.}, {}]
+        )
+        portfolio.pyondo()
+        self.assertTrue(portfolio.results.solved)
+        self.assertEqual(len(portfolio.allocations), 2)
+
+        for plan, selected in zip(portfolio.plans, portfolio.allocations):
+            self.assertEqual(plan.status, "optimal")
+            self.assertTrue(plan.feasible(plan.solution))
+            self.assertEqual(len(plan.values()), plan.periods)
+            for term in range(plan.term_ladder.size):
+                allocated = sum(invmts.get("term_{}".format(term + 1), 0) for invmts in selected.values())
+                self.assertAlmostEqual(allocated, plan.solution["Investments"][0, term], places=2)
+            for issuer, invmts in selected.items():
+                self.assertTrue(sum(invmts.values()) <= 100000. + 1e-4)
+        self.assertTrue(sum(portfolio.allocations[0]["Bank B"].values()) <= 60000. + 1e-4)
+        self.assertTrue(
+            sum(sum(selected["Bank A"].values()) for selected in portfolio.allocations) <= 150000. + 1e-4
+        )
+
+    def test_single_condo_matches_pyondo_with_ample_limits(self):
+        gics = [
+            {"issuer": "Bank A", "months": 12 * term, "rate": 0., "cap": 1e12} for term in range(1, 6)
+        ]
+        portfolio = PortfolioPyondo([self.values], gics)
+        lp = portfolio.build()
+        # price the GICs at the forecast, so allocating them changes nothing
+        lp.c[portfolio.offsets[-1]:] = 0.
+        results = get_backend("highs").solve(lp)
+
+        invmt_plan = Pyondo(**self.values)
+        invmt_plan.pyondo(build="matrix", solver="highs", formulation="compact")
+        self.assertAlmostEqual(
+            lp.objective(results.x), invmt_plan.lp.objective(invmt_plan.results.x), places=2
+        )
+
+    def test_held_validation(self):
+        with self.assertRaises(ValueError):
+            PortfolioPyondo(self.kwargs_list, self.gics, held=[{}])
+
+class ScenarioPyondoTests(PyondoTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rates = np.array(cls.values["rates"])
+        cls.paths = [
+            {"rates": np.maximum(rates + shift, 0.), "bank_rates": np.maximum(np.array(cls.values["bank_rates"]) + shift, 0.)}
+            for shift in [-0.005, 0., 0.005]
+        ]
+
+    def test_first_month_is_shared(self):
+        for objective in ScenarioPyondo.OBJECTIVES:
+            robust = ScenarioPyondo(self.values, self.paths, objective=objective)
+            robust.pyondo()
+            self.assertTrue(robust.results.solved)
+            first = np.array([plan.solution["Investments"][0] for plan in robust.plans])
+            self.assertTrue(np.allclose(first, first[0], atol=1e-4))
+            self.assertEqual(list(robust.first_month().values()), list(first[0]))
+            for plan in robust.plans:
+                self.assertTrue(plan.feasible(plan.solution))
+
+            statistics = robust.statistics()
+            self.assertEqual(len(statistics), len(self.paths))
+            for path, record in zip(self.paths, statistics):
+                independent = Pyondo(**dict(self.values, **path))
+                independent.pyondo(build="matrix", solver="highs")
+                self.assertTrue(record["interest"] <= independent.values_array()["interest"].sum() + 1e-2)
+                self.assertTrue(record["minimum_balance"] >= Pyondo.MINIMUM_BANK_BALANCE - 1e-2)
+
+    def test_single_path_matches_pyondo(self):
+        robust = ScenarioPyondo(self.values, self.paths[1:2])
+        robust.pyondo()
+        invmt_plan = Pyondo(**dict(self.values, **self.paths[1]))
+        invmt_plan.pyondo(build="matrix", solver="highs")
+        self.assertAlmostEqual(
+            robust.statistics()["interest"][0], invmt_plan.values_array()["interest"].sum(), places=2
+        )
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            ScenarioPyondo(self.values, [])
+        with self.assertRaises(ValueError):
+            ScenarioPyondo(self.values, self.paths, objective="best_case")
+        with self.assertRaises(ValueError):
+            ScenarioPyondo(self.values, self.paths, weights=[1., 1.])
+
+class SolutionCacheTests(PyondoTestCase):
+
+    def setUp(self):
+        self.cache = SolutionCache(client=fakeredis.FakeRedis(), max_entries=2)
+
+    def test_key_is_stable(self):
+        key = SolutionCache.key(Pyondo(**self.values))
+        self.assertEqual(key, SolutionCache.key(Pyondo(**self.values)))
+
+        values = dict(self.values)
+        values["bank_rates"] = [rate + 0.0001 for rate in self.values["bank_rates"]]
+        self.assertNotEqual(key, SolutionCache.key(Pyondo(**values)))
+        self.assertNotEqual(key, SolutionCache.key(RollingPyondo(**self.values)))
+        self.assertNotEqual(key, SolutionCache.key(Pyondo(**self.values), build="matrix"))
+        self.assertEqual(key, SolutionCache.solve_key(Pyondo(**self.values), time_limit=1.))
+
+    def test_only_optimal_plans_are_stored(self):
+        array = np.zeros(1, dtype=[("period", int), ("interest", float)])
+        key = self.cache.key(Pyondo(**self.values))
+        for status in ["time_limit", "heuristic", "infeasible"]:
+            self.cache.store(key, array, 0., status)
+            self.assertIsNone(self.cache.get(key))
+        self.cache.store(key, array, 0., "optimal")
+        self.assertIsNotNone(self.cache.get(key))
+
+    def test_solve_returns_cached_values(self):
+        solved = self.cache.solve(Pyondo(**self.values), solver="highs")
+        self.assertFalse(solved["cached"])
+
+        invmt_plan = Pyondo(**self.values)
+        cached = self.cache.solve(invmt_plan, solver="highs")
+        self.assertTrue(cached["cached"])
+        self.assertEqual(cached["values"], solved["values"])
+        self.assertTrue(np.array_equal(cached["array"], solved["array"]))
+        self.assertEqual(cached["time"], solved["time"])
+        self.assertFalse(hasattr(invmt_plan, "solution"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        array = np.zeros(2, dtype=[("period", int), ("interest", float)])
+        array["period"] = [1, 2]
+        array["interest"] = [0.5, 1.5]
+
+        keys = []
+        for minimum_bank_balance in [100000, 200000, 300000]:
+            invmt_plan = Pyondo(**self.values)
+            invmt_plan.MINIMUM_BANK_BALANCE = minimum_bank_balance
+            keys.append(self.cache.key(invmt_plan))
+            self.cache.set(keys[-1], array, 0.)
+
+        self.assertIsNone(self.cache.get(keys[0]))
+        cached = self.cache.get(keys[2])["array"]
+        self.assertEqual(cached.dtype, array.dtype)
+        self.assertTrue(np.array_equal(cached, array))
+
+    def test_solve_many_reads_and_fills_cache(self):
+        self.cache.solve(Pyondo(**self.values), solver="highs")
+        scenarios = [{}, {"bank_rates": [rate / 2 for rate in self.values["bank_rates"]]}]
+        results = self.cache.solve_many(Pyondo, scenarios, workers=1, base=self.values, solver="highs")
+        self.assertEqual([result["cached"] for result in results], [True, False])
+
+        cached = self.cache.solve_many(Pyondo, scenarios, workers=1, base=self.values, solver="highs")
+        self.assertEqual([result["cached"] for result in cached], [True, True])
+        self.assertEqual(cached[1]["values"], results[1]["values"])
+
+class PyondoBenchmarkTests(TestCase):
+
+    def test_synthetic_study(self):
+        for existing in [False, True]:
+            kwargs = synthetic_study(years=3, terms=7, existing=existing)
+            invmt_plan = Pyondo(**kwargs)
+            self.assertEqual(invmt_plan.periods, 36)
+            self.assertEqual(len(kwargs["rates"][0]), 7)
+            self.assertEqual(bool(invmt_plan.existing_maturities), existing)
+        self.assertEqual(synthetic_study(years=2, seed=1), synthetic_study(years=2, seed=1))
+
+    @skipUnless(GLPKBackend.available(), "glpsol is not installed")
+    def test_run_case(self):
+        case = cases(years=[2], terms=[3], existing=[True], variants=["matrix-glpk"])[0]
+        record = run_case(case)
+        self.assertEqual(record["status"], "ok")
+        self.assertEqual(record["periods"], 24)
+        for key in ["build_time", "solve_time", "peak_rss_mb", "objective"]:
+            self.assertTrue(record[key] > 0)
+
+    def test_regressions(self):
+        baseline = [{
+            "years": 1, "terms": 3, "existing": False, "variant": "matrix-glpk", "seed": 0,
+            "build_time": 0.1, "solve_time": 0.1, "objective": 100., "status": "ok"
+        }]
+        self.assertEqual(regressions(baseline, baseline), [])
+        slower = [dict(baseline[0], solve_time=0.5)]
+        self.assertEqual(len(regressions(slower, baseline, tolerance=1.5)), 1)
+        changed = [dict(baseline[0], objective=101.)]
+        self.assertEqual(len(regressions(changed, baseline)), 1)
+
+class WarmupTests(TestCase):
+
+    def test_preload_caches_templates(self):
+        timings = preload(modules=["investmentplan.converter"], years=[2])
+        self.assertEqual(list(timings.keys()), ["imports", "templates"])
+        for formulation in MatrixBuilder.FORMULATIONS:
+            layout = (formulation, TimeGrid.monthly(24).key, TermLadder.of(Pyondo.TERMS).key)
+            self.assertIn(layout + ("eq", ), LAYOUTS)
+            self.assertIn(layout + ("ub", ), LAYOUTS)
+
+    def test_layouts_are_bounded(self):
+        with patch("pyondo.matrix.MAX_LAYOUTS", 4):
+            preload(years=[1, 2])
+            self.assertEqual(len(LAYOUTS), 4)
+            for formulation in MatrixBuilder.FORMULATIONS:
+                layout = (formulation, TimeGrid.monthly(24).key, TermLadder.of(Pyondo.TERMS).key)
+                self.assertIn(layout + ("eq", ), LAYOUTS)
+                self.assertNotIn((formulation, TimeGrid.monthly(12).key) + layout[2:] + ("eq", ), LAYOUTS)
+
+    def test_warm_solver(self):
+        seconds = warm_solver("highs")
+        self.assertTrue(seconds is None or seconds > 0)
+
@@ -0,0 +1,70 @@
+"""
+Preloading for long-lived worker processes, so the first Pyondo task after a restart
+runs as fast as the ones after it.
+
+> preload() imports Pyomo, pyondo and any other modules the tasks import in their body,
+  and builds template programs for common horizons so their sparsity layouts are in
+  pyondo.matrix.LAYOUTS. It starts no solver and opens no connections, so it is safe to
+  run in a Celery parent process before the pool forks
+> warm_solver() solves a one-year study with the configured backend in the current
+  process: glpsol is spawned once (loading it from disk) and in-process backends load
+  their libraries; run it in each pool process
+
+See robocondo.celeryconf for the worker hooks and the PYONDO_WARMUP settings
+"""
+import time
+import importlib
+from collections import OrderedDict
+
+PYONDO_MODULES = [
+    "pyomo.environ", "pyondo.pyondo", "pyondo.matrix", "pyondo.solvers", "pyondo.cache",
+    "pyondo.rolling", "pyondo.ladder", "pyondo.parametric",
+]
+
+def preload(modules=(), years=(), terms=None):
+    """
+    Imports PYONDO_MODULES and modules, then builds the full and compact programs of a
+    synthetic study of each number of years, caching their layouts
+
+    PARAMETERS:
+    > modules: names of further modules to import, e.g. the Django apps the tasks use
+    > years: study lengths in years; a template matches studies with exactly
+    12 * years months left to plan
+    > terms: Pyondo.TERMS of the templates; defaults to Pyondo.TERMS
+
+    RETURNS:
+    > OrderedDict of seconds spent on imports and on templates
+    """
+    timings = OrderedDict()
+    start = time.perf_counter()
+    for name in PYONDO_MODULES + list(modules):
+        importlib.import_module(name)
+    timings["imports"] = time.perf_counter() - start
+
+    from .pyondo import Pyondo
+    from .matrix import MatrixBuilder
+    from .synthetic import synthetic_study
+
+    start = time.perf_counter()
+    for length in years:
+        invmt_plan = Pyondo(**synthetic_study(length, terms=terms or Pyondo.TERMS))
+        for formulation in MatrixBuilder.FORMULATIONS:
+            MatrixBuilder(invmt_plan, formulation=formulation).build()
+    timings["templates"] = time.perf_counter() - start
+    return timings
+
+def warm_solver(solver=None):
+    """
+    Solves a one-year synthetic study with get_backend(solver); returns the seconds it
+    took, or None if the backend is not available here (e.g. no glpsol)
+    """
+    from .pyondo import Pyondo
+    from .solvers import get_backend
+    from .synthetic import synthetic_study
+
+    backend = get_backend(solver)
+    if not backend.available():
+        return None
+    start = time.perf_counter()
+    Pyondo(**synthetic_study(1)).pyondo(build="matrix", solver=backend.name)
+    return time.perf_counter() - start
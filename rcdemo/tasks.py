@@ -1,7 +1,8 @@
 import time
 from decimal import Decimal
 
-from celery import shared_task
+from celery import shared_task, states
+from celery.utils import uuid
 
 from robocondo.celeryconf import app
 
@@ -14,11 +15,45 @@ def rcdemo_task(self, **conv_kwargs):
     from rcdemo.demo_converter import DemoConverter
     from investmentplan.converter import Converter
     from pyondo.pyondo import Pyondo
+    from pyondo.cache import SolutionCache
 
     converter = DemoConverter(**conv_kwargs)
     pyondo_kwargs = converter.make_kwargs()
     invmt_plan = Pyondo(**pyondo_kwargs)
-    model = invmt_plan.pyondo()
-    forecast = invmt_plan.values()
+    forecast = SolutionCache().solve(invmt_plan)["values"]
 
     return {"forecast": forecast, "study_details": conv_kwargs}
+
+def rcdemo_preview(exact=False, **conv_kwargs):
+    """
+    Plans the demo study synchronously with the greedy ladder heuristic
+    (pyondo.ladder.LadderPyondo), which takes milliseconds and no worker slot.
+
+    The result is stored in the Celery result backend under a new task id, in the same
+    form rcdemo_task returns, so the demo progress and plan views read it like any task.
+
+    PARAMETERS:
+    > exact: also queue rcdemo_task for the optimal plan; its task id is returned with
+    the preview as "exact_task_id"
+    > conv_kwargs: DemoConverter kwargs, as for rcdemo_task
+
+    RETURNS:
+    > the task id of the stored preview, or None if the study cannot fund the minimum
+    bank balance; rcdemo_task should then be queued to report it as usual
+    """
+    from rcdemo.demo_converter import DemoConverter
+    from pyondo.ladder import LadderPyondo
+
+    converter = DemoConverter(**conv_kwargs)
+    invmt_plan = LadderPyondo(**converter.make_kwargs())
+    invmt_plan.pyondo()
+    if invmt_plan.status != "heuristic":
+        return None
+
+    result = {"forecast": invmt_plan.values(), "study_details": conv_kwargs, "method": invmt_plan.status}
+    if exact:
+        result["exact_task_id"] = rcdemo_task.delay(**conv_kwargs).task_id
+
+    task_id = uuid()
+    rcdemo_task.backend.store_result(task_id, result, states.SUCCESS)
+    return task_id
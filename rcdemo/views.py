@@ -26,6 +26,8 @@ class DemoPlanView(TemplateView):
         if r.json()["state"] == "SUCCESS":
             context["forecast"] = r.json()["details"]["forecast"]
             context["details"] = r.json()["details"]["study_details"]
+            context["method"] = r.json()["details"].get("method")
+            context["exact_task_id"] = r.json()["details"].get("exact_task_id")
 
             for i, record in enumerate(context["forecast"]):
                 record["month"] = dt(context["details"]["first_year"], 1, 1) + relativedelta(months=i)
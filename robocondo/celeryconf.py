@@ -4,6 +4,8 @@ from django.conf import settings
 import os
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
+from decouple import config, Csv
 from django.conf import settings
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "robocondo.settings.base")
@@ -16,3 +18,47 @@ CELERY_TIMEZONE = "UTC"
 
 app.config_from_object(settings, namespace="CELERY")
 app.autodiscover_tasks(lambda: settings.ROCO_APPS)
+
+# modules the tasks import in their body; preloaded once per worker, see preload_pyondo
+WARM_MODULES = [
+    "robocondo.instrumentation", "condo.models", "reservefundstudy.models", "investmentplan.models",
+    "investmentplan.converter", "rcdemo.demo_converter", "analysis.models", "analysis.analysis",
+    "pyyc.models", "gic_select.select",
+]
+
+@worker_init.connect
+def preload_pyondo(**kwargs):
+    """
+    Imports Pyomo, pyondo and WARM_MODULES in the worker's parent process, so every pool
+    process forks with them loaded. With an in-process solver (PYONDO_SOLVER other than
+    glpk) the layouts of studies of PYONDO_WARM_YEARS years are cached too.
+    Set PYONDO_WARMUP=False to skip
+    """
+    if not config("PYONDO_WARMUP", default=True, cast=bool):
+        return
+
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    from pyondo.solvers import BACKENDS
+    from pyondo.warmup import preload
+
+    in_process = not BACKENDS[config("PYONDO_SOLVER", default="glpk")].MODELS
+    timings = preload(
+        modules=WARM_MODULES,
+        years=config("PYONDO_WARM_YEARS", default="25,30", cast=Csv(int)) if in_process else (),
+    )
+    print ("Pyondo preloaded: {}".format(dict(timings)))
+
+@worker_process_init.connect
+def warm_pyondo_solver(**kwargs):
+    """
+    Runs one small solve in each pool process, so the solver is loaded before the first task
+    """
+    if not config("PYONDO_WARMUP", default=True, cast=bool):
+        return
+
+    from pyondo.warmup import warm_solver
+    print ("Pyondo solver warmed in {} s".format(warm_solver()))
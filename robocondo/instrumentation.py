@@ -0,0 +1,95 @@
+import json
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import redis
+from decouple import config
+from django.db import connection
+
+class StageTimer:
+    """
+    Lightweight timing and counter hook for the stages of a task run
+
+    > with timer.stage("make_kwargs"): ... records the stage's wall-clock time and the
+      number of database queries it executed
+    > timer.record(name, seconds) adds a stage timed elsewhere, e.g. Pyondo.timings
+    > timer.count(name, value) records a counter such as the number of periods
+    > when created with a task_id, the record is written to Redis after every stage so
+      that it can still be read with StageTimer.load(task_id) if the task is killed
+      by its time limit
+
+    timer = StageTimer(task_id=self.request.id)
+    with timer.stage("converter"):
+        converter = Converter(condo_id=condo_id, study_id=study_id)
+    timer.as_dict()
+    """
+    PREFIX = "robocondo:stages:"
+    TTL = 24 * 60 * 60
+
+    def __init__(self, task_id=None, client=None):
+        self.task_id = task_id
+        self._client = client
+        self.stages = []
+        self.counters = OrderedDict()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(config("REDIS_URL"))
+        return self._client
+
+    @contextmanager
+    def stage(self, name):
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                yield
+        finally:
+            self.record(name, time.perf_counter() - start, queries=queries[0])
+
+    def record(self, name, seconds, queries=0):
+        self.stages.append({"name": name, "time": seconds, "queries": queries})
+        self.save()
+
+    def count(self, name, value):
+        self.counters[name] = value
+
+    def as_dict(self):
+        """
+        Stages in the order they ran, counters, and total time and queries over the
+        top-level stages; a stage named "parent.child" is part of "parent" and not added
+        to the totals again
+        """
+        top = [stage for stage in self.stages if "." not in stage["name"]]
+        return {
+            "stages": self.stages,
+            "counters": self.counters,
+            "total": sum(stage["time"] for stage in top),
+            "queries": sum(stage["queries"] for stage in top),
+        }
+
+    def save(self):
+        """Writes the current record to Redis; a Redis outage is ignored"""
+        if self.task_id is None:
+            return
+        try:
+            self.client.set(self.PREFIX + self.task_id, json.dumps(self.as_dict(), default=str), ex=self.TTL)
+        except redis.RedisError:
+            pass
+
+    @classmethod
+    def load(cls, task_id, client=None):
+        """Returns the last record saved for task_id, or None"""
+        timer = cls(task_id=task_id, client=client)
+        try:
+            data = timer.client.get(cls.PREFIX + task_id)
+        except redis.RedisError:
+            return None
+        return json.loads(data.decode()) if data is not None else None